@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append("../")
+from model import AsyncKronosPredictor, KronosPredictor, load_pretrained
+
+
+def make_series(n_series, lookback, pred_len):
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(pd.date_range("2024-01-01 09:30", periods=lookback + pred_len, freq="5min"))
+    series = []
+    for _ in range(n_series):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, lookback)))
+        df = pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                           "volume": rng.random(lookback) * 1e4})
+        series.append((df, timestamps[:lookback].reset_index(drop=True), timestamps[lookback:].reset_index(drop=True)))
+    return series
+
+
+async def serve(predictor, series, pred_len, max_batch_size, max_wait):
+    async with AsyncKronosPredictor(predictor, max_batch_size=max_batch_size, max_wait=max_wait) as server:
+        latencies = []
+
+        async def request(s):
+            start = time.perf_counter()
+            await server.predict(*s, pred_len, top_p=0.9)
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(request(s) for s in series))
+        return latencies, server.requests / server.batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of concurrent requests: sequential predict vs AsyncKronosPredictor micro-batching.")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--tokenizer", default="NeoQuasar/Kronos-Tokenizer-base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--n-requests", type=int, default=64)
+    parser.add_argument("--lookback", type=int, default=400)
+    parser.add_argument("--pred-len", type=int, default=24)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=0.005, help="Batch wait window in seconds")
+    args = parser.parse_args()
+
+    model, tokenizer = load_pretrained(args.model, args.tokenizer, device=args.device)
+    predictor = KronosPredictor(model, tokenizer, device=args.device)
+    series = make_series(args.n_requests, args.lookback, args.pred_len)
+
+    with torch.no_grad():
+        start = time.perf_counter()
+        for s in series:
+            predictor.predict(*s, args.pred_len, top_p=0.9, verbose=False)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies, mean_batch = asyncio.run(serve(predictor, series, args.pred_len, args.max_batch_size, args.max_wait))
+        batched = time.perf_counter() - start
+
+    print(f"sequential: {args.n_requests / sequential:8.2f} req/s")
+    print(f"async:      {args.n_requests / batched:8.2f} req/s  (mean batch {mean_batch:.1f}, "
+          f"p50 latency {np.percentile(latencies, 50) * 1e3:.0f} ms, p99 {np.percentile(latencies, 99) * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+
+import torch
+
+sys.path.append("../")
+from model import Kronos, KronosPredictor, KronosTokenizer
+from model.kronos import auto_regressive_inference
+
+
+def load_predictor(args, compile):
+    tokenizer = KronosTokenizer.from_pretrained(args.tokenizer)
+    model = Kronos.from_pretrained(args.model)
+    tokenizer.eval()
+    model.eval()
+    start = time.perf_counter()
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=args.context_len, compile=compile,
+                                compile_max_batch=max(args.batch_sizes) * args.sample_count)
+    return predictor, time.perf_counter() - start
+
+
+def steps_per_second(predictor, batch_size, args):
+    torch.manual_seed(0)
+    x = torch.randn(batch_size, args.context_len, 6)
+    stamp = torch.zeros(batch_size, args.context_len + args.pred_len, 5)
+    x_stamp, y_stamp = stamp[:, :args.context_len], stamp[:, args.context_len:]
+
+    def run():
+        auto_regressive_inference(predictor.tokenizer, predictor.model, x, x_stamp, y_stamp, predictor.max_context,
+                                  args.pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=args.sample_count)
+
+    with torch.no_grad():
+        run()  # warmup
+        start = time.perf_counter()
+        for _ in range(args.n_iter):
+            run()
+    return args.pred_len * args.n_iter / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode steps/sec of eager vs torch.compile'd KronosPredictor on CPU.")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-mini")
+    parser.add_argument("--tokenizer", default="NeoQuasar/Kronos-Tokenizer-2k")
+    parser.add_argument("--context-len", type=int, default=256)
+    parser.add_argument("--pred-len", type=int, default=48)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--sample-count", type=int, default=1)
+    parser.add_argument("--n-iter", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's choice)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    eager, _ = load_predictor(args, compile=False)
+    compiled, warmup_seconds = load_predictor(args, compile=True)
+    print(f"compiled={compiled.compiled}, construction incl. warmup: {warmup_seconds:.1f}s")
+
+    print(f"{'batch':>6}{'eager steps/s':>15}{'compiled steps/s':>18}{'speedup':>9}")
+    for batch_size in args.batch_sizes:
+        base = steps_per_second(eager, batch_size, args)
+        fast = steps_per_second(compiled, batch_size, args)
+        print(f"{batch_size:>6}{base:>15.1f}{fast:>18.1f}{fast / base:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
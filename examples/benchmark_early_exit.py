@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+import pandas as pd
+import torch
+
+sys.path.append("../")
+from model import Kronos, KronosPredictor, KronosTokenizer
+from benchmark_quantization import INPUT_DATA_PATH, MODEL_REVISION, TOKENIZER_REVISION, evaluate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layers saved vs forecast MSE of early-exit decoding on the regression fixtures.")
+    parser.add_argument("--exit-heads", required=True, help="Exit heads from finetune/calibrate_early_exit.py")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--model-revision", default=MODEL_REVISION)
+    parser.add_argument("--tokenizer", default="NeoQuasar/Kronos-Tokenizer-base")
+    parser.add_argument("--tokenizer-revision", default=TOKENIZER_REVISION)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=None,
+                        help="Confidence thresholds (default: 0.5, 0.7, 0.9 and the calibrated one)")
+    parser.add_argument("--context-len", type=int, default=512)
+    parser.add_argument("--pred-len", type=int, default=30)
+    parser.add_argument("--sample-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's choice)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    df = pd.read_csv(INPUT_DATA_PATH, parse_dates=["timestamps"])
+    tokenizer = KronosTokenizer.from_pretrained(args.tokenizer, revision=args.tokenizer_revision)
+    model = Kronos.from_pretrained(args.model, revision=args.model_revision)
+    tokenizer.eval()
+    model.eval()
+    calibrated = model.load_exit_heads(args.exit_heads)
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=args.context_len)
+    thresholds = args.thresholds or sorted({0.5, 0.7, 0.9} | ({calibrated} if calibrated is not None else set()))
+    print(f"exit heads after blocks {sorted(int(layer) for layer in model.exit_heads)} of {model.n_layers}, "
+          f"calibrated threshold: {calibrated}")
+
+    model.disable_early_exit()
+    base_mse, base_time = evaluate(predictor, df, args.context_len, args.pred_len, args.sample_size)
+    print(f"{'threshold':>10}{'layers saved':>14}{'MSE':>12}{'delta':>12}{'s/forecast':>12}{'speedup':>9}")
+    print(f"{'off':>10}{0.0:>14.3f}{base_mse:>12.6f}{0.0:>+12.6f}{base_time:>12.3f}{1.0:>8.2f}x")
+    for threshold in thresholds:
+        model.enable_early_exit(threshold)
+        mse, seconds = evaluate(predictor, df, args.context_len, args.pred_len, args.sample_size)
+        saved = model.exit_stats.layers_saved
+        print(f"{threshold:>10.2f}{saved:>14.3f}{mse:>12.6f}{mse - base_mse:>+12.6f}{seconds:>12.3f}{base_time / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
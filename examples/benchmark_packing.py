@@ -0,0 +1,54 @@
+import argparse
+import sys
+import time
+
+import torch
+
+sys.path.append("../")
+from model import Kronos
+
+
+def benchmark(model, batch_size, seq_len, n_iter):
+    s1_ids = torch.randint(0, model.s1_vocab_size, (batch_size, seq_len))
+    s2_ids = torch.randint(0, 2 ** model.s2_bits, (batch_size, seq_len))
+    stamp = torch.zeros(batch_size, seq_len, 5)
+
+    def step():
+        # One KV-cached decode step after a prefill, as in auto_regressive_inference.
+        kv_cache = model.init_kv_cache(seq_len)
+        model.decode_s1(s1_ids[:, :-1], s2_ids[:, :-1], stamp[:, :-1], kv_cache=kv_cache)
+        start = time.perf_counter()
+        _, context = model.decode_s1(s1_ids[:, -1:], s2_ids[:, -1:], stamp[:, -1:], kv_cache=kv_cache)
+        model.decode_s2(context, s1_ids[:, -1:])
+        return time.perf_counter() - start
+
+    with torch.no_grad():
+        step()  # warmup
+        return sum(step() for _ in range(n_iter)) / n_iter * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode-step latency with separate vs packed QKV and w1/w3 projections on CPU.")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 50, 200, 1000])
+    parser.add_argument("--seq-len", type=int, default=128)
+    parser.add_argument("--n-iter", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's choice)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = Kronos.from_pretrained(args.model).eval()
+    model.fold_embeddings()
+
+    print(f"{'batch':>6}{'separate ms':>13}{'packed ms':>11}{'speedup':>9}")
+    for batch_size in args.batch_sizes:
+        model.unpack_weights()
+        base = benchmark(model, batch_size, args.seq_len, args.n_iter)
+        model.pack_weights()
+        packed = benchmark(model, batch_size, args.seq_len, args.n_iter)
+        print(f"{batch_size:>6}{base:>13.2f}{packed:>11.2f}{base / packed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append("../")
+from model import KronosPredictor, PredictorPool, load_pretrained
+
+
+def make_series(n_series, lookback, pred_len):
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(pd.date_range("2024-01-01 09:30", periods=lookback + pred_len, freq="5min"))
+    series = []
+    for _ in range(n_series):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, lookback)))
+        df = pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                           "volume": rng.random(lookback) * 1e4})
+        series.append((df, timestamps[:lookback].reset_index(drop=True), timestamps[lookback:].reset_index(drop=True)))
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU throughput: one predictor process vs a PredictorPool with shared weights.")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--tokenizer", default="NeoQuasar/Kronos-Tokenizer-base")
+    parser.add_argument("--n-series", type=int, default=64)
+    parser.add_argument("--lookback", type=int, default=400)
+    parser.add_argument("--pred-len", type=int, default=24)
+    parser.add_argument("--n-workers", type=int, default=4)
+    parser.add_argument("--num-threads", type=int, default=None, help="Intra-op threads per worker")
+    parser.add_argument("--chunk-size", type=int, default=8, help="Series per worker task")
+    parser.add_argument("--cpu-affinity", action="store_true", help="Pin every worker to its own cores")
+    args = parser.parse_args()
+
+    model, tokenizer = load_pretrained(args.model, args.tokenizer)
+    predictor = KronosPredictor(model, tokenizer, device="cpu")
+    dfs, x_ts, y_ts = (list(column) for column in zip(*make_series(args.n_series, args.lookback, args.pred_len)))
+
+    with torch.no_grad():
+        start = time.perf_counter()
+        for i in range(0, args.n_series, args.chunk_size):
+            window = slice(i, i + args.chunk_size)
+            predictor.predict_batch(dfs[window], x_ts[window], y_ts[window], args.pred_len, top_p=0.9, verbose=False)
+        single = time.perf_counter() - start
+
+    with PredictorPool(predictor, n_workers=args.n_workers, num_threads=args.num_threads, cpu_affinity=args.cpu_affinity or None,
+                       chunk_size=args.chunk_size) as pool:
+        start = time.perf_counter()
+        pool.predict_batch(dfs, x_ts, y_ts, args.pred_len, top_p=0.9)
+        pooled = time.perf_counter() - start
+        stats = pool.stats()
+
+    print(f"single process ({torch.get_num_threads()} threads): {args.n_series / single:8.2f} series/s")
+    print(f"pool ({args.n_workers} x {pool.num_threads} threads):      {args.n_series / pooled:8.2f} series/s  ({single / pooled:.1f}x)")
+    for s in stats:
+        print(f"  worker {s['worker']} (pid {s['pid']}, cpus {s['cpus']}): {s['tasks']} tasks, "
+              f"busy {s['busy_seconds']:.1f} s, utilization {s['utilization']:.0%}")
+    print(f"host cores: {os.cpu_count()}")
+
+
+if __name__ == "__main__":
+    main()
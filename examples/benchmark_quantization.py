@@ -0,0 +1,75 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append("../")
+from model import Kronos, KronosPredictor, KronosTokenizer
+
+# Same fixtures and protocol as tests/test_kronos_regression.py::test_kronos_predictor_mse
+INPUT_DATA_PATH = Path(__file__).resolve().parent.parent / "tests" / "data" / "regression_input.csv"
+MODEL_REVISION = "901c26c1332695a2a8f243eb2f37243a37bea320"
+TOKENIZER_REVISION = "0e0117387f39004a9016484a186a908917e22426"
+FEATURE_NAMES = ["open", "high", "low", "close", "volume", "amount"]
+MSE_FEATURE_NAMES = ["open", "high", "low", "close"]
+SEED = 123
+
+
+def load_predictor(quantize):
+    tokenizer = KronosTokenizer.from_pretrained("NeoQuasar/Kronos-Tokenizer-base", revision=TOKENIZER_REVISION)
+    model = Kronos.from_pretrained("NeoQuasar/Kronos-small", revision=MODEL_REVISION)
+    tokenizer.eval()
+    model.eval()
+    return KronosPredictor(model, tokenizer, device="cpu", max_context=512, quantize=quantize)
+
+
+def evaluate(predictor, df, context_len, pred_len, sample_size):
+    valid_region = df.iloc[context_len:df.shape[0] - pred_len]
+    sampled_rows = valid_region.sample(n=sample_size, random_state=SEED).sort_index()
+
+    mse_values, seconds = [], []
+    with torch.no_grad():
+        for row_idx in sampled_rows.index:
+            context_slice = df.iloc[row_idx - context_len:row_idx]
+            future_slice = df.iloc[row_idx:row_idx + pred_len]
+            start = time.perf_counter()
+            pred_df = predictor.predict(
+                df=context_slice[FEATURE_NAMES].reset_index(drop=True),
+                x_timestamp=context_slice["timestamps"].reset_index(drop=True),
+                y_timestamp=future_slice["timestamps"].reset_index(drop=True),
+                pred_len=pred_len, T=1.0, top_k=1, top_p=1.0, sample_count=1, verbose=False,
+            )
+            seconds.append(time.perf_counter() - start)
+            obtained = pred_df[MSE_FEATURE_NAMES].to_numpy(dtype=np.float32)
+            expected = future_slice[MSE_FEATURE_NAMES].to_numpy(dtype=np.float32)
+            mse_values.append(float(np.mean((obtained - expected) ** 2)))
+    return float(np.mean(mse_values)), float(np.mean(seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy/throughput report of INT8 dynamic quantization on the regression fixtures.")
+    parser.add_argument("--context-lens", type=int, nargs="+", default=[512, 256])
+    parser.add_argument("--pred-len", type=int, default=30)
+    parser.add_argument("--sample-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's choice)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    df = pd.read_csv(INPUT_DATA_PATH, parse_dates=["timestamps"])
+    predictors = {"fp32": load_predictor(None), "int8": load_predictor("int8")}
+
+    print(f"{'context':>8}{'mode':>6}{'MSE':>12}{'delta':>12}{'s/forecast':>12}{'speedup':>9}")
+    for context_len in args.context_lens:
+        results = {mode: evaluate(p, df, context_len, args.pred_len, args.sample_size) for mode, p in predictors.items()}
+        base_mse, base_time = results["fp32"]
+        for mode, (mse, seconds) in results.items():
+            print(f"{context_len:>8}{mode:>6}{mse:>12.6f}{mse - base_mse:>+12.6f}{seconds:>12.3f}{base_time / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+
+import torch
+
+sys.path.append("../")
+from model.sampling import Sampler
+
+
+def benchmark(sampler, logits, params, n_iter):
+    for _ in range(5):  # warmup
+        sampler(logits, **params)
+    if logits.is_cuda:
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(n_iter):
+        sampler(logits, **params)
+    if logits.is_cuda:
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / n_iter * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark of single-step token samplers (s1/s2 vocabularies).")
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--vocab", type=int, default=1024)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 5, 32, 160])
+    parser.add_argument("--n-iter", type=int, default=200)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    settings = {
+        "T=1.0, top_p=0.9": dict(temperature=1.0, top_k=0, top_p=0.9),
+        "T=1.0, top_p=0.99": dict(temperature=1.0, top_k=0, top_p=0.99),
+        "T=1.0, top_k=10": dict(temperature=1.0, top_k=10, top_p=1.0),
+        "T=0.8": dict(temperature=0.8, top_k=0, top_p=1.0),
+    }
+    strategies = ["multinomial", "nucleus", "gumbel", "greedy"]
+
+    print(f"device={args.device}, vocab={args.vocab}, time per call in us")
+    print(f"{'setting':<20}{'batch':>7}" + "".join(f"{s:>13}" for s in strategies))
+    for name, params in settings.items():
+        for batch_size in args.batch_sizes:
+            # Peaked logits, roughly like a trained model's s1/s2 heads.
+            logits = torch.randn(batch_size, args.vocab, device=args.device) * 3
+            row = f"{name:<20}{batch_size:>7}"
+            for strategy in strategies:
+                if strategy == "gumbel" and params["top_p"] < 1.0:
+                    row += f"{'-':>13}"
+                    continue
+                row += f"{benchmark(Sampler(strategy), logits, params, args.n_iter):>13.1f}"
+            print(row)
+
+    # Mixed per-row parameters in one batch (only the fused sampler supports this).
+    batch_size = max(args.batch_sizes)
+    logits = torch.randn(batch_size, args.vocab, device=args.device) * 3
+    mixed = dict(
+        temperature=torch.rand(batch_size, device=args.device) + 0.5,
+        top_k=torch.zeros(batch_size, dtype=torch.long, device=args.device),
+        top_p=torch.rand(batch_size, device=args.device) * 0.2 + 0.8,
+    )
+    print(f"mixed per-row params, batch {batch_size}: nucleus {benchmark(Sampler('nucleus'), logits, mixed, args.n_iter):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append("../")
+from model import ForecastSession, KronosPredictor, load_pretrained
+
+
+def make_series(n_bars):
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(pd.date_range("2024-01-01 09:30", periods=n_bars, freq="5min"))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    df = pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                       "volume": rng.random(n_bars) * 1e4})
+    return df, timestamps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency per closed bar: re-running predict on the window vs ForecastSession append + forecast.")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--tokenizer", default="NeoQuasar/Kronos-Tokenizer-base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--lookback", type=int, default=400)
+    parser.add_argument("--pred-len", type=int, default=12)
+    parser.add_argument("--n-bars", type=int, default=20, help="Bars closing during the benchmark")
+    args = parser.parse_args()
+
+    model, tokenizer = load_pretrained(args.model, args.tokenizer, device=args.device)
+    predictor = KronosPredictor(model, tokenizer, device=args.device, sliding_window=True)
+    df, timestamps = make_series(args.lookback + args.n_bars + args.pred_len)
+
+    with torch.no_grad():
+        start = time.perf_counter()
+        for t in range(args.lookback, args.lookback + args.n_bars):
+            window = slice(t - args.lookback + 1, t + 1)
+            y_timestamp = timestamps[t + 1:t + 1 + args.pred_len].reset_index(drop=True)
+            predictor.predict(df[window], timestamps[window].reset_index(drop=True), y_timestamp, args.pred_len, top_p=0.9, verbose=False)
+        repredict = (time.perf_counter() - start) / args.n_bars
+
+        session = ForecastSession(predictor, df[:args.lookback], timestamps[:args.lookback])
+        start = time.perf_counter()
+        for t in range(args.lookback, args.lookback + args.n_bars):
+            session.append(df.iloc[t], timestamps[t])
+            session.forecast(args.pred_len, top_p=0.9)
+        incremental = (time.perf_counter() - start) / args.n_bars
+
+    print(f"re-predict: {repredict * 1e3:8.1f} ms/bar")
+    print(f"session:    {incremental * 1e3:8.1f} ms/bar  ({repredict / incremental:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
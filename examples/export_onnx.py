@@ -0,0 +1,25 @@
+import argparse
+import sys
+
+sys.path.append("../")
+from model import Kronos, KronosTokenizer, export_onnx
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Kronos and its tokenizer to ONNX graphs for OnnxKronosPredictor.")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--tokenizer", default="NeoQuasar/Kronos-Tokenizer-base")
+    parser.add_argument("--output-dir", default="./onnx/kronos-small")
+    parser.add_argument("--max-context", type=int, default=512)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    tokenizer = KronosTokenizer.from_pretrained(args.tokenizer)
+    model = Kronos.from_pretrained(args.model)
+    paths = export_onnx(model, tokenizer, args.output_dir, max_context=args.max_context, opset_version=args.opset)
+    for name, path in paths.items():
+        print(f"{name:>10}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+
+# Ensure project root is in path
+sys.path.append('../')
+from config import Config
+from dataset import QlibDataset
+from model.kronos import KronosTokenizer, Kronos
+from utils.training_utils import set_seed, get_model_size, format_time
+
+# Candidate confidence thresholds, from eager to conservative.
+THRESHOLDS = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99]
+
+
+def kl_to_final(logits, final_logits):
+    """KL(final || exit) per token, averaged: the exit is trained to reproduce the full model's distribution."""
+    return F.kl_div(F.log_softmax(logits.float(), dim=-1), F.log_softmax(final_logits.float(), dim=-1),
+                    log_target=True, reduction='batchmean')
+
+
+def next_token_batch(tokenizer, batch_x, batch_x_stamp, device):
+    batch_x = batch_x.squeeze(0).to(device, non_blocking=True)
+    batch_x_stamp = batch_x_stamp.squeeze(0).to(device, non_blocking=True)
+    with torch.no_grad():
+        token_seq_0, token_seq_1 = tokenizer.encode(batch_x, half=True)
+    # Same shift as train_predictor.py; s2 is teacher-forced on the true next s1 token.
+    return token_seq_0[:, :-1], token_seq_1[:, :-1], batch_x_stamp[:, :-1, :], token_seq_0[:, 1:]
+
+
+def train_exit_heads(model, tokenizer, device, config):
+    """Trains the exit heads by distillation from the frozen model's own s1/s2 distributions."""
+    train_dataset = QlibDataset('train')
+    train_loader = DataLoader(train_dataset, batch_size=config['batch_size'], shuffle=True,
+                              num_workers=config.get('num_workers', 2), pin_memory=True, drop_last=True)
+    optimizer = torch.optim.AdamW(model.exit_heads.parameters(), lr=config['exit_learning_rate'])
+    n_layers = model.n_layers
+
+    model.train()
+    step, start_time = 0, time.time()
+    while step < config['exit_train_steps']:
+        for batch_x, batch_x_stamp in train_loader:
+            s1_ids, s2_ids, stamp, s1_targets = next_token_batch(tokenizer, batch_x, batch_x_stamp, device)
+            outputs = model.exit_forward(s1_ids, s2_ids, stamp, s1_targets=s1_targets)
+            final_s1, final_s2 = (logits.detach() for logits in outputs.pop(n_layers))
+            loss = sum(kl_to_final(s1, final_s1) + kl_to_final(s2, final_s2) for s1, s2 in outputs.values()) / len(outputs)
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+            step += 1
+            if step % config['log_interval'] == 0:
+                print(f"[Step {step}/{config['exit_train_steps']}] Exit loss: {loss.item():.4f}, "
+                      f"Elapsed: {format_time(time.time() - start_time)}")
+            if step >= config['exit_train_steps']:
+                break
+
+
+@torch.no_grad()
+def calibrate_threshold(model, tokenizer, device, config):
+    """
+    Evaluates every candidate threshold on the validation set and returns the lowest one whose exited s1 tokens
+    agree with the full model's argmax at least `exit_target_agreement` of the time.
+
+    Exits are simulated on full-depth hidden states, i.e. without the state propagation of cached decoding.
+    """
+    valid_dataset = QlibDataset('val')
+    valid_dataset.set_epoch_seed(0)
+    val_loader = DataLoader(valid_dataset, batch_size=config['batch_size'], shuffle=False,
+                            num_workers=config.get('num_workers', 2), pin_memory=True)
+    model.eval()
+    n_layers = model.n_layers
+
+    confidence, prediction, reference = {}, {}, []
+    for step, (batch_x, batch_x_stamp) in enumerate(val_loader):
+        if step >= config['exit_val_steps']:
+            break
+        s1_ids, s2_ids, stamp, s1_targets = next_token_batch(tokenizer, batch_x, batch_x_stamp, device)
+        outputs = model.exit_forward(s1_ids, s2_ids, stamp, s1_targets=s1_targets)
+        reference.append(outputs.pop(n_layers)[0].argmax(dim=-1).flatten().cpu())
+        for layer, (s1_logits, _) in outputs.items():
+            conf, pred = F.softmax(s1_logits.float(), dim=-1).max(dim=-1)
+            confidence.setdefault(layer, []).append(conf.flatten().cpu())
+            prediction.setdefault(layer, []).append(pred.flatten().cpu())
+
+    reference = torch.cat(reference)
+    layers = sorted(confidence)
+    confidence = {layer: torch.cat(confidence[layer]) for layer in layers}
+    prediction = {layer: torch.cat(prediction[layer]) for layer in layers}
+
+    results = []
+    for threshold in THRESHOLDS:
+        exit_layer = torch.full_like(reference, n_layers)
+        predicted = reference.clone()
+        for layer in reversed(layers):  # The earliest confident exit wins.
+            confident = confidence[layer] >= threshold
+            exit_layer[confident] = layer
+            predicted[confident] = prediction[layer][confident]
+        exited = exit_layer < n_layers
+        results.append({
+            'threshold': threshold,
+            'exit_rate': exited.float().mean().item(),
+            'agreement': (predicted[exited] == reference[exited]).float().mean().item() if exited.any() else 1.0,
+            'layers_saved': 1.0 - exit_layer.float().mean().item() / n_layers,
+        })
+        print(f"threshold {threshold:.2f}: exit rate {results[-1]['exit_rate']:.3f}, "
+              f"agreement {results[-1]['agreement']:.3f}, layers saved {results[-1]['layers_saved']:.3f}")
+
+    accepted = [r for r in results if r['agreement'] >= config['exit_target_agreement']]
+    best = accepted[0] if accepted else results[-1]
+    return best['threshold'], results
+
+
+def main(config: dict):
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    set_seed(config['seed'])
+
+    tokenizer = KronosTokenizer.from_pretrained(config['finetuned_tokenizer_path'])
+    tokenizer.eval().to(device)
+    model = Kronos.from_pretrained(config['finetuned_predictor_path'])
+    model.to(device)
+    for param in model.parameters():
+        param.requires_grad_(False)
+
+    exit_layers = config['exit_layers'] or sorted({max(1, model.n_layers * k // 4) for k in (1, 2, 3)} - {model.n_layers})
+    model.add_exit_heads(exit_layers)
+    print(f"Predictor Model Size: {get_model_size(model)}, exit heads after blocks {exit_layers}")
+
+    train_exit_heads(model, tokenizer, device, config)
+    threshold, results = calibrate_threshold(model, tokenizer, device, config)
+    print(f"Selected threshold: {threshold}")
+
+    os.makedirs(os.path.dirname(config['exit_heads_path']), exist_ok=True)
+    model.save_exit_heads(config['exit_heads_path'], threshold=threshold)
+    with open(os.path.splitext(config['exit_heads_path'])[0] + '_calibration.json', 'w') as f:
+        json.dump({'exit_layers': exit_layers, 'threshold': threshold, 'results': results}, f, indent=4)
+    print(f"Exit heads saved to {config['exit_heads_path']}")
+
+
+if __name__ == '__main__':
+    # Usage: python calibrate_early_exit.py
+    config_instance = Config()
+    main(config_instance.__dict__)
@@ -106,6 +106,31 @@ class Config:
         self.finetuned_tokenizer_path = f"{self.save_path}/{self.tokenizer_save_folder_name}/checkpoints/best_model"
         self.finetuned_predictor_path = f"{self.save_path}/{self.predictor_save_folder_name}/checkpoints/best_model"
 
+        # =================================================================
+        # Distillation Parameters (see train_distill.py)
+        # =================================================================
+        # A frozen teacher (e.g. the fine-tuned Kronos-base) supervises a smaller student on the same data and tokenizer.
+        self.teacher_predictor_path = self.finetuned_predictor_path
+        self.student_n_layers = 4
+        self.student_d_model = None  # None keeps the teacher's size (and allows initialising from its weights).
+        self.student_n_heads = None
+        self.student_ff_dim = None
+        self.student_init_from_teacher = True
+        self.distill_temperature = 2.0
+        self.distill_alpha = 0.9  # Weight of the KL terms; the rest goes to the next-token cross-entropy.
+        self.distill_learning_rate = 2e-4
+        self.student_save_folder_name = 'distill_student_demo'
+
+        # =================================================================
+        # Early Exit Parameters (see calibrate_early_exit.py)
+        # =================================================================
+        self.exit_layers = None  # Blocks run before each exit head; None places exits at 1/4, 1/2 and 3/4 depth.
+        self.exit_learning_rate = 1e-3
+        self.exit_train_steps = 2000  # Training batches for the exit heads (the predictor stays frozen).
+        self.exit_val_steps = 200  # Validation batches used to pick the confidence threshold.
+        self.exit_target_agreement = 0.95  # Minimum share of exited s1 tokens that match the full model's argmax.
+        self.exit_heads_path = f"{self.save_path}/{self.predictor_save_folder_name}/early_exit_heads.pt"
+
         # =================================================================
         # Backtesting Parameters
         # =================================================================
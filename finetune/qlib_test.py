@@ -23,6 +23,7 @@ from qlib.utils.time import Freq
 sys.path.append("../")
 from config import Config
 from model.kronos import Kronos, KronosTokenizer, auto_regressive_inference
+from model.registry import load_pretrained
 
 
 # =================================================================================
@@ -208,8 +209,7 @@ def load_models(config: dict) -> tuple[KronosTokenizer, Kronos]:
     """Loads the fine-tuned tokenizer and predictor model."""
     device = torch.device(config['device'])
     print(f"Loading models onto device: {device}...")
-    tokenizer = KronosTokenizer.from_pretrained(config['tokenizer_path']).to(device).eval()
-    model = Kronos.from_pretrained(config['model_path']).to(device).eval()
+    model, tokenizer = load_pretrained(config['model_path'], config['tokenizer_path'], device=device)
     return tokenizer, model
 
 
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+from time import gmtime, strftime
+import torch.distributed as dist
+import torch
+from torch.nn.parallel import DistributedDataParallel as DDP
+
+import comet_ml
+
+# Ensure project root is in path
+sys.path.append('../')
+from config import Config
+from model.kronos import KronosTokenizer, Kronos
+from model.distillation import build_student, distillation_loss
+# Import shared utilities
+from utils.training_utils import (
+    setup_ddp,
+    cleanup_ddp,
+    set_seed,
+    get_model_size,
+    format_time
+)
+from train_predictor import create_dataloaders
+
+
+def distill_step(student, teacher, tokenizer, batch_x, batch_x_stamp, device, config):
+    """Runs teacher and student on one batch and returns the distillation loss terms."""
+    batch_x = batch_x.squeeze(0).to(device, non_blocking=True)
+    batch_x_stamp = batch_x_stamp.squeeze(0).to(device, non_blocking=True)
+
+    with torch.no_grad():
+        token_seq_0, token_seq_1 = tokenizer.encode(batch_x, half=True)
+    token_in = [token_seq_0[:, :-1], token_seq_1[:, :-1]]
+    token_out = [token_seq_0[:, 1:], token_seq_1[:, 1:]]
+    stamp = batch_x_stamp[:, :-1, :]
+
+    # Both models condition s2 on the true next s1 token, so their s2 distributions are comparable.
+    with torch.no_grad():
+        teacher_logits = teacher(token_in[0], token_in[1], stamp, use_teacher_forcing=True, s1_targets=token_out[0])
+    student_logits = student(token_in[0], token_in[1], stamp, use_teacher_forcing=True, s1_targets=token_out[0])
+    return distillation_loss(student.module if isinstance(student, DDP) else student, student_logits, teacher_logits,
+                             token_out[0], token_out[1], config['distill_temperature'], config['distill_alpha'])
+
+
+def train_student(student, teacher, tokenizer, device, config, save_dir, logger, rank, world_size):
+    """
+    The main distillation and validation loop. Checkpoints are selected on the validation KL to the teacher.
+    """
+    start_time = time.time()
+    if rank == 0:
+        effective_bs = config['batch_size'] * world_size
+        print(f"Effective BATCHSIZE per GPU: {config['batch_size']}, Total: {effective_bs}")
+
+    train_loader, val_loader, train_dataset, valid_dataset = create_dataloaders(config, rank, world_size)
+
+    optimizer = torch.optim.AdamW(
+        student.parameters(),
+        lr=config['distill_learning_rate'],
+        betas=(config['adam_beta1'], config['adam_beta2']),
+        weight_decay=config['adam_weight_decay']
+    )
+    scheduler = torch.optim.lr_scheduler.OneCycleLR(
+        optimizer, max_lr=config['distill_learning_rate'],
+        steps_per_epoch=len(train_loader), epochs=config['epochs'],
+        pct_start=0.03, div_factor=10
+    )
+
+    best_val_loss = float('inf')
+    dt_result = {}
+    batch_idx_global = 0
+
+    for epoch_idx in range(config['epochs']):
+        epoch_start_time = time.time()
+        student.train()
+        train_loader.sampler.set_epoch(epoch_idx)
+
+        train_dataset.set_epoch_seed(epoch_idx * 10000 + rank)
+        valid_dataset.set_epoch_seed(0)
+
+        for i, (batch_x, batch_x_stamp) in enumerate(train_loader):
+            loss, kl_s1, kl_s2, ce_loss = distill_step(student, teacher, tokenizer, batch_x, batch_x_stamp, device, config)
+
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), max_norm=3.0)
+            optimizer.step()
+            scheduler.step()
+
+            if rank == 0 and (batch_idx_global + 1) % config['log_interval'] == 0:
+                lr = optimizer.param_groups[0]['lr']
+                print(
+                    f"[Rank {rank}, Epoch {epoch_idx + 1}/{config['epochs']}, Step {i + 1}/{len(train_loader)}] "
+                    f"LR {lr:.6f}, Loss: {loss.item():.4f}, KL s1/s2: {kl_s1.item():.4f}/{kl_s2.item():.4f}, CE: {ce_loss.item():.4f}"
+                )
+            if rank == 0 and logger:
+                lr = optimizer.param_groups[0]['lr']
+                logger.log_metric('train_distill_loss_batch', loss.item(), step=batch_idx_global)
+                logger.log_metric('train_kl_s1_each_batch', kl_s1.item(), step=batch_idx_global)
+                logger.log_metric('train_kl_s2_each_batch', kl_s2.item(), step=batch_idx_global)
+                logger.log_metric('train_ce_each_batch', ce_loss.item(), step=batch_idx_global)
+                logger.log_metric('distill_learning_rate', lr, step=batch_idx_global)
+
+            batch_idx_global += 1
+
+        # --- Validation Loop ---
+        student.eval()
+        val_sums_rank = torch.zeros(3, device=device)  # KL s1, KL s2, batches
+        with torch.no_grad():
+            for batch_x, batch_x_stamp in val_loader:
+                _, kl_s1, kl_s2, _ = distill_step(student, teacher, tokenizer, batch_x, batch_x_stamp, device, config)
+                val_sums_rank += torch.stack([kl_s1.detach(), kl_s2.detach(), torch.ones((), device=device)])
+
+        dist.all_reduce(val_sums_rank, op=dist.ReduceOp.SUM)
+        n_batches = val_sums_rank[2].item()
+        avg_kl_s1 = val_sums_rank[0].item() / n_batches if n_batches > 0 else 0
+        avg_kl_s2 = val_sums_rank[1].item() / n_batches if n_batches > 0 else 0
+        avg_val_loss = (avg_kl_s1 + avg_kl_s2) / 2
+
+        # --- End of Epoch Summary & Checkpointing (Master Process Only) ---
+        if rank == 0:
+            print(f"\n--- Epoch {epoch_idx + 1}/{config['epochs']} Summary ---")
+            print(f"Validation KL to teacher: {avg_val_loss:.4f} (s1 {avg_kl_s1:.4f}, s2 {avg_kl_s2:.4f})")
+            print(f"Time This Epoch: {format_time(time.time() - epoch_start_time)}")
+            print(f"Total Time Elapsed: {format_time(time.time() - start_time)}\n")
+            if logger:
+                logger.log_metric('val_distill_kl_epoch', avg_val_loss, epoch=epoch_idx)
+
+            if avg_val_loss < best_val_loss:
+                best_val_loss = avg_val_loss
+                save_path = f"{save_dir}/checkpoints/best_model"
+                student.module.save_pretrained(save_path)
+                print(f"Best student saved to {save_path} (Val KL: {best_val_loss:.4f})")
+
+        dist.barrier()
+
+    dt_result['best_val_kl'] = best_val_loss
+    return dt_result
+
+
+def main(config: dict):
+    """Main function to orchestrate the DDP distillation process."""
+    rank, world_size, local_rank = setup_ddp()
+    device = torch.device(f"cuda:{local_rank}")
+    set_seed(config['seed'], rank)
+
+    save_dir = os.path.join(config['save_path'], config['student_save_folder_name'])
+
+    # Logger and summary setup (master process only)
+    comet_logger, master_summary = None, {}
+    if rank == 0:
+        os.makedirs(os.path.join(save_dir, 'checkpoints'), exist_ok=True)
+        master_summary = {
+            'start_time': strftime("%Y-%m-%dT%H-%M-%S", gmtime()),
+            'save_directory': save_dir,
+            'world_size': world_size,
+        }
+        if config['use_comet']:
+            comet_logger = comet_ml.Experiment(
+                api_key=config['comet_config']['api_key'],
+                project_name=config['comet_config']['project_name'],
+                workspace=config['comet_config']['workspace'],
+            )
+            comet_logger.add_tag(config['comet_tag'])
+            comet_logger.set_name(config['comet_name'])
+            comet_logger.log_parameters(config)
+            print("Comet Logger Initialized.")
+
+    dist.barrier()
+
+    # Model Initialization
+    tokenizer = KronosTokenizer.from_pretrained(config['finetuned_tokenizer_path'])
+    tokenizer.eval().to(device)
+
+    teacher = Kronos.from_pretrained(config['teacher_predictor_path'])
+    teacher.eval().to(device)
+    for param in teacher.parameters():
+        param.requires_grad_(False)
+
+    student = build_student(teacher, n_layers=config['student_n_layers'], d_model=config['student_d_model'],
+                            n_heads=config['student_n_heads'], ff_dim=config['student_ff_dim'],
+                            init_from_teacher=config['student_init_from_teacher'])
+    student = DDP(student, device_ids=[local_rank], find_unused_parameters=False)
+
+    if rank == 0:
+        print(f"Teacher Model Size: {get_model_size(teacher)}, Student Model Size: {get_model_size(student.module)}")
+        master_summary['student_config'] = {k: getattr(student.module, k) for k in ('n_layers', 'd_model', 'n_heads', 'ff_dim')}
+
+    # Start Distillation
+    dt_result = train_student(
+        student, teacher, tokenizer, device, config, save_dir, comet_logger, rank, world_size
+    )
+
+    if rank == 0:
+        master_summary['final_result'] = dt_result
+        with open(os.path.join(save_dir, 'summary.json'), 'w') as f:
+            json.dump(master_summary, f, indent=4)
+        print('Distillation finished. Summary file saved.')
+        if comet_logger: comet_logger.end()
+
+    cleanup_ddp()
+
+
+if __name__ == '__main__':
+    # Usage: torchrun --standalone --nproc_per_node=NUM_GPUS train_distill.py
+    if "WORLD_SIZE" not in os.environ:
+        raise RuntimeError("This script must be launched with `torchrun`.")
+
+    config_instance = Config()
+    main(config_instance.__dict__)
@@ -78,6 +78,12 @@ class ConfigLoader:
     def get_distributed_config(self) -> Dict[str, Any]:
         return self.config.get('distributed', {})
     
+    def get_distillation_config(self) -> Dict[str, Any]:
+        return self.config.get('distillation', {})
+    
+    def get_lora_config(self) -> Dict[str, Any]:
+        return self.config.get('lora', {})
+    
     def update_config(self, updates: Dict[str, Any]):
 
         def update_nested_dict(d, u):
@@ -179,6 +185,28 @@ class CustomFinetuneConfig:
         self.use_ddp = distributed_config.get('use_ddp', False)
         self.ddp_backend = distributed_config.get('backend', 'nccl')
         
+        # distillation of a smaller student from a frozen teacher (see distill_base_model.py)
+        distillation_config = self.loader.get_distillation_config()
+        self.teacher_predictor_path = distillation_config.get('teacher_predictor')
+        self.student_n_layers = distillation_config.get('student_n_layers', 4)
+        self.student_d_model = distillation_config.get('student_d_model')
+        self.student_n_heads = distillation_config.get('student_n_heads')
+        self.student_ff_dim = distillation_config.get('student_ff_dim')
+        self.student_init_from_teacher = distillation_config.get('init_from_teacher', True)
+        self.distill_temperature = distillation_config.get('temperature', 2.0)
+        self.distill_alpha = distillation_config.get('alpha', 0.9)
+        self.distill_learning_rate = distillation_config.get('learning_rate', 2e-4)
+        self.distill_epochs = distillation_config.get('epochs', self.basemodel_epochs)
+        self.student_save_name = distillation_config.get('student_save_name', 'student')
+        
+        # low-rank adapter finetuning of the predictor; rank 0 trains all parameters
+        lora_config = self.loader.get_lora_config()
+        self.lora_rank = lora_config.get('rank', 0)
+        self.lora_alpha = lora_config.get('alpha', 16)
+        self.lora_dropout = lora_config.get('dropout', 0.0)
+        self.lora_targets = lora_config.get('targets', ["q_proj", "k_proj", "v_proj", "out_proj", "w1", "w2", "w3"])
+        self.lora_adapter_name = lora_config.get('adapter_name', self.exp_name)
+        
         self._compute_full_paths()
     
     def _compute_full_paths(self):
@@ -188,6 +216,12 @@ class CustomFinetuneConfig:
         
         self.basemodel_save_path = os.path.join(self.base_save_path, self.basemodel_save_name)
         self.basemodel_best_model_path = os.path.join(self.basemodel_save_path, 'best_model')
+        
+        self.student_save_path = os.path.join(self.base_save_path, self.student_save_name)
+        self.adapter_save_path = os.path.join(self.basemodel_save_path, 'best_adapter.pt')
+        # the fine-tuned predictor is the default teacher
+        if not self.teacher_predictor_path:
+            self.teacher_predictor_path = self.basemodel_best_model_path
     
     def get_tokenizer_config(self):
 
@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import random
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel as DDP
+
+sys.path.append('../')
+from model import Kronos, KronosTokenizer
+from model.distillation import build_student, distillation_loss
+from config_loader import CustomFinetuneConfig
+from finetune_base_model import create_dataloaders, setup_logging
+
+
+def distill_step(student, teacher, tokenizer, batch_x, batch_x_stamp, device, config):
+    batch_x = batch_x.to(device, non_blocking=True)
+    batch_x_stamp = batch_x_stamp.to(device, non_blocking=True)
+
+    with torch.no_grad():
+        token_seq_0, token_seq_1 = tokenizer.encode(batch_x, half=True)
+    token_in = [token_seq_0[:, :-1], token_seq_1[:, :-1]]
+    token_out = [token_seq_0[:, 1:], token_seq_1[:, 1:]]
+    stamp = batch_x_stamp[:, :-1, :]
+
+    # Both models condition s2 on the true next s1 token, so their s2 distributions are comparable.
+    with torch.no_grad():
+        teacher_logits = teacher(token_in[0], token_in[1], stamp, use_teacher_forcing=True, s1_targets=token_out[0])
+    student_logits = student(token_in[0], token_in[1], stamp, use_teacher_forcing=True, s1_targets=token_out[0])
+    return distillation_loss(student.module if isinstance(student, DDP) else student, student_logits, teacher_logits,
+                             token_out[0], token_out[1], config.distill_temperature, config.distill_alpha)
+
+
+def train_student(student, teacher, tokenizer, device, config, save_dir, logger):
+    logger.info("Starting distillation...")
+    use_ddp = dist.is_available() and dist.is_initialized()
+    rank = dist.get_rank() if use_ddp else 0
+
+    train_loader, val_loader, train_dataset, val_dataset, train_sampler, val_sampler = create_dataloaders(config)
+    optimizer = torch.optim.AdamW(
+        student.parameters(),
+        lr=config.distill_learning_rate,
+        betas=(config.adam_beta1, config.adam_beta2),
+        weight_decay=config.adam_weight_decay
+    )
+
+    scheduler = torch.optim.lr_scheduler.OneCycleLR(
+        optimizer,
+        max_lr=config.distill_learning_rate,
+        steps_per_epoch=len(train_loader),
+        epochs=config.distill_epochs,
+        pct_start=0.03,
+        div_factor=10
+    )
+
+    if use_ddp:
+        local_rank = int(os.environ.get("LOCAL_RANK", "0"))
+        student = DDP(student, device_ids=[local_rank], output_device=local_rank, find_unused_parameters=False)
+
+    best_val_loss = float('inf')
+    batch_idx_global = 0
+
+    for epoch in range(config.distill_epochs):
+        epoch_start_time = time.time()
+        student.train()
+
+        train_dataset.set_epoch_seed(epoch * 10000)
+        val_dataset.set_epoch_seed(0)
+        if train_sampler is not None:
+            train_sampler.set_epoch(epoch)
+
+        for batch_idx, (batch_x, batch_x_stamp) in enumerate(train_loader):
+            loss, kl_s1, kl_s2, ce_loss = distill_step(student, teacher, tokenizer, batch_x, batch_x_stamp, device, config)
+
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), max_norm=3.0)
+            optimizer.step()
+            scheduler.step()
+
+            if (batch_idx_global + 1) % config.log_interval == 0:
+                lr = optimizer.param_groups[0]['lr']
+                log_msg = (f"[Epoch {epoch+1}/{config.distill_epochs}, Step {batch_idx+1}/{len(train_loader)}] "
+                           f"LR: {lr:.6f}, Loss: {loss.item():.4f}, KL s1/s2: {kl_s1.item():.4f}/{kl_s2.item():.4f}, CE: {ce_loss.item():.4f}")
+                logger.info(log_msg)
+                if rank == 0:
+                    print(log_msg)
+
+            batch_idx_global += 1
+
+        # checkpoints are selected on the validation KL to the teacher
+        student.eval()
+        val_sums = torch.zeros(3, dtype=torch.float64, device=device)
+        with torch.no_grad():
+            for batch_x, batch_x_stamp in val_loader:
+                _, kl_s1, kl_s2, _ = distill_step(student, teacher, tokenizer, batch_x, batch_x_stamp, device, config)
+                val_sums += torch.tensor([kl_s1.item(), kl_s2.item(), 1.0], dtype=torch.float64, device=device)
+
+        if use_ddp:
+            dist.all_reduce(val_sums, op=dist.ReduceOp.SUM)
+        val_batches = val_sums[2].item()
+        avg_kl_s1 = val_sums[0].item() / val_batches if val_batches > 0 else 0.0
+        avg_kl_s2 = val_sums[1].item() / val_batches if val_batches > 0 else 0.0
+        avg_val_loss = (avg_kl_s1 + avg_kl_s2) / 2
+
+        epoch_time = time.time() - epoch_start_time
+        epoch_summary = (f"\n--- Epoch {epoch+1}/{config.distill_epochs} Summary ---\n"
+                         f"Validation KL to teacher: {avg_val_loss:.4f} (s1 {avg_kl_s1:.4f}, s2 {avg_kl_s2:.4f})\n"
+                         f"Epoch Time: {epoch_time:.2f} seconds\n")
+        logger.info(epoch_summary)
+        if rank == 0:
+            print(epoch_summary)
+
+        if avg_val_loss < best_val_loss:
+            best_val_loss = avg_val_loss
+            if rank == 0:
+                model_save_path = os.path.join(save_dir, "best_model")
+                os.makedirs(model_save_path, exist_ok=True)
+                (student.module if use_ddp else student).save_pretrained(model_save_path)
+                save_msg = f"Best student saved to: {model_save_path} (validation KL: {best_val_loss:.4f})"
+                logger.info(save_msg)
+                print(save_msg)
+
+    return best_val_loss
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Kronos Predictor Distillation')
+    parser.add_argument('--config', type=str, default='config.yaml',
+                        help='Configuration file path (default: config.yaml)')
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"Using device: {device}")
+
+    config = CustomFinetuneConfig(args.config)
+    os.makedirs(config.student_save_path, exist_ok=True)
+
+    log_dir = os.path.join(config.base_save_path, "logs")
+    logger = setup_logging(config.exp_name, log_dir, 0)
+
+    torch.manual_seed(config.seed)
+    np.random.seed(config.seed)
+    random.seed(config.seed)
+
+    tokenizer = KronosTokenizer.from_pretrained(config.finetuned_tokenizer_path).to(device)
+    tokenizer.eval()
+    teacher = Kronos.from_pretrained(config.teacher_predictor_path).to(device)
+    teacher.eval()
+    for param in teacher.parameters():
+        param.requires_grad_(False)
+
+    student = build_student(teacher, n_layers=config.student_n_layers, d_model=config.student_d_model,
+                            n_heads=config.student_n_heads, ff_dim=config.student_ff_dim,
+                            init_from_teacher=config.student_init_from_teacher)
+
+    teacher_size = sum(p.numel() for p in teacher.parameters())
+    student_size = sum(p.numel() for p in student.parameters())
+    size_msg = (f"Teacher parameters: {teacher_size:,}, student parameters: {student_size:,} "
+                f"(n_layers={student.n_layers}, d_model={student.d_model}, n_heads={student.n_heads}, ff_dim={student.ff_dim})")
+    logger.info(size_msg)
+    print(size_msg)
+    logger.info(f"Teacher path: {config.teacher_predictor_path}")
+    logger.info(f"Temperature: {config.distill_temperature}, alpha: {config.distill_alpha}")
+
+    best_val_loss = train_student(student, teacher, tokenizer, device, config, config.student_save_path, logger)
+
+    final_msg = f"Distillation completed! Best validation KL: {best_val_loss:.4f}\nStudent saved to: {config.student_save_path}"
+    logger.info(final_msg)
+    print(final_msg)
+
+
+if __name__ == "__main__":
+    main()
@@ -236,6 +236,18 @@ def create_dataloaders(config):
     return train_loader, val_loader, train_dataset, val_dataset, train_sampler, val_sampler
 
 
+def prepare_lora(model, config):
+    # with lora.rank > 0, train a low-rank adapter on top of the frozen base model; only the adapter is saved
+    if not config.lora_rank:
+        return
+    model.requires_grad_(False)
+    model.add_adapter(config.lora_adapter_name, rank=config.lora_rank, alpha=config.lora_alpha,
+                      dropout=config.lora_dropout, targets=config.lora_targets)
+    model.set_adapter(config.lora_adapter_name)
+    for param in model.adapter_parameters(config.lora_adapter_name):
+        param.requires_grad_(True)
+
+
 def train_model(model, tokenizer, device, config, save_dir, logger):
     logger.info("Starting training...")
     use_ddp = dist.is_available() and dist.is_initialized()
@@ -243,8 +255,9 @@ def train_model(model, tokenizer, device, config, save_dir, logger):
     world_size = dist.get_world_size() if use_ddp else 1
     
     train_loader, val_loader, train_dataset, val_dataset, train_sampler, val_sampler = create_dataloaders(config)
+    # With LoRA only the adapter parameters are trainable (see main).
     optimizer = torch.optim.AdamW(
-        model.parameters(),
+        [p for p in model.parameters() if p.requires_grad],
         lr=config.predictor_learning_rate,
         betas=(config.adam_beta1, config.adam_beta2),
         weight_decay=config.adam_weight_decay
@@ -354,9 +367,14 @@ def train_model(model, tokenizer, device, config, save_dir, logger):
         if avg_val_loss < best_val_loss:
             best_val_loss = avg_val_loss
             if rank == 0:
-                model_save_path = os.path.join(save_dir, "best_model")
-                os.makedirs(model_save_path, exist_ok=True)
-                (model.module if use_ddp else model).save_pretrained(model_save_path)
+                if config.lora_rank:
+                    model_save_path = config.adapter_save_path
+                    os.makedirs(os.path.dirname(model_save_path), exist_ok=True)
+                    (model.module if use_ddp else model).save_adapter(config.lora_adapter_name, model_save_path)
+                else:
+                    model_save_path = os.path.join(save_dir, "best_model")
+                    os.makedirs(model_save_path, exist_ok=True)
+                    (model.module if use_ddp else model).save_pretrained(model_save_path)
                 save_msg = f"Best model saved to: {model_save_path} (validation loss: {best_val_loss:.4f})"
                 logger.info(save_msg)
                 print(save_msg)
@@ -440,9 +458,12 @@ def main():
     tokenizer = tokenizer.to(device)
     model = model.to(device)
     
+    prepare_lora(model, config)
+    
     model_size = sum(p.numel() for p in model.parameters())
-    logger.info(f"Model parameters: {model_size:,}")
-    print(f"Model parameters: {model_size:,}")
+    trainable_size = sum(p.numel() for p in model.parameters() if p.requires_grad)
+    logger.info(f"Model parameters: {model_size:,}, trainable: {trainable_size:,}")
+    print(f"Model parameters: {model_size:,}, trainable: {trainable_size:,}")
     
     logger.info("=== Training Configuration ===")
     logger.info(f"Data path: {config.data_path}")
@@ -12,7 +12,7 @@ from model import Kronos, KronosTokenizer, KronosPredictor
 
 from config_loader import CustomFinetuneConfig
 from finetune_tokenizer import train_tokenizer, set_seed, setup_logging as setup_tokenizer_logging
-from finetune_base_model import train_model, create_dataloaders, setup_logging as setup_basemodel_logging
+from finetune_base_model import train_model, create_dataloaders, prepare_lora, setup_logging as setup_basemodel_logging
 
 
 class SequentialTrainer:
@@ -50,7 +50,8 @@ class SequentialTrainer:
     
     def _check_existing_models(self):
         tokenizer_exists = os.path.exists(self.config.tokenizer_best_model_path)
-        basemodel_exists = os.path.exists(self.config.basemodel_best_model_path)
+        basemodel_path = self.config.adapter_save_path if self.config.lora_rank else self.config.basemodel_best_model_path
+        basemodel_exists = os.path.exists(basemodel_path)
         
         print(f"Tokenizer model exists: {tokenizer_exists}")
         print(f"Basemodel model exists: {basemodel_exists}")
@@ -223,11 +224,13 @@ class SequentialTrainer:
                 learn_te=arch.get('learn_te', True)
             )
         model = model.to(self.device)
+        prepare_lora(model, self.config)
         
         model_size = sum(p.numel() for p in model.parameters())
-        logger.info(f"Model parameters: {model_size:,}")
+        trainable_size = sum(p.numel() for p in model.parameters() if p.requires_grad)
+        logger.info(f"Model parameters: {model_size:,}, trainable: {trainable_size:,}")
         if self.rank == 0:
-            print(f"Model parameters: {model_size:,}")
+            print(f"Model parameters: {model_size:,}, trainable: {trainable_size:,}")
         
         logger.info("=== Training Configuration ===")
         logger.info(f"Data path: {self.config.data_path}")
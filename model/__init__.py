@@ -1,4 +1,12 @@
-from .kronos import KronosTokenizer, Kronos, KronosPredictor
+from .kronos import KronosTokenizer, Kronos, KronosPredictor, OnnxKronosPredictor
+from .distillation import build_student, distillation_loss
+from .onnx_export import export_onnx
+from .quantization import quantize
+from .registry import ModelRegistry, load_pretrained
+from .serving import AsyncKronosPredictor
+from .scheduler import ContinuousBatchScheduler
+from .session import ForecastSession
+from .pool import PredictorPool
 
 model_dict = {
     'kronos_tokenizer': KronosTokenizer,
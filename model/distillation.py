@@ -0,0 +1,81 @@
+import torch.nn.functional as F
+
+from model.kronos import Kronos
+
+
+def build_student(teacher, n_layers=None, d_model=None, n_heads=None, ff_dim=None, init_from_teacher=True):
+    """
+    Builds a smaller `Kronos` to distill `teacher` into. The student keeps the teacher's vocabulary (so it
+    works with the same tokenizer) and dropout settings; unspecified sizes are taken from the teacher, with
+    `ff_dim` scaled along with `d_model`.
+
+    With `init_from_teacher`, every module whose shape matches is copied from the teacher: embeddings,
+    final norm, dependency-aware layer and `DualHead` when `d_model` is unchanged, plus evenly spaced teacher
+    blocks (first and last included) when `n_heads` and `ff_dim` are unchanged as well.
+
+    Args:
+        teacher (Kronos): Model to distill.
+        n_layers, d_model, n_heads, ff_dim (int, optional): Student architecture. Default to the teacher's.
+        init_from_teacher (bool, optional): Whether to copy matching teacher weights. Defaults to True.
+
+    Returns:
+        Kronos: The student, on the teacher's device.
+    """
+    d_model = d_model or teacher.d_model
+    student = Kronos(
+        s1_bits=teacher.s1_bits, s2_bits=teacher.s2_bits,
+        n_layers=n_layers or teacher.n_layers,
+        d_model=d_model,
+        n_heads=n_heads or teacher.n_heads,
+        ff_dim=ff_dim or teacher.ff_dim * d_model // teacher.d_model,
+        ffn_dropout_p=teacher.ffn_dropout_p, attn_dropout_p=teacher.attn_dropout_p, resid_dropout_p=teacher.resid_dropout_p,
+        token_dropout_p=teacher.token_dropout_p, learn_te=teacher.learn_te,
+    ).to(teacher.norm.weight.device)
+
+    if init_from_teacher and student.d_model == teacher.d_model:
+        for name in ("embedding", "time_emb", "norm", "dep_layer", "head"):
+            getattr(student, name).load_state_dict(getattr(teacher, name).state_dict())
+        if student.n_heads == teacher.n_heads and student.ff_dim == teacher.ff_dim:
+            last = teacher.n_layers - 1
+            for i, block in enumerate(student.transformer):
+                source = round(i * last / (student.n_layers - 1)) if student.n_layers > 1 else last
+                block.load_state_dict(teacher.transformer[source].state_dict())
+    return student
+
+
+def _soft_kl(student_logits, teacher_logits, temperature):
+    # KL(teacher || student) at `temperature`, scaled by T^2 so gradients keep their magnitude across temperatures.
+    return F.kl_div(F.log_softmax(student_logits.float() / temperature, dim=-1), F.log_softmax(teacher_logits.float() / temperature, dim=-1),
+                    log_target=True, reduction='batchmean') * temperature ** 2
+
+
+def distillation_loss(student, student_logits, teacher_logits, s1_targets, s2_targets, temperature=1.0, alpha=1.0, padding_mask=None):
+    """
+    Knowledge-distillation loss on both `DualHead` outputs: KL divergence from the teacher's soft s1 and s2
+    distributions, mixed with the student's next-token cross-entropy (`DualHead.compute_loss`). For s2 both
+    models should be teacher-forced on the same s1 tokens (`use_teacher_forcing=True, s1_targets=...`).
+
+    Args:
+        student (Kronos): Student model (unwrapped from DDP).
+        student_logits, teacher_logits (Tuple[torch.Tensor, torch.Tensor]): (s1_logits, s2_logits) of both models.
+            Shapes: [batch_size, seq_len, s1_vocab_size] and [batch_size, seq_len, s2_vocab_size]
+        s1_targets, s2_targets (torch.Tensor): Next-token targets. Shape: [batch_size, seq_len]
+        temperature (float, optional): Softmax temperature of the soft targets. Defaults to 1.0.
+        alpha (float, optional): Weight of the KL terms; 1 - alpha goes to cross-entropy. Defaults to 1.0.
+        padding_mask (torch.Tensor, optional): True/1 at padded positions, which are ignored. Defaults to None.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]: (loss, kl_s1, kl_s2, ce_loss)
+    """
+    (s1_logits, s2_logits), (teacher_s1, teacher_s2) = student_logits, teacher_logits
+    if padding_mask is not None:
+        valid_mask = (padding_mask == 0)
+        s1_logits, s2_logits, teacher_s1, teacher_s2 = (t[valid_mask] for t in (s1_logits, s2_logits, teacher_s1, teacher_s2))
+    else:
+        s1_logits, s2_logits, teacher_s1, teacher_s2 = (t.reshape(-1, t.size(-1)) for t in (s1_logits, s2_logits, teacher_s1, teacher_s2))
+
+    kl_s1 = _soft_kl(s1_logits, teacher_s1, temperature)
+    kl_s2 = _soft_kl(s2_logits, teacher_s2, temperature)
+    ce_loss, _, _ = student.head.compute_loss(*student_logits, s1_targets, s2_targets, padding_mask)
+    loss = alpha * (kl_s1 + kl_s2) / 2 + (1 - alpha) * ce_loss
+    return loss, kl_s1, kl_s2, ce_loss
@@ -0,0 +1,179 @@
+import warnings
+
+import torch
+import torch.nn.functional as F
+
+from model.module import LoRALinear
+
+
+# Token counts (batch_size * seq_len) the compiled graphs are specialized for. Counts above the largest
+# bucket are rounded up to a multiple of it.
+DEFAULT_BUCKETS = tuple(2 ** i for i in range(10))
+
+
+def token_bucket(n, buckets=DEFAULT_BUCKETS):
+    """Returns the smallest bucket holding `n` tokens."""
+    for bucket in buckets:
+        if n <= bucket:
+            return bucket
+    return -(-n // buckets[-1]) * buckets[-1]
+
+
+def _rms_norm(x, weight, eps):
+    # Same numerics as RMSNorm: statistics in fp32, result in the input dtype.
+    x_float = x.float()
+    return (x_float * torch.rsqrt(torch.mean(x_float * x_float, dim=-1, keepdim=True) + eps)).type_as(x) * weight
+
+
+def _block_input(x, norm_weight, eps, qkv_weight, qkv_bias):
+    h = _rms_norm(x, norm_weight, eps)
+    return F.linear(h, qkv_weight, qkv_bias).chunk(3, dim=-1)
+
+
+def _block_output(x, attn, out_weight, out_bias, norm_weight, eps, w13, w2):
+    x = x + F.linear(attn, out_weight, out_bias)
+    h = _rms_norm(x, norm_weight, eps)
+    gate, up = F.linear(h, w13).chunk(2, dim=-1)
+    return (x + F.linear(F.silu(gate) * up, w2),)
+
+
+def _head(x, norm_weight, eps, weight, bias):
+    h = _rms_norm(x, norm_weight, eps)
+    return h, F.linear(h, weight, bias)
+
+
+def _recompile_limits(limit):
+    # Every bucket (and every model width) is one graph of the same function; don't let dynamo give up on them.
+    # Returned as overrides for `torch._dynamo.config.patch`, so the global config is left alone.
+    config = torch._dynamo.config
+    return {name: max(getattr(config, name), limit) for name in ("recompile_limit", "cache_size_limit") if hasattr(config, name)}
+
+
+def _compile_errors():
+    # Failures of dynamo tracing or of the compiler backend (e.g. no C++ toolchain for inductor). Errors raised by
+    # the function itself propagate as in eager mode.
+    exc = torch._dynamo.exc
+    return tuple(getattr(exc, name) for name in ("BackendCompilerFailed", "Unsupported", "InternalTorchDynamoError") if hasattr(exc, name))
+
+
+class BucketedGraph:
+    """
+    A position-wise function compiled with static shapes for a fixed set of token counts.
+
+    Activations of shape [..., dim] are flattened to [n_tokens, dim] and zero-padded to the token bucket, so
+    prefill and decode steps of any batch size reuse a handful of graphs. Parameters are passed as tensors,
+    which lets all layers of the same width share one graph. If dynamo or the compiler backend fails, the
+    function falls back to eager execution for good; other errors are raised.
+    """
+
+    def __init__(self, fn, buckets=DEFAULT_BUCKETS, **compile_kwargs):
+        self.fn = fn
+        self.buckets = tuple(buckets)
+        self.compiled_fn = torch.compile(fn, dynamic=False, **compile_kwargs)
+        # Compilation happens lazily inside calls, so the raised limits are applied around each call.
+        self.dynamo_config = _recompile_limits(4 * len(self.buckets))
+        self.compile_errors = _compile_errors()
+
+    @property
+    def compiled(self):
+        return self.compiled_fn is not None
+
+    def __call__(self, activations, params):
+        lead_shape = activations[0].shape[:-1]
+        n_tokens = lead_shape.numel()
+        if self.compiled_fn is None:
+            return self.fn(*activations, *params)
+
+        pad = token_bucket(n_tokens, self.buckets) - n_tokens
+        flat = [F.pad(a.reshape(n_tokens, a.size(-1)), (0, 0, 0, pad)) for a in activations]
+        try:
+            with torch._dynamo.config.patch(self.dynamo_config):
+                outputs = self.compiled_fn(*flat, *params)
+        except self.compile_errors as exc:
+            warnings.warn(f"Compiled graph for {self.fn.__name__} failed, falling back to eager execution: {exc}")
+            self.compiled_fn = None
+            return self.fn(*activations, *params)
+        return tuple(out[:n_tokens].reshape(*lead_shape, out.size(-1)) for out in outputs)
+
+
+class DecodeGraphs:
+    """
+    Compiled graphs for `Kronos` inference: the position-wise parts of each `TransformerBlock` (RMSNorm, packed
+    QKV / output projection, residuals and the packed `FeedForward`) and the final norm plus s1 head. Attention
+    itself (rotary, KV cache, SDPA) runs eagerly in between, as its key length changes every step.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, **compile_kwargs):
+        self.buckets = tuple(buckets)
+        self.input_graph = BucketedGraph(_block_input, buckets, **compile_kwargs)
+        self.output_graph = BucketedGraph(_block_output, buckets, **compile_kwargs)
+        self.head_graph = BucketedGraph(_head, buckets, **compile_kwargs)
+
+    @property
+    def compiled(self):
+        return self.input_graph.compiled and self.output_graph.compiled and self.head_graph.compiled
+
+    def block_input(self, block, x):
+        attn = block.self_attn
+        return self.input_graph((x,), (block.norm1.weight, block.norm1.eps, attn.qkv_weight, attn.qkv_bias))
+
+    def block_output(self, block, x, attn_out):
+        attn, ffn = block.self_attn, block.ffn
+        return self.output_graph((x, attn_out), (attn.out_proj.weight, attn.out_proj.bias, block.norm2.weight, block.norm2.eps,
+                                                 ffn.w13_weight, ffn.w2.weight))[0]
+
+    def head(self, model, x):
+        return self.head_graph((x,), (model.norm.weight, model.norm.eps, model.head.proj_s1.weight, model.head.proj_s1.bias))
+
+    @torch.no_grad()
+    def warmup(self, model, token_counts):
+        """Compiles the graphs of `model` for the buckets of the given token counts."""
+        block = model.transformer[0]
+        weight = block.norm1.weight
+        for bucket in sorted({token_bucket(n, self.buckets) for n in token_counts}):
+            x = torch.zeros(bucket, model.d_model, device=weight.device, dtype=weight.dtype)
+            self.block_output(block, x, self.block_input(block, x)[0])
+            self.head(model, x)
+
+
+def compile_graphs(model, buckets=DEFAULT_BUCKETS, warmup_tokens=(), **compile_kwargs):
+    """
+    Attaches `torch.compile`d inference graphs (see `DecodeGraphs`) to a `Kronos` model.
+
+    Args:
+        model (Kronos): Model to compile.
+        buckets (Tuple[int], optional): Token counts (batch_size * seq_len) graphs are specialized for.
+        warmup_tokens (Iterable[int], optional): Token counts to compile for right away. Defaults to ().
+        **compile_kwargs: Passed on to `torch.compile` (e.g. `mode`, `backend`).
+
+    Returns:
+        DecodeGraphs: The attached graphs.
+
+    Raises:
+        RuntimeError: If `torch.compile` is not available.
+        ValueError: If the model's linear layers were replaced (by INT8 quantization or LoRA adapters).
+    """
+    if not hasattr(torch, "compile"):
+        raise RuntimeError(f"torch.compile is not available in torch {torch.__version__}.")
+    modules = [model.head.proj_s1, *(m for block in model.transformer for m in block.modules())]
+    if not all(isinstance(m.weight, torch.Tensor) for m in modules if hasattr(m, "weight")):
+        raise ValueError("Compiled graphs need regular nn.Linear layers; they cannot be combined with quantization.")
+    if any(isinstance(m, LoRALinear) for m in modules):
+        raise ValueError("Compiled graphs run the base weights only; they cannot be combined with LoRA adapters.")
+
+    # The graphs run the packed QKV and w1/w3 projections.
+    model.pack_weights()
+    graphs = DecodeGraphs(buckets, **compile_kwargs)
+    model.graphs = graphs
+    for block in model.transformer:
+        block.graphs = graphs
+    if warmup_tokens:
+        graphs.warmup(model, warmup_tokens)
+    return graphs
+
+
+def release_graphs(model):
+    """Detaches compiled graphs from `model`, going back to eager execution."""
+    model.graphs = None
+    for block in model.transformer:
+        block.graphs = None
@@ -2,12 +2,20 @@ import numpy as np
 import pandas as pd
 import torch
 from huggingface_hub import PyTorchModelHubMixin
+import copy
+import math
 import sys
+import warnings
+from contextlib import contextmanager
 
-from tqdm import trange
+from tqdm import tqdm, trange
 
 sys.path.append("../")
 from model.module import *
+from model.graphs import DEFAULT_BUCKETS, compile_graphs, release_graphs, token_bucket
+from model.onnx_runtime import OnnxKronosRuntime
+from model.quantization import quantize as quantize_modules
+from model.sampling import Sampler, filtered_probs, top_k_top_p_filtering
 
 
 class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
@@ -56,14 +64,15 @@ class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
         self.embed = nn.Linear(self.d_in, self.d_model)
         self.head = nn.Linear(self.d_model, self.d_in)
 
+        rotary = RotaryPositionalEmbedding(self.d_model // self.n_heads) # Rotary table shared by all blocks
         # Encoder Transformer Blocks
         self.encoder = nn.ModuleList([
-            TransformerBlock(self.d_model, self.n_heads, self.ff_dim, self.ffn_dropout_p, self.attn_dropout_p, self.resid_dropout_p)
+            TransformerBlock(self.d_model, self.n_heads, self.ff_dim, self.ffn_dropout_p, self.attn_dropout_p, self.resid_dropout_p, rotary)
             for _ in range(self.enc_layers - 1)
         ])
         # Decoder Transformer Blocks
         self.decoder = nn.ModuleList([
-            TransformerBlock(self.d_model, self.n_heads, self.ff_dim, self.ffn_dropout_p, self.attn_dropout_p, self.resid_dropout_p)
+            TransformerBlock(self.d_model, self.n_heads, self.ff_dim, self.ffn_dropout_p, self.attn_dropout_p, self.resid_dropout_p, rotary)
             for _ in range(self.dec_layers - 1)
         ])
         self.quant_embed = nn.Linear(in_features=self.d_model, out_features=self.codebook_dim) # Linear layer before quantization
@@ -139,44 +148,125 @@ class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
         x = x * q_scale
         return x
 
-    def encode(self, x, half=False):
+    def encode(self, x, half=False, padding_mask=None, kv_cache=None):
         """
         Encodes the input data into quantized indices.
 
+        The encoder is causal and quantization is per position, so with `kv_cache` the input may be fed in
+        pieces: each call then only encodes the positions that are new since the previous call.
+
         Args:
             x (torch.Tensor): Input tensor of shape (batch_size, seq_len, d_in).
             half (bool, optional): Whether to use half quantization in BSQuantizer. Defaults to False.
+            padding_mask (torch.Tensor, optional): True at padded positions, shape (batch_size, seq_len). Defaults to None.
+            kv_cache (List[KVCache], optional): Cache from `init_kv_cache(..., encoder=True)`. Defaults to None.
 
         Returns:
             torch.Tensor: Quantized indices from BSQuantizer.
         """
         z = self.embed(x)
-        for layer in self.encoder:
-            z = layer(z)
-        z = self.quant_embed(z)
+        if kv_cache is not None:
+            for layer, layer_cache in zip(self.encoder, kv_cache):
+                z = layer(z, key_padding_mask=padding_mask, kv_cache=layer_cache)
+        else:
+            for layer in self.encoder:
+                z = layer(z, key_padding_mask=padding_mask)
+        # The token bits are the signs of this projection; keep it in fp32 under reduced-precision autocast.
+        with torch.autocast(device_type=z.device.type, enabled=False):
+            z = self.quant_embed(z.to(self.quant_embed.weight.dtype))
 
         bsq_loss, quantized, z_indices = self.tokenizer(z, half=half, collect_metrics=False)
         return z_indices
 
-    def decode(self, x, half=False):
+    def init_kv_cache(self, max_len, sliding=False, encoder=False):
+        """
+        Creates an empty key/value cache for incremental decoding with `decode`.
+
+        Args:
+            max_len (int): Maximum number of positions the cache can hold.
+            sliding (bool, optional): Whether to evict the oldest positions once `max_len` is reached. Defaults to False.
+            encoder (bool, optional): Whether to cache the encoder blocks, for incremental `encode`, instead. Defaults to False.
+
+        Returns:
+            List[KVCache]: One cache per decoder (or encoder) block.
+        """
+        return [KVCache(max_len, sliding=sliding) for _ in (self.encoder if encoder else self.decoder)]
+
+    def pack_weights(self):
+        """Packs the attention and feed-forward projections into single GEMMs for inference, see `Kronos.pack_weights`."""
+        pack_weights(self)
+
+    def unpack_weights(self):
+        unpack_weights(self)
+
+    def decode(self, x, half=False, padding_mask=None, kv_cache=None):
         """
         Decodes quantized indices back to the input data space.
 
+        The decoder is causal, so with `kv_cache` the indices may be fed in pieces: each call then only
+        holds (and returns) the positions that are new since the previous call.
+
         Args:
             x (torch.Tensor): Quantized indices tensor.
             half (bool, optional): Whether the indices were generated with half quantization. Defaults to False.
+            padding_mask (torch.Tensor, optional): True at padded positions, shape (batch_size, seq_len). Defaults to None.
+            kv_cache (List[KVCache], optional): Cache from `init_kv_cache`. Defaults to None.
 
         Returns:
             torch.Tensor: Reconstructed output tensor of shape (batch_size, seq_len, d_in).
         """
         quantized = self.indices_to_bits(x, half)
         z = self.post_quant_embed(quantized)
-        for layer in self.decoder:
-            z = layer(z)
+        if kv_cache is not None:
+            for layer, layer_cache in zip(self.decoder, kv_cache):
+                z = layer(z, key_padding_mask=padding_mask, kv_cache=layer_cache)
+        else:
+            for layer in self.decoder:
+                z = layer(z, key_padding_mask=padding_mask)
         z = self.head(z)
         return z
 
 
+class EarlyExitStats:
+    """
+    Running statistics of early-exit decoding (see `Kronos.enable_early_exit`).
+
+    Attributes:
+        n_layers (int): Number of Transformer blocks of the model.
+        tokens (int): Number of decoded single-token steps, summed over rows.
+        layers (int): Number of Transformer blocks run in full for those tokens.
+        exits (Dict[int, int]): Number of tokens per exit layer (`n_layers` = no early exit).
+    """
+
+    def __init__(self, n_layers):
+        self.n_layers = n_layers
+        self.reset()
+
+    def reset(self):
+        self.tokens = 0
+        self.layers = 0
+        self.exits = {}
+
+    def update(self, exit_layers):
+        self.tokens += exit_layers.numel()
+        self.layers += int(exit_layers.sum())
+        for layer, count in zip(*(t.tolist() for t in exit_layers.unique(return_counts=True))):
+            self.exits[layer] = self.exits.get(layer, 0) + count
+
+    @property
+    def layers_saved(self):
+        """Fraction of Transformer blocks skipped per decoded token."""
+        return 1.0 - self.layers / (self.tokens * self.n_layers) if self.tokens else 0.0
+
+    def as_dict(self):
+        return {
+            'tokens': self.tokens,
+            'layers': self.layers,
+            'exits': dict(sorted(self.exits.items())),
+            'layers_saved': self.layers_saved,
+        }
+
+
 class Kronos(nn.Module, PyTorchModelHubMixin):
     """
     Kronos Model.
@@ -213,14 +303,23 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         self.token_drop = nn.Dropout(self.token_dropout_p)
         self.embedding = HierarchicalEmbedding(self.s1_bits, self.s2_bits, self.d_model)
         self.time_emb = TemporalEmbedding(self.d_model, self.learn_te)
+        rotary = RotaryPositionalEmbedding(self.d_model // self.n_heads)  # Shared by all layers with this head size
         self.transformer = nn.ModuleList([
-            TransformerBlock(self.d_model, self.n_heads, self.ff_dim, self.ffn_dropout_p, self.attn_dropout_p, self.resid_dropout_p)
+            TransformerBlock(self.d_model, self.n_heads, self.ff_dim, self.ffn_dropout_p, self.attn_dropout_p, self.resid_dropout_p, rotary)
             for _ in range(self.n_layers)
         ])
         self.norm = RMSNorm(self.d_model)
-        self.dep_layer = DependencyAwareLayer(self.d_model)
+        self.dep_layer = DependencyAwareLayer(self.d_model, rotary=rotary)
         self.head = DualHead(self.s1_bits, self.s2_bits, self.d_model)
+        self.graphs = None  # Compiled inference graphs, see `compile_graphs`
         self.apply(self._init_weights)
+        # Optional early exit, see `add_exit_heads` and `enable_early_exit`.
+        self.exit_heads = None
+        self.exit_threshold = None
+        self.exit_stats = None
+        # Low-rank adapters by name (their settings), see `add_adapter` and `set_adapter`.
+        self.adapters = {}
+        self.active_adapter = None
 
     def _init_weights(self, module):
 
@@ -275,18 +374,60 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         s2_logits = self.head.cond_forward(x2)
         return s1_logits, s2_logits
 
-    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None):
+    def init_kv_cache(self, max_len, sliding=False):
+        """
+        Creates an empty key/value cache for incremental decoding with `decode_s1`.
+
+        Args:
+            max_len (int): Maximum number of positions the cache can hold, typically `max_context`.
+            sliding (bool, optional): Whether to evict the oldest positions once `max_len` is reached. Defaults to False.
+
+        Returns:
+            List[KVCache]: One cache per Transformer block.
+        """
+        return [KVCache(max_len, sliding=sliding) for _ in self.transformer]
+
+    def fold_embeddings(self):
+        """
+        Precomputes folded token and temporal embedding tables for inference (see `HierarchicalEmbedding.fold`
+        and `TemporalEmbedding.fold`). The folded tables are only used in eval mode and are not saved with the
+        model; call again after updating the weights, or `unfold_embeddings` to drop them.
+        """
+        self.embedding.fold()
+        self.time_emb.fold()
+
+    def unfold_embeddings(self):
+        self.embedding.unfold()
+        self.time_emb.unfold()
+
+    def pack_weights(self):
+        """
+        Packs the QKV (KV for cross-attention) and `w1`/`w3` projections of all layers into single GEMMs for
+        inference (see `model.module.pack_linears`). State dict keys and checkpoints are unchanged; call again
+        after moving or casting the model, or `unpack_weights` to drop the packed tensors.
+        """
+        pack_weights(self)
+
+    def unpack_weights(self):
+        unpack_weights(self)
+
+    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None, kv_cache=None):
         """
         Decodes only the s1 tokens.
 
         This method performs a forward pass to predict only s1 tokens. It returns the s1 logits
         and the context representation from the Transformer, which can be used for subsequent s2 decoding.
 
+        When `kv_cache` is given, the inputs only hold the positions that are new since the previous call
+        (the whole context on the first, prefill call) and the returned logits/context cover only those
+        positions. Earlier positions are read from, and the new ones appended to, the cache.
+
         Args:
             s1_ids (torch.Tensor): Input tensor of s1 token IDs. Shape: [batch_size, seq_len]
             s2_ids (torch.Tensor): Input tensor of s2 token IDs. Shape: [batch_size, seq_len]
             stamp (torch.Tensor, optional): Temporal stamp tensor. Shape: [batch_size, seq_len]. Defaults to None.
             padding_mask (torch.Tensor, optional): Mask for padding tokens. Shape: [batch_size, seq_len]. Defaults to None.
+            kv_cache (List[KVCache], optional): Cache from `init_kv_cache`. Defaults to None.
 
         Returns:
             Tuple[torch.Tensor, torch.Tensor]:
@@ -299,14 +440,264 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
             x = x + time_embedding
         x = self.token_drop(x)
 
-        for layer in self.transformer:
-            x = layer(x, key_padding_mask=padding_mask)
+        if kv_cache is not None and self.exit_threshold is not None and x.size(1) == 1 and padding_mask is None and not self.training:
+            return self._decode_s1_early_exit(x, kv_cache)
 
-        x = self.norm(x)
+        if kv_cache is not None:
+            for layer, layer_cache in zip(self.transformer, kv_cache):
+                x = layer(x, key_padding_mask=padding_mask, kv_cache=layer_cache)
+        else:
+            for layer in self.transformer:
+                x = layer(x, key_padding_mask=padding_mask)
 
-        s1_logits = self.head(x)
+        if self.graphs is not None and not self.training:
+            x, s1_logits = self.graphs.head(self, x)
+        else:
+            x = self.norm(x)
+            s1_logits = self.head(x)
         return s1_logits, x
 
+    def add_exit_heads(self, layers):
+        """
+        Adds an `ExitHead` after each of the given Transformer blocks, replacing any existing ones. Exits share
+        the final norm and `DualHead`, so only the small heads need training (see `finetune/calibrate_early_exit.py`).
+
+        Args:
+            layers (Iterable[int]): Number of blocks run before each exit, in [1, n_layers).
+        """
+        layers = sorted(set(int(layer) for layer in layers))
+        if not all(0 < layer < self.n_layers for layer in layers):
+            raise ValueError(f"Exit layers must be in [1, {self.n_layers}), got {layers}.")
+        weight = self.norm.weight
+        self.exit_heads = nn.ModuleDict({str(layer): ExitHead(self.d_model) for layer in layers}).to(weight.device, weight.dtype)
+
+    def exit_logits(self, x, layer):
+        """
+        s1 logits and context of an exit.
+
+        Args:
+            x (torch.Tensor): Hidden state after `layer` Transformer blocks. Shape: [batch_size, seq_len, d_model]
+            layer (int): Exit layer.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: s1 logits [batch_size, seq_len, s1_vocab_size] and the context
+                for s2 decoding [batch_size, seq_len, d_model], as returned by `decode_s1`.
+        """
+        x = self.norm(self.exit_heads[str(layer)](x))
+        return self.head(x), x
+
+    def exit_forward(self, s1_ids, s2_ids, stamp=None, padding_mask=None, s1_targets=None):
+        """
+        Full forward pass that also evaluates every exit head, for training and calibrating them. s2 logits are
+        teacher-forced on `s1_targets` at every exit.
+
+        Returns:
+            Dict[int, Tuple[torch.Tensor, torch.Tensor]]: (s1_logits, s2_logits) by exit layer, `n_layers` being the
+                model's own output.
+        """
+        x = self.embedding([s1_ids, s2_ids])
+        if stamp is not None:
+            x = x + self.time_emb(stamp)
+        x = self.token_drop(x)
+        sibling_embed = self.embedding.emb_s1(s1_targets)
+
+        def s2_logits(context):
+            return self.head.cond_forward(self.dep_layer(context, sibling_embed, key_padding_mask=padding_mask))
+
+        outputs = {}
+        for idx, layer in enumerate(self.transformer, start=1):
+            x = layer(x, key_padding_mask=padding_mask)
+            if self.exit_heads is not None and str(idx) in self.exit_heads:
+                logits, context = self.exit_logits(x, idx)
+                outputs[idx] = (logits, s2_logits(context))
+        x = self.norm(x)
+        outputs[self.n_layers] = (self.head(x), s2_logits(x))
+        return outputs
+
+    def save_exit_heads(self, path, threshold=None):
+        """Saves the exit heads, and optionally a calibrated threshold, without the rest of the model."""
+        torch.save({'layers': [int(layer) for layer in self.exit_heads], 'threshold': None if threshold is None else float(threshold),
+                    'state_dict': self.exit_heads.state_dict()}, path)
+
+    def load_exit_heads(self, path):
+        """
+        Loads exit heads written by `save_exit_heads`.
+
+        Returns:
+            float: The threshold saved with the heads, or None.
+        """
+        checkpoint = torch.load(path, map_location=self.norm.weight.device, weights_only=True)
+        self.add_exit_heads(checkpoint['layers'])
+        self.exit_heads.load_state_dict(checkpoint['state_dict'])
+        return checkpoint['threshold']
+
+    def enable_early_exit(self, threshold):
+        """
+        Switches unpadded KV-cached single-token `decode_s1` steps to early exit: after each exit head, rows whose s1
+        distribution has a top probability of at least `threshold` take the exit's logits and context and skip
+        the remaining blocks. Skipped blocks still project the exited hidden state into their KV caches, so
+        later tokens see a complete cache. Prefill and training are unaffected. Statistics accumulate in
+        `exit_stats`.
+
+        Args:
+            threshold (float): Confidence threshold in (0, 1]; higher exits less often.
+        """
+        if self.exit_heads is None:
+            raise ValueError("Early exit needs exit heads, see add_exit_heads / load_exit_heads.")
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}.")
+        self.exit_threshold = threshold
+        self.exit_stats = EarlyExitStats(self.n_layers)
+
+    def disable_early_exit(self):
+        self.exit_threshold = None
+
+    def _decode_s1_early_exit(self, x, kv_cache):
+        if isinstance(self.active_adapter, (list, tuple)):
+            raise ValueError("Early exit runs blocks on row subsets and cannot be combined with per-row adapters.")
+        batch_size = x.size(0)
+        rows = torch.arange(batch_size, device=x.device)
+        exit_layers = torch.full((batch_size,), self.n_layers, dtype=torch.long, device=x.device)
+        s1_logits = x.new_empty(batch_size, 1, self.s1_vocab_size)
+        context = torch.empty_like(x)
+
+        for idx, (layer, layer_cache) in enumerate(zip(self.transformer, kv_cache), start=1):
+            if rows.numel() == batch_size:
+                x = layer(x, kv_cache=layer_cache)
+            else:
+                # Exited rows only feed their frozen hidden state into this block's cache.
+                x = layer.forward_rows(x, rows, layer_cache)
+            if str(idx) in self.exit_heads and rows.numel():
+                logits, hidden = self.exit_logits(x[rows], idx)
+                confident = F.softmax(logits[:, 0].float(), dim=-1).amax(dim=-1) >= self.exit_threshold
+                done = rows[confident]
+                s1_logits[done] = logits[confident]
+                context[done] = hidden[confident]
+                exit_layers[done] = idx
+                rows = rows[~confident]
+
+        if rows.numel():
+            hidden = self.norm(x[rows])
+            s1_logits[rows] = self.head(hidden)
+            context[rows] = hidden
+        if self.exit_stats is not None:
+            self.exit_stats.update(exit_layers)
+        return s1_logits, context
+
+    def _lora_layers(self):
+        return [m for m in self.transformer.modules() if isinstance(m, LoRALinear)]
+
+    def add_adapter(self, name, rank=8, alpha=16, dropout=0.0, targets=LORA_TARGETS):
+        """
+        Adds a LoRA adapter (see `LoRALinear`) to the attention and feed-forward linears of every Transformer
+        block. The new adapter starts as a no-op and is not activated; see `set_adapter` and `adapter_parameters`.
+
+        Args:
+            name (str): Adapter name.
+            rank (int, optional): Rank of the low-rank update. Defaults to 8.
+            alpha (float, optional): Scale of the update, applied as alpha / rank. Defaults to 16.
+            dropout (float, optional): Dropout on the adapter input during training. Defaults to 0.0.
+            targets (Iterable[str], optional): Layer names out of `LORA_TARGETS`. Defaults to all of them.
+        """
+        targets = tuple(targets)
+        if not name or "." in name or name in self.adapters:
+            raise ValueError(f"Invalid or duplicate adapter name '{name}'.")
+        if not set(targets) <= set(LORA_TARGETS):
+            raise ValueError(f"LoRA targets must be among {LORA_TARGETS}, got {targets}.")
+        if self.graphs is not None:
+            raise ValueError("Release compiled graphs before adding LoRA adapters.")
+        for block in self.transformer:
+            for parent in (block.self_attn, block.ffn):
+                for attr in targets:
+                    linear = getattr(parent, attr, None)
+                    if linear is None:
+                        continue
+                    if not isinstance(linear, LoRALinear):
+                        if not isinstance(linear.weight, torch.Tensor):
+                            raise ValueError("LoRA adapters need regular nn.Linear layers; they cannot be added to a quantized model.")
+                        linear = LoRALinear.from_linear(linear)
+                        setattr(parent, attr, linear)
+                    linear.add_adapter(name, rank, alpha, dropout)
+        self.adapters[name] = {'rank': rank, 'alpha': alpha, 'dropout': dropout, 'targets': list(targets)}
+
+    def remove_adapter(self, name):
+        if self.active_adapter == name or isinstance(self.active_adapter, (list, tuple)) and name in self.active_adapter:
+            self.set_adapter(None)
+        for m in self._lora_layers():
+            if name in m.lora_A:
+                m.remove_adapter(name)
+        del self.adapters[name]
+
+    def set_adapter(self, adapter):
+        """
+        Selects the adapter used by subsequent forward passes.
+
+        Args:
+            adapter: None for the base model, an adapter name, or one name (or None) per batch row to serve
+                several adapters in one batch. Per-row selections follow the series of a `generate_paths` batch:
+                larger batches that repeat each series consecutively (sampling streams) reuse its adapter.
+        """
+        if isinstance(adapter, (list, tuple)):
+            names = sorted({a for a in adapter if a is not None})
+            if len(names) <= 1 and (not names or None not in adapter):
+                return self.set_adapter(names[0] if names else None)
+            selection = (names, torch.tensor([names.index(a) if a is not None else -1 for a in adapter], device=self.norm.weight.device))
+        else:
+            selection = adapter
+            names = [] if adapter is None else [adapter]
+        unknown = [a for a in names if a not in self.adapters]
+        if unknown:
+            raise ValueError(f"Unknown adapters {unknown}; available: {list(self.adapters)}.")
+        for m in self._lora_layers():
+            m.active_adapter = selection if not isinstance(selection, str) or selection in m.lora_A else None
+        self.active_adapter = list(adapter) if isinstance(adapter, (list, tuple)) else adapter
+
+    def adapter_parameters(self, name):
+        """Parameters of one adapter, e.g. to train it alone on top of the frozen base model."""
+        return [p for m in self._lora_layers() if name in m.lora_A for p in (m.lora_A[name], m.lora_B[name])]
+
+    def save_adapter(self, name, path):
+        """Saves one adapter, without the base model weights."""
+        suffixes = (f".lora_A.{name}", f".lora_B.{name}")
+        state_dict = {k: v for k, v in self.state_dict().items() if k.endswith(suffixes)}
+        torch.save({'name': name, 'config': self.adapters[name], 'state_dict': state_dict}, path)
+
+    def load_adapter(self, path, name=None):
+        """
+        Loads an adapter written by `save_adapter`, under its saved name or `name`.
+
+        Returns:
+            str: The adapter name.
+        """
+        checkpoint = torch.load(path, map_location=self.norm.weight.device, weights_only=True)
+        saved_name, name = checkpoint['name'], name or checkpoint['name']
+        self.add_adapter(name, **checkpoint['config'])
+        state_dict = {k[:-len(saved_name)] + name: v for k, v in checkpoint['state_dict'].items()}
+        missing, unexpected = self.load_state_dict(state_dict, strict=False)
+        missing = [k for k in missing if k.endswith(f".{name}")]
+        if missing or unexpected:
+            raise ValueError(f"Adapter checkpoint does not match the model: missing {missing}, unexpected {unexpected}.")
+        return name
+
+    def compile_graphs(self, buckets=DEFAULT_BUCKETS, warmup_tokens=(), **compile_kwargs):
+        """
+        Switches inference to `torch.compile`d graphs of the position-wise parts of the Transformer blocks and the
+        s1 head (see `model.graphs`). Only used in eval mode; attention over the KV cache and the s2 decoding stay
+        eager. Call `release_graphs` to go back to eager execution.
+
+        Args:
+            buckets (Tuple[int], optional): Token counts (batch_size * seq_len) graphs are specialized for.
+            warmup_tokens (Iterable[int], optional): Token counts to compile for right away. Defaults to ().
+            **compile_kwargs: Passed on to `torch.compile`.
+
+        Returns:
+            DecodeGraphs: The attached graphs.
+        """
+        return compile_graphs(self, buckets, warmup_tokens, **compile_kwargs)
+
+    def release_graphs(self):
+        release_graphs(self)
+
     def decode_s2(self, context, s1_ids, padding_mask=None):
         """
         Decodes the s2 tokens, conditioned on the context and s1 tokens.
@@ -327,146 +718,763 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         x2 = self.dep_layer(context, sibling_embed, key_padding_mask=padding_mask)
         return self.head.cond_forward(x2)
 
+    def project_s2_context(self, context):
+        """
+        Cross-attention keys/values of the s2 branch for the given context rows (see `decode_s2_step`). Rows are
+        projected independently, so the result can be cached and extended as new context rows are decoded.
 
-def top_k_top_p_filtering(
-        logits,
-        top_k: int = 0,
-        top_p: float = 1.0,
-        filter_value: float = -float("Inf"),
-        min_tokens_to_keep: int = 1,
-):
-    """Filter a distribution of logits using top-k and/or nucleus (top-p) filtering
-    Args:
-        logits: logits distribution shape (batch size, vocabulary size)
-        if top_k > 0: keep only top k tokens with highest probability (top-k filtering).
-        if top_p < 1.0: keep the top tokens with cumulative probability >= top_p (nucleus filtering).
-            Nucleus filtering is described in Holtzman et al. (http://arxiv.org/abs/1904.09751)
-        Make sure we keep at least min_tokens_to_keep per batch example in the output
-    From: https://gist.github.com/thomwolf/1a5a29f6962089e871b94cbd09daf317
-    """
-    if top_k > 0:
-        top_k = min(max(top_k, min_tokens_to_keep), logits.size(-1))  # Safety check
-        # Remove all tokens with a probability less than the last token of the top-k
-        indices_to_remove = logits < torch.topk(logits, top_k)[0][..., -1, None]
-        logits[indices_to_remove] = filter_value
-        return logits
+        Args:
+            context (torch.Tensor): Context rows from `decode_s1`. Shape: [batch_size, seq_len, d_model]
 
-    if top_p < 1.0:
-        sorted_logits, sorted_indices = torch.sort(logits, descending=True)
-        cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
-
-        # Remove tokens with cumulative probability above the threshold (token with 0 are kept)
-        sorted_indices_to_remove = cumulative_probs > top_p
-        if min_tokens_to_keep > 1:
-            # Keep at least min_tokens_to_keep (set to min_tokens_to_keep-1 because we add the first one below)
-            sorted_indices_to_remove[..., :min_tokens_to_keep] = 0
-        # Shift the indices to the right to keep also the first token above the threshold
-        sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
-        sorted_indices_to_remove[..., 0] = 0
-
-        # scatter sorted tensors to original indexing
-        indices_to_remove = sorted_indices_to_remove.scatter(1, sorted_indices, sorted_indices_to_remove)
-        logits[indices_to_remove] = filter_value
-        return logits
+        Returns:
+            torch.Tensor: Packed keys/values. Shape: [batch_size, seq_len, 2 * d_model]
+        """
+        return self.dep_layer.cross_attn.project_kv(context)
+
+    def decode_s2_step(self, hidden, s1_ids, context_kv, padding_mask=None):
+        """
+        Decodes the s2 token of a single position, as `decode_s2` does for a one-token `s1_ids`, but only
+        computing that position: the dependency-aware layer and s2 head run on its context row alone, and the
+        cross-attention keys/values come precomputed from `project_s2_context`.
 
+        Args:
+            hidden (torch.Tensor): Context row of the decoded position. Shape: [batch_size, 1, d_model]
+            s1_ids (torch.Tensor): s1 token of the position. Shape: [batch_size, 1]
+            context_kv (torch.Tensor): `project_s2_context` of the rows the s1 token attends to. Shape: [batch_size, seq_len, 2 * d_model]
+            padding_mask (torch.Tensor, optional): True at rows to ignore. Shape: [batch_size, seq_len]. Defaults to None.
 
-def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_logits=True):
-    logits = logits / temperature
-    if top_k is not None or top_p is not None:
-        if top_k > 0 or top_p < 1.0:
-            logits = top_k_top_p_filtering(logits, top_k=top_k, top_p=top_p)
+        Returns:
+            torch.Tensor: s2 logits. Shape: [batch_size, 1, s2_vocab_size]
+        """
+        sibling_embed = self.embedding.emb_s1(s1_ids)
+        x2 = self.dep_layer.step(hidden, sibling_embed, context_kv, key_padding_mask=padding_mask)
+        return self.head.cond_forward(x2)
 
-    probs = F.softmax(logits, dim=-1)
 
-    if not sample_logits:
-        _, x = top_k(probs, k=1, dim=-1)
-    else:
-        x = torch.multinomial(probs, num_samples=1)
+_DEFAULT_SAMPLER = Sampler()
 
-    return x
 
+def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_logits=True, sampler=None):
+    """
+    Samples one token per row from temperature-scaled, top-k/top-p filtered logits.
 
-def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False):
-    with torch.no_grad():
-        x = torch.clip(x, -clip, clip)
+    Args:
+        logits (torch.Tensor): Shape: [batch_size, vocab_size]
+        temperature (float or torch.Tensor): Sampling temperature, optionally per row.
+        top_k (int or torch.Tensor, optional): Top-k threshold, optionally per row. Defaults to None (disabled).
+        top_p (float or torch.Tensor, optional): Nucleus threshold, optionally per row. Defaults to None (disabled).
+        sample_logits (bool, optional): Whether to sample; if False, the most likely token is taken. Defaults to True.
+        sampler (Sampler, optional): Sampling strategy. Defaults to the fused 'nucleus' sampler.
+
+    Returns:
+        torch.Tensor: Token ids. Shape: [batch_size, 1]
+    """
+    if not sample_logits:
+        return torch.argmax(logits, dim=-1, keepdim=True)
+    # Logits may come out of a reduced-precision model; softmax and sampling always run in fp32.
+    logits = logits.float()
+    sampler = sampler or _DEFAULT_SAMPLER
+    return sampler(logits, temperature, 0 if top_k is None else top_k, 1.0 if top_p is None else top_p)
 
-        device = x.device
-        x = x.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, x.size(1), x.size(2)).to(device)
-        x_stamp = x_stamp.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, x_stamp.size(1), x_stamp.size(2)).to(device)
-        y_stamp = y_stamp.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, y_stamp.size(1), y_stamp.size(2)).to(device)
 
-        x_token = tokenizer.encode(x, half=True)
-        
-        initial_seq_len = x.size(1)
-        batch_size = x_token[0].size(0)
-        total_seq_len = initial_seq_len + pred_len
-        full_stamp = torch.cat([x_stamp, y_stamp], dim=1)
+class ContextBuffer:
+    """
+    Fixed-capacity buffer of per-position rows ([batch_size, n, ...], e.g. s2 cross-attention keys/values)
+    that overwrites its oldest rows once full, so appending a step never copies the whole window.
 
-        generated_pre = x_token[0].new_empty(batch_size, pred_len)
-        generated_post = x_token[1].new_empty(batch_size, pred_len)
+    Row order is only chronological until the buffer wraps; `latest` is the index of the newest row.
+    This is sufficient for the s2 cross-attention (`Kronos.decode_s2_step`), which is order-independent.
 
-        pre_buffer = x_token[0].new_zeros(batch_size, max_context)
-        post_buffer = x_token[1].new_zeros(batch_size, max_context)
-        buffer_len = min(initial_seq_len, max_context)
-        if buffer_len > 0:
-            start_idx = max(0, initial_seq_len - max_context)
-            pre_buffer[:, :buffer_len] = x_token[0][:, start_idx:start_idx + buffer_len]
-            post_buffer[:, :buffer_len] = x_token[1][:, start_idx:start_idx + buffer_len]
+    Args:
+        capacity (int): Maximum number of rows held.
+    """
 
-        if verbose:
-            ran = trange
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = 0
+        self.latest = -1
+        self.data = None
+
+    def append(self, x):
+        n = x.size(1)
+        if self.data is None:
+            self.data = x.new_empty(x.size(0), self.capacity, *x.shape[2:])
+        if n > self.capacity:
+            x, n = x[:, -self.capacity:], self.capacity
+        start = (self.latest + 1) % self.capacity
+        if start + n <= self.capacity:
+            self.data[:, start:start + n] = x
         else:
-            ran = range
-        for i in ran(pred_len):
-            current_seq_len = initial_seq_len + i
-            window_len = min(current_seq_len, max_context)
-
-            if current_seq_len <= max_context:
-                input_tokens = [
-                    pre_buffer[:, :window_len],
-                    post_buffer[:, :window_len]
-                ]
-            else:
-                input_tokens = [pre_buffer, post_buffer]
+            idx = (start + torch.arange(n, device=x.device)) % self.capacity
+            self.data.index_copy_(1, idx, x)
+        self.latest = (start + n - 1) % self.capacity
+        self.size = min(self.size + n, self.capacity)
 
-            context_end = current_seq_len
-            context_start = max(0, context_end - max_context)
-            current_stamp = full_stamp[:, context_start:context_end, :].contiguous()
+    def view(self):
+        return self.data[:, :self.size]
 
-            s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp)
-            s1_logits = s1_logits[:, -1, :]
-            sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
 
-            s2_logits = model.decode_s2(context, sample_pre)
-            s2_logits = s2_logits[:, -1, :]
-            sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False,
+                              use_cache=True, sliding_window=False, padding_mask=None, pred_lens=None, draft_model=None, draft_len=4,
+                              speculative_stats=None):
+    """
+    Autoregressively generates `pred_len` steps after the context `x` and decodes them back to features,
+    averaged over `sample_count` sampled paths. See `generate_paths` for the arguments.
 
-            generated_pre[:, i] = sample_pre.squeeze(-1)
-            generated_post[:, i] = sample_post.squeeze(-1)
+    Returns:
+        np.ndarray: Decoded sequence averaged over `sample_count`. Shape: [batch_size, window, d_in]
+    """
+    paths = generate_paths(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, sample_count, verbose,
+                           use_cache, sliding_window, padding_mask, pred_lens, draft_model, draft_len, speculative_stats)
+    preds = paths.cpu().numpy()
+    preds = np.mean(preds, axis=1)
+    return preds
 
-            if current_seq_len < max_context:
-                pre_buffer[:, current_seq_len] = sample_pre.squeeze(-1)
-                post_buffer[:, current_seq_len] = sample_post.squeeze(-1)
-            else:
-                pre_buffer.copy_(torch.roll(pre_buffer, shifts=-1, dims=1))
-                post_buffer.copy_(torch.roll(post_buffer, shifts=-1, dims=1))
-                pre_buffer[:, -1] = sample_pre.squeeze(-1)
-                post_buffer[:, -1] = sample_post.squeeze(-1)
 
-        full_pre = torch.cat([x_token[0], generated_pre], dim=1)
-        full_post = torch.cat([x_token[1], generated_post], dim=1)
+def generate_paths(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False,
+                   use_cache=True, sliding_window=False, padding_mask=None, pred_lens=None, draft_model=None, draft_len=4, speculative_stats=None,
+                   prefix=None):
+    """
+    Autoregressively samples `sample_count` paths of `pred_len` steps after the context `x` and decodes them back to features.
+
+    With `use_cache`, the context is prefilled once into a KV cache and each step only runs the newly
+    sampled token through the Transformer; this is exact while the sequence fits in `max_context`. Past
+    that point the default is to recompute the full sliding window every step, exactly as without cache.
+    With `sliding_window=True` the cache instead evicts its oldest positions, keeping the per-step cost
+    constant for long horizons. Retained positions then keep the hidden states computed while the evicted
+    tokens were still visible, so results are close to, but not bit-identical with, the recomputed window.
+
+    The tokenizer encoder and the cached prefill run once per series; the resulting cache is then
+    forked into the `sample_count` sampling streams, so prefill cost scales with the number of series.
+
+    Series of different history lengths are batched by left-padding them to a common length and passing
+    `padding_mask`. Since all series then end at the same position, every decoding window lines up and
+    padded positions are simply masked out of attention. With per-series `pred_lens`, the final decode
+    masks each series to the window it would have seen on its own, so the first `pred_lens[b]` steps of
+    series b match an unbatched run.
+
+    With a `draft_model`, tokens are generated by speculative decoding (see `speculative_token_stream`),
+    which samples from the same distribution as `model` alone; `use_cache`/`sliding_window` are then unused.
+
+    Args:
+        padding_mask (torch.Tensor, optional): True at left-padded positions of `x`. Shape: [batch_size, seq_len]
+        pred_lens (Sequence[int], optional): Per-series horizons, each at most `pred_len`. Defaults to `pred_len` for all.
+        draft_model (Kronos, optional): Small model proposing tokens for speculative decoding. Defaults to None.
+        draft_len (int, optional): Maximum number of drafted steps per verification pass. Defaults to 4.
+        speculative_stats (SpeculativeStats, optional): Accumulates acceptance statistics. Defaults to None.
+        prefix (ContextPrefix, optional): Encoded and prefilled context from `prefill_context`, reused instead of
+            encoding `x` again, e.g. across chunks of paths. Not used with `draft_model`. Defaults to None.
+
+    Returns:
+        torch.Tensor: Decoded sampled paths, on the input device. Shape: [batch_size, sample_count, window, d_in]
+    """
+    with torch.no_grad():
+        token_stream = _token_stream(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, sample_count, verbose,
+                                     use_cache, sliding_window, padding_mask, draft_model, draft_len, speculative_stats, prefix)
+        for _, full_pre, full_post, full_mask in token_stream:
+            pass
+
+        initial_seq_len = x.size(1)
+        total_seq_len = initial_seq_len + pred_len
 
         context_start = max(0, total_seq_len - max_context)
+        decode_mask = full_mask[:, context_start:] if full_mask is not None else None
+        if pred_lens is not None:
+            # Mask every series down to the window it would have decoded on its own.
+            series_starts = (initial_seq_len + torch.as_tensor(pred_lens, device=x.device) - max_context).clamp(min=0)
+            series_starts = series_starts.repeat_interleave(sample_count)
+            context_start = int(series_starts.min())
+            positions = torch.arange(context_start, total_seq_len, device=x.device)
+            decode_mask = positions[None, :] < series_starts[:, None]
+            if full_mask is not None:
+                decode_mask |= full_mask[:, context_start:]
+        if decode_mask is not None and not decode_mask.any():
+            decode_mask = None
+
         input_tokens = [
             full_pre[:, context_start:total_seq_len].contiguous(),
             full_post[:, context_start:total_seq_len].contiguous()
         ]
-        z = tokenizer.decode(input_tokens, half=True)
-        z = z.reshape(-1, sample_count, z.size(1), z.size(2))
-        preds = z.cpu().numpy()
-        preds = np.mean(preds, axis=1)
+        z = tokenizer.decode(input_tokens, half=True, padding_mask=decode_mask).float()
+        return z.reshape(-1, sample_count, z.size(1), z.size(2))
 
-        return preds
+
+def _init_token_buffers(tokenizer, x, x_stamp, y_stamp, pred_len, clip, sample_count, padding_mask=None, x_token=None):
+    """
+    Encodes the context once per series (unless its tokens `x_token` are given) and lays out the token, stamp
+    and padding buffers of the `sample_count` sampling streams (series-major), with room for `pred_len` generated steps.
+
+    Returns:
+        Tuple: (x_token, full_pre, full_post, full_stamp, full_mask). x_token holds the per-series context tokens;
+            the full_* buffers have batch_size * sample_count rows; full_mask is None without padding.
+    """
+    # Each series is encoded once; sampling streams are laid out as series-major copies.
+    if x_token is None:
+        x_token = tokenizer.encode(torch.clip(x, -clip, clip), half=True, padding_mask=padding_mask)
+    x_stamp_rep = x_stamp.repeat_interleave(sample_count, dim=0)
+    y_stamp_rep = y_stamp.repeat_interleave(sample_count, dim=0)
+
+    initial_seq_len = x.size(1)
+    batch_size = x.size(0) * sample_count
+    total_seq_len = initial_seq_len + pred_len
+    full_stamp = torch.cat([x_stamp_rep, y_stamp_rep], dim=1)
+
+    # Context and generated tokens share one preallocated buffer; windows are views into it.
+    full_pre = x_token[0].new_empty(batch_size, total_seq_len)
+    full_post = x_token[1].new_empty(batch_size, total_seq_len)
+    full_pre[:, :initial_seq_len] = x_token[0].repeat_interleave(sample_count, dim=0)
+    full_post[:, :initial_seq_len] = x_token[1].repeat_interleave(sample_count, dim=0)
+
+    full_mask = None
+    if padding_mask is not None:
+        full_mask = torch.zeros(batch_size, total_seq_len, dtype=torch.bool, device=x.device)
+        full_mask[:, :initial_seq_len] = padding_mask.bool().repeat_interleave(sample_count, dim=0)
+
+    return x_token, full_pre, full_post, full_stamp, full_mask
+
+
+def fork_kv_cache(kv_cache, n):
+    """Independent copy of a list of `KVCache`s with every cached sequence repeated `n` times; the originals are left untouched."""
+    forked = []
+    for layer_cache in kv_cache:
+        layer_cache = copy.copy(layer_cache)
+        layer_cache.fork(n)  # repeat_interleave allocates new tensors
+        forked.append(layer_cache)
+    return forked
+
+
+class ContextPrefix:
+    """
+    Per-series state of an encoded (and, with a cache, prefilled) context, from `prefill_context`. Any number
+    of sampling passes can start from it: each forks the cache into its own streams.
+    """
+
+    def __init__(self, x_token, kv_cache=None, logits=None, context=None, s2_context=None):
+        self.x_token = x_token  # (s1_ids, s2_ids) of the context. Shape: [batch_size, seq_len]
+        self.kv_cache = kv_cache  # List[KVCache] holding the latest max_context positions, or None without a cache
+        self.logits = logits  # s1 logits at the last position. Shape: [batch_size, 1, vocab]
+        self.context = context  # Hidden state at the last position. Shape: [batch_size, 1, d_model]
+        self.s2_context = s2_context  # s2 cross-attention keys/values of the cached positions. Shape: [batch_size, n, 2 * d_model]
+
+
+@torch.no_grad()
+def prefill_context(tokenizer, model, x, x_stamp, max_context, clip=5, use_cache=True, sliding_window=False, padding_mask=None):
+    """
+    Encodes the context once and, when `sample_token_stream` would use a KV cache, prefills it.
+
+    Returns:
+        ContextPrefix
+    """
+    x_token = tokenizer.encode(torch.clip(x, -clip, clip), half=True, padding_mask=padding_mask)
+    initial_seq_len = x.size(1)
+    if not (use_cache and (sliding_window or initial_seq_len <= max_context)):
+        return ContextPrefix(x_token)
+
+    kv_cache = model.init_kv_cache(max_context, sliding=sliding_window)
+    start = max(0, initial_seq_len - max_context)
+    prefill_mask = padding_mask[:, start:] if padding_mask is not None else None
+    logits, context = model.decode_s1(x_token[0][:, start:], x_token[1][:, start:], x_stamp[:, start:, :].contiguous(),
+                                      padding_mask=prefill_mask, kv_cache=kv_cache)
+    return ContextPrefix(x_token, kv_cache, logits[:, -1:, :], context[:, -1:], model.project_s2_context(context))
+
+
+@torch.no_grad()
+def sample_token_stream(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False,
+                        use_cache=True, sliding_window=False, padding_mask=None, prefix=None):
+    """
+    Runs the autoregressive sampling loop behind `generate_paths`, yielding after every step.
+
+    The context is encoded and prefilled by `prefill_context`, unless a `prefix` from an earlier call with the
+    same context and settings is given; its cache is forked, never modified.
+
+    Yields:
+        Tuple[int, torch.Tensor, torch.Tensor, torch.Tensor]: (step, full_pre, full_post, full_mask). The token buffers,
+            of shape [batch_size * sample_count, seq_len + pred_len], are filled up to position seq_len + step; full_mask
+            is the matching padding mask, or None without padding. The buffers are updated in place by later steps.
+    """
+    if prefix is None:
+        prefix = prefill_context(tokenizer, model, x, x_stamp, max_context, clip, use_cache, sliding_window, padding_mask)
+    x_token, full_pre, full_post, full_stamp, full_mask = _init_token_buffers(tokenizer, x, x_stamp, y_stamp, pred_len, clip, sample_count,
+                                                                              padding_mask, prefix.x_token)
+    initial_seq_len = x.size(1)
+    # Per-series sampling parameters follow the series-major stream layout.
+    T, top_k, top_p = (v.repeat_interleave(sample_count) if torch.is_tensor(v) else v for v in (T, top_k, top_p))
+
+    kv_cache, s2_kv_buffer, mask_buffer = None, None, None
+    if prefix.kv_cache is not None:
+        kv_cache = fork_kv_cache(prefix.kv_cache, sample_count)
+        # s2 cross-attention keys/values of the context rows; only the newest row itself is needed.
+        s2_kv_buffer = ContextBuffer(max_context)
+        start = max(0, initial_seq_len - max_context)
+        prefill_logits = prefix.logits.repeat_interleave(sample_count, dim=0)
+        hidden = prefix.context.repeat_interleave(sample_count, dim=0)
+        s2_kv_buffer.append(prefix.s2_context.repeat_interleave(sample_count, dim=0))
+        if full_mask is not None:
+            mask_buffer = ContextBuffer(max_context)
+            mask_buffer.append(full_mask[:, start:initial_seq_len])
+
+    if verbose:
+        ran = trange
+    else:
+        ran = range
+    for i in ran(pred_len):
+        current_seq_len = initial_seq_len + i
+
+        context_end = current_seq_len
+        context_start = max(0, context_end - max_context)
+
+        if kv_cache is not None and (sliding_window or current_seq_len <= max_context):
+            if i == 0:
+                s1_logits = prefill_logits
+            else:
+                # Only the token sampled in the previous step is new.
+                prev = current_seq_len - 1
+                s1_logits, hidden = model.decode_s1(full_pre[:, prev:current_seq_len], full_post[:, prev:current_seq_len],
+                                                    full_stamp[:, prev:current_seq_len, :], kv_cache=kv_cache)
+                s2_kv_buffer.append(model.project_s2_context(hidden))
+                if mask_buffer is not None:
+                    mask_buffer.append(full_mask[:, prev:current_seq_len])
+            context_kv = s2_kv_buffer.view()
+            context_mask = mask_buffer.view() if mask_buffer is not None else None
+        else:
+            input_tokens = [
+                full_pre[:, context_start:context_end],
+                full_post[:, context_start:context_end]
+            ]
+            current_stamp = full_stamp[:, context_start:context_end, :].contiguous()
+            context_mask = full_mask[:, context_start:context_end] if full_mask is not None else None
+
+            s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp, padding_mask=context_mask)
+            hidden, context_kv = context[:, -1:], model.project_s2_context(context)
+
+        s1_logits = s1_logits[:, -1, :]
+        sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+
+        # Only the newest position needs s2 logits; its cross-attention keys/values are cached with the context.
+        s2_logits = model.decode_s2_step(hidden, sample_pre, context_kv, padding_mask=context_mask)[:, 0]
+        sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+
+        full_pre[:, current_seq_len] = sample_pre.squeeze(-1)
+        full_post[:, current_seq_len] = sample_post.squeeze(-1)
+
+        yield i, full_pre, full_post, full_mask
+
+
+class SpeculativeStats:
+    """
+    Running acceptance statistics of speculative decoding (see `speculative_token_stream`).
+
+    Attributes:
+        rounds (int): Number of draft/verify rounds, i.e. target `decode_s1` passes.
+        proposed (int): Number of drafted (s1, s2) pairs, summed over sampling streams.
+        accepted (int): Number of drafted pairs that passed the acceptance test, summed over sampling streams.
+        emitted (int): Number of generated steps.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.rounds = 0
+        self.proposed = 0
+        self.accepted = 0
+        self.emitted = 0
+
+    @property
+    def acceptance_rate(self):
+        """Fraction of drafted token pairs accepted by the target model."""
+        return self.accepted / self.proposed if self.proposed else 0.0
+
+    @property
+    def steps_per_round(self):
+        """Average number of steps generated per target pass (1.0 without speculation)."""
+        return self.emitted / self.rounds if self.rounds else 0.0
+
+    def as_dict(self):
+        return {
+            'rounds': self.rounds,
+            'proposed': self.proposed,
+            'accepted': self.accepted,
+            'emitted': self.emitted,
+            'acceptance_rate': self.acceptance_rate,
+            'steps_per_round': self.steps_per_round,
+        }
+
+
+def _residual_probs(p, q):
+    """Rejection distribution norm(max(0, p - q)); falls back to p where p == q (rejection is then impossible)."""
+    residual = (p - q).clamp_(min=0)
+    return torch.where(residual.sum(dim=-1, keepdim=True) > 0, residual, p)
+
+
+def _decode_s2_at(model, context, s1_ids, row, padding_mask=None):
+    """
+    s2 logits of a single position, equal to `model.decode_s2(context, s1_ids, padding_mask)[:, row]`
+    for a one-token `s1_ids`, without running the s2 head over the whole window.
+
+    Args:
+        context (torch.Tensor): Context rows the s1 token attends to. Shape: [batch_size, seq_len, d_model]
+        s1_ids (torch.Tensor): s1 token of every row. Shape: [batch_size, 1]
+        row (int or torch.Tensor): Index of the context row of the predicted position, shared or per batch row.
+        padding_mask (torch.Tensor, optional): True at context rows to ignore. Shape: [batch_size, seq_len]
+
+    Returns:
+        torch.Tensor: s2 logits. Shape: [batch_size, s2_vocab_size]
+    """
+    if torch.is_tensor(row):
+        hidden = context[torch.arange(context.size(0), device=context.device), row]
+    else:
+        hidden = context[:, row]
+    return model.decode_s2_step(hidden[:, None, :], s1_ids, model.project_s2_context(context), padding_mask)[:, 0]
+
+
+@torch.no_grad()
+def speculative_token_stream(tokenizer, model, draft_model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99,
+                             sample_count=5, draft_len=4, verbose=False, padding_mask=None, stats=None):
+    """
+    Speculative variant of `sample_token_stream`: a small `draft_model` proposes up to `draft_len` (s1, s2)
+    token pairs, which `model` then verifies with a single cached `decode_s1` pass over all of them.
+
+    Each drafted pair is accepted with the standard rule, applied along the s1 -> s2 hierarchy: s1 is kept
+    with probability min(1, p(s1) / q(s1)), then s2 with min(1, p(s2 | s1) / q(s2 | s1)), where p(s2 | s1)
+    comes from the target's `decode_s2` conditioned on the drafted s1. At the first rejection, a rejected
+    s1 is resampled from norm(max(0, p - q)) and its s2 drawn from the target's `decode_s2` given the new s1;
+    a rejected s2 is resampled from the residual of the s2 distributions. If all drafts pass, one more pair is
+    sampled from the target. The generated paths therefore follow exactly the target model's distribution
+    (including temperature and top-k/top-p filtering); only the cost per step changes.
+
+    All sampling streams share the KV caches, so each round keeps the shortest accepted prefix in the batch;
+    streams that accepted more simply keep their (equally valid) token at the cut. Speculation runs while the
+    sequence fits in `max_context`; past it, steps fall back to recomputing the target's sliding window.
+
+    Args:
+        draft_model (Kronos): Draft model. It must share the tokenizer vocabulary (s1_bits/s2_bits) with `model`.
+        draft_len (int, optional): Maximum number of drafted pairs per round. Defaults to 4.
+        stats (SpeculativeStats, optional): Accumulates acceptance statistics. Defaults to None.
+
+    Yields:
+        Same as `sample_token_stream`.
+    """
+    if torch.is_tensor(T) or torch.is_tensor(top_k) or torch.is_tensor(top_p):
+        raise ValueError("Speculative decoding only supports scalar sampling parameters.")
+    if (draft_model.s1_bits, draft_model.s2_bits) != (model.s1_bits, model.s2_bits):
+        raise ValueError(
+            f"Draft model vocabulary (s1_bits={draft_model.s1_bits}, s2_bits={draft_model.s2_bits}) does not match "
+            f"the target model (s1_bits={model.s1_bits}, s2_bits={model.s2_bits}); both must use the same tokenizer."
+        )
+
+    x_token, full_pre, full_post, full_stamp, full_mask = _init_token_buffers(tokenizer, x, x_stamp, y_stamp, pred_len, clip, sample_count,
+                                                                              padding_mask)
+    initial_seq_len = x.size(1)
+    total_seq_len = initial_seq_len + pred_len
+    batch_size = full_pre.size(0)
+    device = x.device
+
+    # Both models are prefilled with all context tokens but the last one, which every round feeds first.
+    models = (model, draft_model)
+    caches, contexts, lengths = [None, None], [None, None], [0, 0]
+    if initial_seq_len <= max_context:
+        for idx, m in enumerate(models):
+            caches[idx] = m.init_kv_cache(max_context)
+            if initial_seq_len > 1:
+                prefill = initial_seq_len - 1
+                prefill_mask = padding_mask[:, :prefill] if padding_mask is not None else None
+                _, prefill_context = m.decode_s1(x_token[0][:, :prefill], x_token[1][:, :prefill], x_stamp[:, :prefill, :].contiguous(),
+                                                 padding_mask=prefill_mask, kv_cache=caches[idx])
+                for layer_cache in caches[idx]:
+                    layer_cache.fork(sample_count)
+                contexts[idx] = prefill_context.new_empty(batch_size, max_context, prefill_context.size(-1))
+                contexts[idx][:, :prefill] = prefill_context.repeat_interleave(sample_count, dim=0)
+                lengths[idx] = prefill
+
+    def feed(idx, start, end):
+        # Runs models[idx] over tokens [start, end) on top of its cache; returns their s1 logits.
+        logits, context = models[idx].decode_s1(full_pre[:, start:end], full_post[:, start:end], full_stamp[:, start:end, :],
+                                                kv_cache=caches[idx])
+        if contexts[idx] is None:
+            contexts[idx] = context.new_empty(batch_size, max_context, context.size(-1))
+        contexts[idx][:, start:end] = context
+        lengths[idx] = end
+        return logits
+
+    def row_mask(end):
+        return full_mask[:, :end] if full_mask is not None else None
+
+    pbar = tqdm(total=pred_len, disable=not verbose)
+    seq_len = initial_seq_len
+    while seq_len < total_seq_len:
+        if seq_len > max_context:
+            # Past the context window: plain target step over the recomputed sliding window.
+            start = seq_len - max_context
+            window_mask = full_mask[:, start:seq_len] if full_mask is not None else None
+            s1_logits, context = model.decode_s1(full_pre[:, start:seq_len], full_post[:, start:seq_len],
+                                                 full_stamp[:, start:seq_len, :].contiguous(), padding_mask=window_mask)
+            sample_pre = sample_from_logits(s1_logits[:, -1, :], temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+            s2_logits = _decode_s2_at(model, context, sample_pre, -1, window_mask)
+            sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+            full_pre[:, seq_len] = sample_pre.squeeze(-1)
+            full_post[:, seq_len] = sample_post.squeeze(-1)
+            if stats is not None:
+                stats.rounds += 1
+                stats.emitted += 1
+            pbar.update(1)
+            yield seq_len - initial_seq_len, full_pre, full_post, full_mask
+            seq_len += 1
+            continue
+
+        # Drafts fill positions [seq_len, seq_len + n_draft); the target pass also yields the position after them.
+        n_draft = min(draft_len, total_seq_len - seq_len - 1, max_context - seq_len)
+        q1, q2 = [], []
+        if n_draft > 0:
+            logits = feed(1, lengths[1], seq_len)[:, -1, :]
+            for j in range(n_draft):
+                pos = seq_len + j
+                probs1 = filtered_probs(logits, T, top_k, top_p)
+                draft_pre = torch.multinomial(probs1, num_samples=1)
+                probs2 = filtered_probs(_decode_s2_at(draft_model, contexts[1][:, :pos], draft_pre, -1, row_mask(pos)), T, top_k, top_p)
+                draft_post = torch.multinomial(probs2, num_samples=1)
+                full_pre[:, pos] = draft_pre.squeeze(-1)
+                full_post[:, pos] = draft_post.squeeze(-1)
+                q1.append(probs1)
+                q2.append(probs2)
+                if j < n_draft - 1:
+                    logits = feed(1, pos, pos + 1)[:, -1, :]
+
+        # Target verification: one pass over the pending token and all drafts.
+        target_start = lengths[0]
+        s1_logits = feed(0, target_start, seq_len + n_draft)[:, seq_len - 1 - target_start:, :]
+        p1 = filtered_probs(s1_logits.reshape(-1, s1_logits.size(-1)), T, top_k, top_p).view(batch_size, n_draft + 1, -1)
+
+        n_accept = 0
+        if n_draft > 0:
+            draft_pre = full_pre[:, seq_len:seq_len + n_draft]
+            draft_post = full_post[:, seq_len:seq_len + n_draft]
+            q1, q2 = torch.stack(q1, dim=1), torch.stack(q2, dim=1)
+
+            # Target s2 distributions of all drafts at once: draft j sees context rows [0, seq_len + j).
+            window = seq_len + n_draft - 1
+            rows = torch.arange(seq_len - 1, window, device=device)
+            key_mask = (torch.arange(window, device=device)[None, :] > rows[:, None]).expand(batch_size, -1, -1)
+            if full_mask is not None:
+                key_mask = key_mask | full_mask[:, None, :window]
+            verify_context = contexts[0][:, None, :window].expand(-1, n_draft, -1, -1).reshape(batch_size * n_draft, window, -1)
+            s2_logits = _decode_s2_at(model, verify_context, draft_pre.reshape(-1, 1), rows.repeat(batch_size), key_mask.reshape(batch_size * n_draft, window))
+            p2 = filtered_probs(s2_logits, T, top_k, top_p).view(batch_size, n_draft, -1)
+
+            ratio1 = p1[:, :n_draft].gather(-1, draft_pre[..., None]) / q1.gather(-1, draft_pre[..., None])
+            ratio2 = p2.gather(-1, draft_post[..., None]) / q2.gather(-1, draft_post[..., None])
+            accept_pre = (torch.rand_like(ratio1) < ratio1).squeeze(-1)
+            accepted = accept_pre & (torch.rand_like(ratio2) < ratio2).squeeze(-1)
+            row_accepts = accepted.long().cumprod(dim=1).sum(dim=1)
+            n_accept = int(row_accepts.min())
+            if stats is not None:
+                stats.proposed += batch_size * n_draft
+                stats.accepted += int(row_accepts.sum())
+
+        # Position seq_len + n_accept: the correction after the first rejection, or a bonus target sample.
+        pos = seq_len + n_accept
+        if n_accept < n_draft:
+            keep_pre, keep_pair = accept_pre[:, n_accept], accepted[:, n_accept]
+            sample_pre = torch.where(keep_pre, draft_pre[:, n_accept],
+                                     torch.multinomial(_residual_probs(p1[:, n_accept], q1[:, n_accept]), num_samples=1).squeeze(-1))
+            sample_post = torch.where(keep_pair, draft_post[:, n_accept],
+                                      torch.multinomial(_residual_probs(p2[:, n_accept], q2[:, n_accept]), num_samples=1).squeeze(-1))
+            resampled = ~keep_pre
+        else:
+            sample_pre = torch.multinomial(p1[:, n_accept], num_samples=1).squeeze(-1)
+            resampled = None
+        if resampled is None or bool(resampled.any()):
+            s2_logits = _decode_s2_at(model, contexts[0][:, :pos], sample_pre[:, None], -1, row_mask(pos))
+            fresh_post = torch.multinomial(filtered_probs(s2_logits, T, top_k, top_p), num_samples=1).squeeze(-1)
+            sample_post = fresh_post if resampled is None else torch.where(resampled, fresh_post, sample_post)
+        full_pre[:, pos] = sample_pre
+        full_post[:, pos] = sample_post
+
+        # Roll both caches back to the accepted prefix.
+        for idx in range(2):
+            if lengths[idx] > pos:
+                for layer_cache in caches[idx]:
+                    layer_cache.truncate(pos)
+                lengths[idx] = pos
+
+        if stats is not None:
+            stats.rounds += 1
+            stats.emitted += n_accept + 1
+        pbar.update(n_accept + 1)
+        for step_pos in range(seq_len, pos + 1):
+            yield step_pos - initial_seq_len, full_pre, full_post, full_mask
+        seq_len = pos + 1
+    pbar.close()
+
+
+def _token_stream(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, sample_count, verbose, use_cache,
+                  sliding_window, padding_mask=None, draft_model=None, draft_len=4, speculative_stats=None, prefix=None):
+    if draft_model is not None:
+        return speculative_token_stream(tokenizer, model, draft_model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p,
+                                        sample_count, draft_len, verbose, padding_mask, speculative_stats)
+    return sample_token_stream(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, sample_count, verbose,
+                               use_cache, sliding_window, padding_mask, prefix)
+
+
+@torch.no_grad()
+def stream_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, chunk_size=1,
+                     verbose=False, use_cache=True, sliding_window=False, draft_model=None, draft_len=4, speculative_stats=None):
+    """
+    Generates like `auto_regressive_inference`, but yields decoded steps as soon as their tokens are sampled.
+
+    The tokenizer decoder runs incrementally over a KV cache, starting from the same window the one-shot
+    decode would use, so while `pred_len <= max_context` the yielded values match `auto_regressive_inference`.
+    Longer horizons decode over a sliding window of the last `max_context` tokens.
+
+    Yields:
+        Tuple[int, np.ndarray]: (index of the first step in the chunk, decoded steps averaged over `sample_count`
+                                of shape [batch_size, n_steps, d_in]), with n_steps <= chunk_size.
+    """
+    initial_seq_len = x.size(1)
+    decode_start = min(max(0, initial_seq_len + pred_len - max_context), initial_seq_len)
+    decoder_cache = tokenizer.init_kv_cache(max_context, sliding=True)
+
+    pending = []
+    token_stream = _token_stream(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, sample_count, verbose,
+                                 use_cache, sliding_window, draft_model=draft_model, draft_len=draft_len, speculative_stats=speculative_stats)
+    for step, full_pre, full_post, _ in token_stream:
+        if step == 0 and decode_start < initial_seq_len:
+            tokenizer.decode([full_pre[:, decode_start:initial_seq_len], full_post[:, decode_start:initial_seq_len]], half=True, kv_cache=decoder_cache)
+
+        pos = initial_seq_len + step
+        z = tokenizer.decode([full_pre[:, pos:pos + 1], full_post[:, pos:pos + 1]], half=True, kv_cache=decoder_cache)
+        pending.append(z.float().reshape(-1, sample_count, z.size(-1)).mean(dim=1))
+
+        if len(pending) == chunk_size or step == pred_len - 1:
+            yield step + 1 - len(pending), torch.stack(pending, dim=1).cpu().numpy()
+            pending = []
+
+
+class StreamingPathStats:
+    """
+    On-device streaming aggregate of sampled forecast paths.
+
+    Paths are folded in chunk by chunk, so memory does not grow with the number of paths. The running
+    mean and variance use the parallel (Chan et al.) update and are exact. Quantiles are read from a
+    histogram per (series, step, feature), interpolating linearly inside the bin and clamped to the observed
+    minimum and maximum. The histogram starts out over `value_range`; a chunk with values outside it widens
+    the range by doubling the bin width (merging pairs of bins) until the chunk fits, so no sample is
+    clipped, at the cost of resolution.
+
+    Args:
+        shape (tuple): Shape of one path batch without the path dimension, i.e. (batch_size, pred_len, d_in).
+        device: Device the statistics are kept on.
+        quantile_bins (int, optional): Number of histogram bins, 0 to disable quantiles. Defaults to 1000.
+        value_range (tuple, optional): Initial (low, high) range covered by the histogram. Defaults to (-5, 5).
+    """
+
+    def __init__(self, shape, device, quantile_bins=1000, value_range=(-5, 5)):
+        self.count = 0
+        self.mean = torch.zeros(shape, device=device)
+        self.m2 = torch.zeros(shape, device=device)
+        self.quantile_bins = quantile_bins
+        self.low, self.high = value_range
+        self.bin_width = (self.high - self.low) / max(quantile_bins, 1)
+        self.hist = torch.zeros(*shape, quantile_bins, dtype=torch.int32, device=device) if quantile_bins > 0 else None
+        self.min = torch.full(shape, math.inf, device=device)
+        self.max = torch.full(shape, -math.inf, device=device)
+
+    def update(self, paths):
+        """
+        Args:
+            paths (torch.Tensor): New paths. Shape: [batch_size, n_paths, pred_len, d_in]
+        """
+        paths = paths.float()
+        n = paths.size(1)
+        chunk_mean = paths.mean(dim=1)
+        chunk_m2 = ((paths - chunk_mean.unsqueeze(1)) ** 2).sum(dim=1)
+
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += chunk_m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        self.min = torch.minimum(self.min, paths.amin(dim=1))
+        self.max = torch.maximum(self.max, paths.amax(dim=1))
+
+        if self.hist is not None:
+            self._widen(paths.min().item(), paths.max().item())
+            bins = ((paths - self.low) / self.bin_width).long().clamp_(0, self.quantile_bins - 1)
+            # Flat (series, step, feature, bin) index of every sampled value.
+            cell = torch.arange(self.mean.numel(), device=paths.device).view(self.mean.shape[0], 1, *self.mean.shape[1:])
+            flat = (cell * self.quantile_bins + bins).flatten()
+            self.hist.view(-1).index_add_(0, flat, torch.ones_like(flat, dtype=torch.int32))
+
+    def _widen(self, low, high):
+        """Grows the histogram range to cover [low, high], keeping every bin boundary on the old grid."""
+        if low >= self.low and high <= self.high:
+            return
+        # New range: `shift` old bins further down, bins 2 ** k times as wide, so old bin i lands in new bin (i + shift) >> k.
+        shift = max(0, math.ceil((self.low - low) / self.bin_width))
+        span = shift + max(self.quantile_bins, math.floor((high - self.low) / self.bin_width) + 1)
+        k = 0
+        while self.quantile_bins << k < span:
+            k += 1
+        target = (torch.arange(self.quantile_bins, device=self.hist.device) + shift) >> k
+        self.hist = torch.zeros_like(self.hist).index_add_(-1, target, self.hist)
+        self.low -= shift * self.bin_width
+        self.bin_width *= 2 ** k
+        self.high = self.low + self.quantile_bins * self.bin_width
+
+    @property
+    def variance(self):
+        return self.m2 / max(self.count - 1, 1)
+
+    def quantile(self, q):
+        """Estimated `q`-quantile of every (series, step, feature). Shape: [batch_size, pred_len, d_in]"""
+        if self.hist is None:
+            raise ValueError("Quantiles are not tracked (quantile_bins=0).")
+        counts = self.hist.float()
+        cdf = counts.cumsum(dim=-1)
+        target = torch.full_like(cdf[..., :1], q * self.count)
+        idx = torch.searchsorted(cdf.contiguous(), target).clamp_(max=self.quantile_bins - 1)
+        prev_cdf = torch.where(idx > 0, cdf.gather(-1, (idx - 1).clamp(min=0)), torch.zeros_like(target))
+        within = ((target - prev_cdf) / counts.gather(-1, idx).clamp(min=1)).clamp(0, 1)
+        value = (self.low + (idx.float() + within) * self.bin_width).squeeze(-1)
+        return torch.minimum(torch.maximum(value, self.min), self.max)
+
+
+def monte_carlo_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, n_paths, chunk_size=100, clip=5, T=1.0, top_k=0, top_p=0.99,
+                          quantiles=(0.05, 0.5, 0.95), quantile_bins=1000, return_paths=False, verbose=False, use_cache=True, sliding_window=False,
+                          padding_mask=None):
+    """
+    Samples `n_paths` forecast paths per series in chunks of `chunk_size` and aggregates them on-device.
+
+    Only `chunk_size` paths per series are alive at any time, so memory is bounded independently of
+    `n_paths`. The context is encoded and prefilled once (`prefill_context`); every chunk forks its cache.
+    Paths are only copied to the host when `return_paths` is set.
+
+    Returns:
+        dict: Normalized statistics of the last `pred_len` steps, each of shape [batch_size, pred_len, d_in]:
+            'mean', 'std', 'quantiles' (dict of quantile -> array) and 'paths'
+            ([batch_size, n_paths, pred_len, d_in], or None unless `return_paths`).
+    """
+    batch_size, d_in = x.size(0), x.size(2)
+    stats = StreamingPathStats((batch_size, pred_len, d_in), x.device, quantile_bins if quantiles else 0, (-clip, clip))
+    paths_out = np.empty((batch_size, n_paths, pred_len, d_in), dtype=np.float32) if return_paths else None
+
+    prefix = prefill_context(tokenizer, model, x, x_stamp, max_context, clip, use_cache, sliding_window, padding_mask)
+    done = 0
+    while done < n_paths:
+        n = min(chunk_size, n_paths - done)
+        paths = generate_paths(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, n, verbose,
+                               use_cache, sliding_window, padding_mask, prefix=prefix)[:, :, -pred_len:, :]
+        stats.update(paths)
+        if paths_out is not None:
+            paths_out[:, done:done + n] = paths.cpu().numpy()
+        done += n
+
+    return {
+        'mean': stats.mean.cpu().numpy(),
+        'std': stats.variance.sqrt().cpu().numpy(),
+        'quantiles': {q: stats.quantile(q).cpu().numpy() for q in quantiles},
+        'paths': paths_out,
+    }
 
 
 def calc_time_stamps(x_timestamp):
@@ -479,100 +1487,120 @@ def calc_time_stamps(x_timestamp):
     return time_df
 
 
-class KronosPredictor:
+def release_module(module):
+    """Evicts `module` from the `ModelRegistry` that handed it out, before it is changed in place."""
+    for registry in getattr(module, "_registries", ()):
+        registry.evict(module)
 
-    def __init__(self, model, tokenizer, device=None, max_context=512, clip=5):
-        self.tokenizer = tokenizer
-        self.model = model
+
+def _changed_by_to(module, device, dtype=None):
+    # Whether `module.to(device, dtype)` would change the module.
+    param = next(module.parameters(), None)
+    device = torch.device(device)
+    if param is None:
+        return False
+    return (param.device.type != device.type or (device.index is not None and param.device.index != device.index)
+            or (dtype is not None and param.dtype != dtype))
+
+
+class BaseKronosPredictor:
+    """
+    DataFrame front-end shared by the predictor backends: validation, normalization, batching and
+    de-normalization of `predict` and `predict_batch`. Subclasses implement `generate`.
+    """
+
+    def __init__(self, max_context=512, clip=5, device="cpu"):
         self.max_context = max_context
         self.clip = clip
+        self.device = device
         self.price_cols = ['open', 'high', 'low', 'close']
         self.vol_col = 'volume'
         self.amt_vol = 'amount'
         self.time_cols = ['minute', 'hour', 'weekday', 'day', 'month']
-        
-        # Auto-detect device if not specified
-        if device is None:
-            if torch.cuda.is_available():
-                device = "cuda:0"
-            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-                device = "mps"
-            else:
-                device = "cpu"
-        
-        self.device = device
-
-        self.tokenizer = self.tokenizer.to(self.device)
-        self.model = self.model.to(self.device)
 
-    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose):
+    @contextmanager
+    def use_adapter(self, adapter):
+        """Selects `adapter` for the duration of a call; backends without LoRA support only accept None."""
+        if adapter is not None:
+            raise ValueError(f"LoRA adapters are not supported by {type(self).__name__}.")
+        yield
 
-        x_tensor = torch.from_numpy(np.array(x).astype(np.float32)).to(self.device)
-        x_stamp_tensor = torch.from_numpy(np.array(x_stamp).astype(np.float32)).to(self.device)
-        y_stamp_tensor = torch.from_numpy(np.array(y_stamp).astype(np.float32)).to(self.device)
+    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True, adapter=None):
 
-        preds = auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
-                                          self.clip, T, top_k, top_p, sample_count, verbose)
-        preds = preds[:, -pred_len:, :]
-        return preds
+        x, x_stamp, y_stamp, x_mean, x_std = self._prepare_series(df, x_timestamp, y_timestamp, pred_len, 0)
 
-    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True):
+        x = x[np.newaxis, :]
+        x_stamp = x_stamp[np.newaxis, :]
+        y_stamp = y_stamp[np.newaxis, :]
 
-        if not isinstance(df, pd.DataFrame):
-            raise ValueError("Input must be a pandas DataFrame.")
+        with self.use_adapter(adapter):
+            preds = self.generate(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose)
 
-        if not all(col in df.columns for col in self.price_cols):
-            raise ValueError(f"Price columns {self.price_cols} not found in DataFrame.")
-
-        df = df.copy()
-        if self.vol_col not in df.columns:
-            df[self.vol_col] = 0.0  # Fill missing volume with zeros
-            df[self.amt_vol] = 0.0  # Fill missing amount with zeros
-        if self.amt_vol not in df.columns and self.vol_col in df.columns:
-            df[self.amt_vol] = df[self.vol_col] * df[self.price_cols].mean(axis=1)
+        preds = preds.squeeze(0)
+        preds = preds * (x_std + 1e-5) + x_mean
 
-        if df[self.price_cols + [self.vol_col, self.amt_vol]].isnull().values.any():
-            raise ValueError("Input DataFrame contains NaN values in price or volume columns.")
+        pred_df = pd.DataFrame(preds, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_timestamp)
+        return pred_df
 
+    def _prepare_series(self, df, x_timestamp, y_timestamp, pred_len, i):
+        """Validates the i-th series of a batch and returns (x_norm, x_stamp, y_stamp, x_mean, x_std)."""
+        x = self._features(df, i)
         x_time_df = calc_time_stamps(x_timestamp)
         y_time_df = calc_time_stamps(y_timestamp)
 
-        x = df[self.price_cols + [self.vol_col, self.amt_vol]].values.astype(np.float32)
         x_stamp = x_time_df.values.astype(np.float32)
         y_stamp = y_time_df.values.astype(np.float32)
 
-        x_mean, x_std = np.mean(x, axis=0), np.std(x, axis=0)
+        if x.shape[0] != x_stamp.shape[0]:
+            raise ValueError(f"Inconsistent lengths at index {i}: x has {x.shape[0]} vs x_stamp has {x_stamp.shape[0]}.")
+        if y_stamp.shape[0] != pred_len:
+            raise ValueError(f"y_timestamp length at index {i} should equal pred_len={pred_len}, got {y_stamp.shape[0]}.")
 
-        x = (x - x_mean) / (x_std + 1e-5)
-        x = np.clip(x, -self.clip, self.clip)
-
-        x = x[np.newaxis, :]
-        x_stamp = x_stamp[np.newaxis, :]
-        y_stamp = y_stamp[np.newaxis, :]
+        x_mean, x_std = np.mean(x, axis=0), np.std(x, axis=0)
+        x_norm = (x - x_mean) / (x_std + 1e-5)
+        x_norm = np.clip(x_norm, -self.clip, self.clip)
+        return x_norm, x_stamp, y_stamp, x_mean, x_std
 
-        preds = self.generate(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose)
+    def _features(self, df, i):
+        """Validates the i-th frame of a batch and returns its price, volume and amount columns. Shape: [seq_len, 6]"""
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError(f"Input at index {i} is not a pandas DataFrame.")
+        if not all(col in df.columns for col in self.price_cols):
+            raise ValueError(f"DataFrame at index {i} is missing price columns {self.price_cols}.")
 
-        preds = preds.squeeze(0)
-        preds = preds * (x_std + 1e-5) + x_mean
+        df = df.copy()
+        if self.vol_col not in df.columns:
+            df[self.vol_col] = 0.0
+            df[self.amt_vol] = 0.0
+        if self.amt_vol not in df.columns and self.vol_col in df.columns:
+            df[self.amt_vol] = df[self.vol_col] * df[self.price_cols].mean(axis=1)
 
-        pred_df = pd.DataFrame(preds, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_timestamp)
-        return pred_df
+        if df[self.price_cols + [self.vol_col, self.amt_vol]].isnull().values.any():
+            raise ValueError(f"DataFrame at index {i} contains NaN values in price or volume columns.")
 
+        return df[self.price_cols + [self.vol_col, self.amt_vol]].values.astype(np.float32)
 
-    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True):
+    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True,
+                      adapter=None):
         """
-        Perform parallel (batch) prediction on multiple time series. All series must have the same historical length and prediction length (pred_len).
+        Perform parallel (batch) prediction on multiple time series.
+
+        Series may have different historical lengths and prediction lengths: shorter histories are left-padded
+        and masked out of attention, and every series is generated up to the longest horizon and truncated to
+        its own. Results match predicting each series on its own under the same sampling.
 
         Args:
             df_list (List[pd.DataFrame]): List of input DataFrames, each containing price columns and optional volume/amount columns.
             x_timestamp_list (List[pd.DatetimeIndex or Series]): List of timestamps corresponding to historical data, length should match the number of rows in each DataFrame.
-            y_timestamp_list (List[pd.DatetimeIndex or Series]): List of future prediction timestamps, length should equal pred_len.
-            pred_len (int): Number of prediction steps.
-            T (float): Sampling temperature.
-            top_k (int): Top-k filtering threshold.
-            top_p (float): Top-p (nucleus sampling) threshold.
+            y_timestamp_list (List[pd.DatetimeIndex or Series]): List of future prediction timestamps, length should equal the series' pred_len.
+            pred_len (int or List[int]): Number of prediction steps, shared or per series.
+            T (float or list of float): Sampling temperature, shared or per series.
+            top_k (int or list of int): Top-k filtering threshold, shared or per series.
+            top_p (float or list of float): Top-p (nucleus sampling) threshold, shared or per series.
             sample_count (int): Number of parallel samples per series, automatically averaged internally.
             verbose (bool): Whether to display autoregressive progress.
+            adapter (str or list, optional): LoRA adapter, shared or per series (None entries use the base model),
+                so series of different adapters run in one batch. Defaults to the predictor's current selection.
 
         Returns:
             List[pd.DataFrame]: List of prediction results in the same order as input, each DataFrame contains
@@ -585,78 +1613,327 @@ class KronosPredictor:
             raise ValueError("df_list, x_timestamp_list, y_timestamp_list must have consistent lengths.")
 
         num_series = len(df_list)
+        if isinstance(pred_len, (list, tuple)):
+            if len(pred_len) != num_series:
+                raise ValueError(f"pred_len list must have one entry per series, got {len(pred_len)} for {num_series} series.")
+            pred_lens = list(pred_len)
+        else:
+            pred_lens = [pred_len] * num_series
+
+        prepared = [
+            self._prepare_series(df_list[i], x_timestamp_list[i], y_timestamp_list[i], pred_lens[i], i)
+            for i in range(num_series)
+        ]
+        x_batch, x_stamp_batch, y_stamp_batch, padding_mask = self._pad_batch(prepared)
+        max_pred_len = max(pred_lens)
 
-        x_list = []
-        x_stamp_list = []
-        y_stamp_list = []
-        means = []
-        stds = []
-        seq_lens = []
-        y_lens = []
-
-        for i in range(num_series):
-            df = df_list[i]
-            if not isinstance(df, pd.DataFrame):
-                raise ValueError(f"Input at index {i} is not a pandas DataFrame.")
-            if not all(col in df.columns for col in self.price_cols):
-                raise ValueError(f"DataFrame at index {i} is missing price columns {self.price_cols}.")
-
-            df = df.copy()
-            if self.vol_col not in df.columns:
-                df[self.vol_col] = 0.0
-                df[self.amt_vol] = 0.0
-            if self.amt_vol not in df.columns and self.vol_col in df.columns:
-                df[self.amt_vol] = df[self.vol_col] * df[self.price_cols].mean(axis=1)
-
-            if df[self.price_cols + [self.vol_col, self.amt_vol]].isnull().values.any():
-                raise ValueError(f"DataFrame at index {i} contains NaN values in price or volume columns.")
-
-            x_timestamp = x_timestamp_list[i]
-            y_timestamp = y_timestamp_list[i]
-
-            x_time_df = calc_time_stamps(x_timestamp)
-            y_time_df = calc_time_stamps(y_timestamp)
-
-            x = df[self.price_cols + [self.vol_col, self.amt_vol]].values.astype(np.float32)
-            x_stamp = x_time_df.values.astype(np.float32)
-            y_stamp = y_time_df.values.astype(np.float32)
-
-            if x.shape[0] != x_stamp.shape[0]:
-                raise ValueError(f"Inconsistent lengths at index {i}: x has {x.shape[0]} vs x_stamp has {x_stamp.shape[0]}.")
-            if y_stamp.shape[0] != pred_len:
-                raise ValueError(f"y_timestamp length at index {i} should equal pred_len={pred_len}, got {y_stamp.shape[0]}.")
-
-            x_mean, x_std = np.mean(x, axis=0), np.std(x, axis=0)
-            x_norm = (x - x_mean) / (x_std + 1e-5)
-            x_norm = np.clip(x_norm, -self.clip, self.clip)
-
-            x_list.append(x_norm)
-            x_stamp_list.append(x_stamp)
-            y_stamp_list.append(y_stamp)
-            means.append(x_mean)
-            stds.append(x_std)
-
-            seq_lens.append(x_norm.shape[0])
-            y_lens.append(y_stamp.shape[0])
-
-        # Require all series to have consistent historical and prediction lengths for batch processing
-        if len(set(seq_lens)) != 1:
-            raise ValueError(f"Parallel prediction requires all series to have consistent historical lengths, got: {seq_lens}")
-        if len(set(y_lens)) != 1:
-            raise ValueError(f"Parallel prediction requires all series to have consistent prediction lengths, got: {y_lens}")
-
-        x_batch = np.stack(x_list, axis=0).astype(np.float32)           # (B, seq_len, feat)
-        x_stamp_batch = np.stack(x_stamp_list, axis=0).astype(np.float32) # (B, seq_len, time_feat)
-        y_stamp_batch = np.stack(y_stamp_list, axis=0).astype(np.float32) # (B, pred_len, time_feat)
-
-        preds = self.generate(x_batch, x_stamp_batch, y_stamp_batch, pred_len, T, top_k, top_p, sample_count, verbose)
-        # preds: (B, pred_len, feat)
+        if isinstance(adapter, (list, tuple)) and len(adapter) != num_series:
+            raise ValueError(f"adapter list must have one entry per series, got {len(adapter)} for {num_series} series.")
+        with self.use_adapter(adapter):
+            preds = self.generate(x_batch, x_stamp_batch, y_stamp_batch, max_pred_len, T, top_k, top_p, sample_count, verbose,
+                                  padding_mask, pred_lens if len(set(pred_lens)) > 1 else None)
+        # preds: (B, max_pred_len, feat)
 
         pred_dfs = []
-        for i in range(num_series):
-            preds_i = preds[i] * (stds[i] + 1e-5) + means[i]
+        for i, (_, _, _, x_mean, x_std) in enumerate(prepared):
+            preds_i = preds[i, :pred_lens[i]] * (x_std + 1e-5) + x_mean
             pred_df = pd.DataFrame(preds_i, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_timestamp_list[i])
             pred_dfs.append(pred_df)
 
         return pred_dfs
 
+    def _pad_batch(self, prepared):
+        """
+        Left-pads prepared series (see `_prepare_series`) to a common history length and right-pads their
+        future stamps to the longest horizon.
+
+        Returns:
+            tuple: (x_batch, x_stamp_batch, y_stamp_batch, padding_mask); padding_mask is True at padded history
+                   positions, or None when all histories have the same length.
+        """
+        seq_len = max(p[0].shape[0] for p in prepared)
+        max_pred_len = max(p[2].shape[0] for p in prepared)
+        num_series = len(prepared)
+
+        x_batch = np.zeros((num_series, seq_len, prepared[0][0].shape[1]), dtype=np.float32)           # (B, seq_len, feat)
+        x_stamp_batch = np.zeros((num_series, seq_len, prepared[0][1].shape[1]), dtype=np.float32)     # (B, seq_len, time_feat)
+        y_stamp_batch = np.zeros((num_series, max_pred_len, prepared[0][2].shape[1]), dtype=np.float32)  # (B, pred_len, time_feat)
+        padding_mask = np.zeros((num_series, seq_len), dtype=bool)
+
+        for i, (x_norm, x_stamp, y_stamp, _, _) in enumerate(prepared):
+            pad = seq_len - x_norm.shape[0]
+            x_batch[i, pad:] = x_norm
+            x_stamp_batch[i, pad:] = x_stamp
+            y_stamp_batch[i, :y_stamp.shape[0]] = y_stamp
+            padding_mask[i, :pad] = True
+
+        return x_batch, x_stamp_batch, y_stamp_batch, padding_mask if padding_mask.any() else None
+
+
+class KronosPredictor(BaseKronosPredictor):
+
+    def __init__(self, model, tokenizer, device=None, max_context=512, clip=5, use_cache=True, sliding_window=False, draft_model=None, draft_len=4,
+                 fold_embeddings=False, quantize=None, dtype=None, pack_weights=False, compile=False, compile_max_batch=16, early_exit=None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.draft_model = draft_model
+        self.draft_len = draft_len
+        # Acceptance statistics accumulated over all speculative calls; call `reset()` to start over.
+        self.speculative_stats = SpeculativeStats() if draft_model is not None else None
+        self.use_cache = use_cache
+        self.sliding_window = sliding_window
+
+        # Auto-detect device if not specified
+        if device is None:
+            if torch.cuda.is_available():
+                device = "cuda:0"
+            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+                device = "mps"
+            else:
+                device = "cpu"
+
+        super().__init__(max_context, clip, device)
+
+        # Casting, quantizing and moving happen in place; registry-owned modules are evicted first, so that
+        # later `load_pretrained` calls do not hand out the changed modules.
+        cast_dtype = getattr(torch, dtype) if isinstance(dtype, str) else dtype
+        for module, module_dtype in ((self.tokenizer, None), (self.model, cast_dtype), (self.draft_model, cast_dtype)):
+            if module is not None and (quantize is not None or _changed_by_to(module, self.device, module_dtype)):
+                release_module(module)
+        self.tokenizer = self.tokenizer.to(self.device)
+        self.model = self.model.to(self.device)
+        if self.draft_model is not None:
+            self.draft_model = self.draft_model.to(self.device)
+        if fold_embeddings:
+            # Opt-in: folds in place into non-persistent buffers, which go stale if the weights change afterwards.
+            self.model.fold_embeddings()
+            if self.draft_model is not None:
+                self.draft_model.fold_embeddings()
+        # Reduced-precision inference: Kronos weights, activations and KV caches are stored in `dtype`, and the
+        # tokenizer runs under autocast. RMSNorm statistics, rotary angles, the tokenizer's quantization
+        # projection and softmax/sampling stay in fp32.
+        self.dtype = getattr(torch, dtype) if isinstance(dtype, str) else dtype
+        if self.dtype is not None:
+            if self.dtype not in (torch.bfloat16, torch.float16):
+                raise ValueError(f"dtype must be bfloat16 or float16, got {dtype}.")
+            if quantize is not None:
+                raise ValueError("dtype and quantize are mutually exclusive.")
+            self.model = self.model.to(self.dtype)
+            if self.draft_model is not None:
+                self.draft_model = self.draft_model.to(self.dtype)
+        if quantize is not None:
+            # Dynamic INT8 quantization, CPU only; see model.quantization.quantize.
+            if torch.device(self.device).type != "cpu":
+                raise ValueError(f"quantize='{quantize}' requires device='cpu', got '{self.device}'.")
+            quantize_modules(self.model, self.tokenizer, mode=quantize)
+            if self.draft_model is not None:
+                quantize_modules(self.draft_model, mode=quantize)
+        if pack_weights and quantize is None:
+            # Opt-in fused QKV and w1/w3 GEMMs. Packing re-points the parameters of the passed-in modules into the
+            # packed tensors; it runs after the dtype cast so parameters and packed tensors share memory.
+            for module in (self.tokenizer, self.model, self.draft_model):
+                if module is not None:
+                    module.pack_weights()
+        # Compiled execution (see model.graphs): decode steps of up to `compile_max_batch` rows and a full-context
+        # prefill are compiled here, other sizes on first use. Stays eager if torch.compile is unavailable.
+        self.compiled = False
+        if compile:
+            if quantize is not None:
+                raise ValueError("compile and quantize are mutually exclusive.")
+            warmup_tokens = [n for n in DEFAULT_BUCKETS if n <= token_bucket(compile_max_batch)] + [max_context]
+            models = [m for m in (self.model, self.draft_model) if m is not None]
+            try:
+                with self._autocast():
+                    graphs = [m.compile_graphs(warmup_tokens=warmup_tokens) for m in models]
+                self.compiled = all(g.compiled for g in graphs)
+            except RuntimeError as exc:
+                warnings.warn(f"Compiled execution unavailable, running eagerly: {exc}")
+                for m in models:
+                    m.release_graphs()
+        # Early exit on the model's exit heads (see Kronos.enable_early_exit); statistics in `early_exit_stats`.
+        self.early_exit_stats = None
+        if early_exit is not None:
+            self.model.enable_early_exit(early_exit)
+            self.early_exit_stats = self.model.exit_stats
+
+    def _autocast(self):
+        return torch.autocast(device_type=torch.device(self.device).type, dtype=self.dtype, enabled=self.dtype is not None)
+
+    def load_adapter(self, path, name=None):
+        """Loads a LoRA adapter saved with `Kronos.save_adapter` into the shared base model; returns its name."""
+        return self.model.load_adapter(path, name)
+
+    def set_adapter(self, adapter):
+        """Selects the adapter used by default (see `Kronos.set_adapter`); None for the base model."""
+        self.model.set_adapter(adapter)
+
+    @contextmanager
+    def use_adapter(self, adapter):
+        """Selects `adapter` for the duration of a call; None keeps the current selection."""
+        if adapter is None:
+            yield
+            return
+        previous = self.model.active_adapter
+        self.model.set_adapter(adapter)
+        try:
+            yield
+        finally:
+            self.model.set_adapter(previous)
+
+    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, padding_mask=None, pred_lens=None):
+
+        x_tensor = torch.from_numpy(np.array(x).astype(np.float32)).to(self.device)
+        x_stamp_tensor = torch.from_numpy(np.array(x_stamp).astype(np.float32)).to(self.device)
+        y_stamp_tensor = torch.from_numpy(np.array(y_stamp).astype(np.float32)).to(self.device)
+        mask_tensor = torch.from_numpy(np.asarray(padding_mask)).to(self.device) if padding_mask is not None else None
+        # Per-series sampling parameters (one value per row of x) are passed on as tensors.
+        T, top_k, top_p = (v if np.isscalar(v) else torch.as_tensor(v, device=self.device) for v in (T, top_k, top_p))
+
+        with self._autocast():
+            preds = auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
+                                              self.clip, T, top_k, top_p, sample_count, verbose, self.use_cache, self.sliding_window,
+                                              mask_tensor, pred_lens, self.draft_model, self.draft_len, self.speculative_stats)
+        preds = preds[:, -pred_len:, :]
+        return preds
+
+    def predict_stream(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, chunk_size=1, verbose=False):
+        """
+        Generator version of `predict` that yields forecast candles as soon as they are generated.
+
+        Args:
+            df (pd.DataFrame): Input DataFrame with price columns and optional volume/amount columns.
+            x_timestamp (pd.DatetimeIndex or Series): Timestamps of the historical data.
+            y_timestamp (pd.DatetimeIndex or Series): Timestamps to forecast, of length pred_len.
+            pred_len (int): Number of prediction steps.
+            T (float): Sampling temperature.
+            top_k (int): Top-k filtering threshold.
+            top_p (float): Top-p (nucleus sampling) threshold.
+            sample_count (int): Number of parallel samples, averaged per step.
+            chunk_size (int): Number of candles per yielded DataFrame.
+            verbose (bool): Whether to display autoregressive progress.
+
+        Yields:
+            pd.DataFrame: Up to `chunk_size` de-normalized candles (`open, high, low, close, volume, amount`),
+                          indexed by the corresponding entries of `y_timestamp`.
+        """
+        x, x_stamp, y_stamp, x_mean, x_std = self._prepare_series(df, x_timestamp, y_timestamp, pred_len, 0)
+
+        x_tensor = torch.from_numpy(x[np.newaxis, :]).to(self.device)
+        x_stamp_tensor = torch.from_numpy(x_stamp[np.newaxis, :]).to(self.device)
+        y_stamp_tensor = torch.from_numpy(y_stamp[np.newaxis, :]).to(self.device)
+
+        y_index = pd.Index(y_timestamp)
+        chunks = stream_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
+                                  self.clip, T, top_k, top_p, sample_count, chunk_size, verbose, self.use_cache, self.sliding_window,
+                                  self.draft_model, self.draft_len, self.speculative_stats)
+        while True:
+            # Autocast is thread-local state, so it is only entered while the generator runs, never across a yield.
+            with self._autocast():
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            start, preds = chunk
+            preds = preds[0] * (x_std + 1e-5) + x_mean
+            yield pd.DataFrame(preds, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_index[start:start + preds.shape[0]])
+
+    def predict_monte_carlo(self, df, x_timestamp, y_timestamp, pred_len, n_paths=1000, chunk_size=100, quantiles=(0.05, 0.5, 0.95),
+                            return_paths=False, T=1.0, top_k=0, top_p=0.9, verbose=False):
+        """
+        Monte Carlo forecast of a single series. See `predict_monte_carlo_batch`.
+
+        Returns:
+            dict: 'mean', 'std' and 'quantiles' ({quantile: pd.DataFrame}) indexed by `y_timestamp`, and
+                  'paths' (np.ndarray of shape [n_paths, pred_len, 6], or None).
+        """
+        return self.predict_monte_carlo_batch([df], [x_timestamp], [y_timestamp], pred_len, n_paths, chunk_size, 1, quantiles,
+                                              return_paths, T, top_k, top_p, verbose)[0]
+
+    def predict_monte_carlo_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, n_paths=1000, chunk_size=100, series_batch_size=32,
+                                  quantiles=(0.05, 0.5, 0.95), return_paths=False, T=1.0, top_k=0, top_p=0.9, verbose=False):
+        """
+        Monte Carlo forecast of many series with streaming, on-device path statistics.
+
+        Series are processed `series_batch_size` at a time and paths `chunk_size` per series at a time, so
+        memory is bounded by `series_batch_size * chunk_size` sampling streams regardless of `n_paths`.
+        Histories of different lengths are left-padded and masked as in `predict_batch`.
+
+        Args:
+            df_list (List[pd.DataFrame]): Input DataFrames, as in `predict_batch`.
+            x_timestamp_list (List[pd.DatetimeIndex or Series]): Historical timestamps per series.
+            y_timestamp_list (List[pd.DatetimeIndex or Series]): Future timestamps per series, of length pred_len.
+            pred_len (int): Number of prediction steps.
+            n_paths (int): Number of sampled paths per series.
+            chunk_size (int): Number of paths per series sampled in one pass.
+            series_batch_size (int): Number of series processed together.
+            quantiles (Sequence[float]): Quantile levels to estimate.
+            return_paths (bool): Whether to also return every de-normalized path as a NumPy array.
+            T (float): Sampling temperature.
+            top_k (int): Top-k filtering threshold.
+            top_p (float): Top-p (nucleus sampling) threshold.
+            verbose (bool): Whether to display autoregressive progress.
+
+        Returns:
+            List[dict]: Per series, 'mean', 'std' and 'quantiles' ({quantile: pd.DataFrame}) indexed by
+                        `y_timestamp`, and 'paths' (np.ndarray of shape [n_paths, pred_len, 6], or None).
+        """
+        if not (len(df_list) == len(x_timestamp_list) == len(y_timestamp_list)):
+            raise ValueError("df_list, x_timestamp_list, y_timestamp_list must have consistent lengths.")
+
+        columns = self.price_cols + [self.vol_col, self.amt_vol]
+        results = []
+        for batch_start in range(0, len(df_list), series_batch_size):
+            prepared = [
+                self._prepare_series(df_list[i], x_timestamp_list[i], y_timestamp_list[i], pred_len, i)
+                for i in range(batch_start, min(batch_start + series_batch_size, len(df_list)))
+            ]
+            x_batch, x_stamp_batch, y_stamp_batch, padding_mask = self._pad_batch(prepared)
+            x_tensor = torch.from_numpy(x_batch).to(self.device)
+            x_stamp_tensor = torch.from_numpy(x_stamp_batch).to(self.device)
+            y_stamp_tensor = torch.from_numpy(y_stamp_batch).to(self.device)
+            mask_tensor = torch.from_numpy(padding_mask).to(self.device) if padding_mask is not None else None
+
+            with self._autocast():
+                stats = monte_carlo_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
+                                              n_paths, chunk_size, self.clip, T, top_k, top_p, quantiles, return_paths=return_paths,
+                                              verbose=verbose, use_cache=self.use_cache, sliding_window=self.sliding_window,
+                                              padding_mask=mask_tensor)
+
+            for j, (_, _, _, x_mean, x_std) in enumerate(prepared):
+                scale = x_std + 1e-5
+                index = y_timestamp_list[batch_start + j]
+                paths = stats['paths']
+                results.append({
+                    'mean': pd.DataFrame(stats['mean'][j] * scale + x_mean, columns=columns, index=index),
+                    'std': pd.DataFrame(stats['std'][j] * scale, columns=columns, index=index),
+                    'quantiles': {q: pd.DataFrame(v[j] * scale + x_mean, columns=columns, index=index) for q, v in stats['quantiles'].items()},
+                    'paths': paths[j] * scale + x_mean if paths is not None else None,
+                })
+
+        return results
+
+
+class OnnxKronosPredictor(BaseKronosPredictor):
+    """
+    Predictor backed by graphs exported with `model.onnx_export.export_onnx`, run by onnxruntime on the CPU
+    (see `model.onnx_runtime.OnnxKronosRuntime`). `predict` and `predict_batch` behave as with `KronosPredictor`;
+    streaming, Monte Carlo prediction and LoRA adapters are only available on the torch backend.
+
+    Args:
+        onnx_dir (str): Directory holding the exported graphs.
+        max_context (int, optional): Defaults to the `max_context` the graphs were exported for.
+        clip (float, optional): Clipping of normalized inputs. Defaults to 5.
+        num_threads (int, optional): onnxruntime intra-op threads. Defaults to onnxruntime's choice.
+        seed (int, optional): Seed of the sampling generator. Defaults to None.
+    """
+
+    def __init__(self, onnx_dir, max_context=None, clip=5, num_threads=None, seed=None):
+        self.runtime = OnnxKronosRuntime(onnx_dir, num_threads=num_threads, seed=seed)
+        exported_context = self.runtime.config["max_context"]
+        if max_context is not None and max_context > exported_context:
+            raise ValueError(f"max_context={max_context} exceeds the {exported_context} positions the graphs were exported for.")
+        super().__init__(max_context or exported_context, clip, "cpu")
+
+    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, padding_mask=None, pred_lens=None):
+        preds = self.runtime.generate(np.asarray(x), np.asarray(x_stamp), np.asarray(y_stamp), self.max_context, pred_len, self.clip,
+                                      T, top_k, top_p, sample_count, padding_mask, pred_lens)
+        return preds[:, -pred_len:, :]
@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 from einops import rearrange, reduce
 import torch
 import torch.nn as nn
@@ -268,6 +269,128 @@ class RMSNorm(torch.nn.Module):
         return output * self.weight
 
 
+# Linear layers of each TransformerBlock that can carry low-rank adapters (see `LoRALinear`).
+LORA_TARGETS = ("q_proj", "k_proj", "v_proj", "out_proj", "w1", "w2", "w3")
+
+
+class LoRALinear(nn.Linear):
+    """
+    `nn.Linear` with named low-rank adapters: y = x W^T + b + (alpha / rank) * dropout(x) A^T B^T for the active one.
+
+    The base `weight`/`bias` keep their state dict keys; adapters live under `lora_A.<name>` and `lora_B.<name>`.
+    `active_adapter` is None (base weights only), an adapter name, or a (names, rows) pair that picks an adapter
+    per batch row: rows[i] indexes `names` (-1 = base weights) and is reused for consecutive rows when the
+    batch is a multiple of len(rows), as when series are expanded series-major into sampling streams.
+    """
+
+    def __init__(self, in_features, out_features, bias=True, device=None, dtype=None):
+        super().__init__(in_features, out_features, bias, device, dtype)
+        self.lora_A = nn.ParameterDict()
+        self.lora_B = nn.ParameterDict()
+        self.lora_scaling = {}
+        self.lora_dropout = {}
+        self.active_adapter = None
+
+    @classmethod
+    def from_linear(cls, linear):
+        """Wraps an existing `nn.Linear`, sharing (not copying) its parameters."""
+        lora = cls(linear.in_features, linear.out_features, bias=linear.bias is not None, device="meta")
+        lora.weight = linear.weight
+        lora.bias = linear.bias
+        lora.train(linear.training)
+        return lora
+
+    def add_adapter(self, name, rank, alpha, dropout=0.0):
+        weight = self.weight
+        lora_A = torch.empty(rank, self.in_features, device=weight.device, dtype=weight.dtype)
+        nn.init.kaiming_uniform_(lora_A, a=math.sqrt(5))
+        # B starts at zero, so a new adapter leaves the layer unchanged.
+        self.lora_A[name] = nn.Parameter(lora_A)
+        self.lora_B[name] = nn.Parameter(torch.zeros(self.out_features, rank, device=weight.device, dtype=weight.dtype))
+        self.lora_scaling[name] = alpha / rank
+        self.lora_dropout[name] = dropout
+
+    def remove_adapter(self, name):
+        del self.lora_A[name], self.lora_B[name], self.lora_scaling[name], self.lora_dropout[name]
+
+    def _delta(self, x, name):
+        x = F.dropout(x, self.lora_dropout[name], self.training)
+        return F.linear(F.linear(x, self.lora_A[name]), self.lora_B[name]) * self.lora_scaling[name]
+
+    def lora_delta(self, x):
+        """Output of the active adapter(s) for input x, or None if there is none."""
+        active = self.active_adapter
+        if active is None:
+            return None
+        if isinstance(active, str):
+            return self._delta(x, active)
+
+        names, rows = active
+        if x.size(0) != rows.numel():
+            if x.size(0) % rows.numel():
+                raise ValueError(f"Per-row adapters were set for {rows.numel()} rows, got a batch of {x.size(0)}.")
+            rows = rows.repeat_interleave(x.size(0) // rows.numel())
+        delta = x.new_zeros(*x.shape[:-1], self.out_features)
+        for i, name in enumerate(names):
+            selected = (rows == i).nonzero(as_tuple=True)[0]
+            if selected.numel() and name in self.lora_A:
+                delta.index_copy_(0, selected, self._delta(x[selected], name))
+        return delta
+
+    def forward(self, x):
+        return with_lora(super().forward(x), self, x)
+
+
+def with_lora(out, linear, x):
+    """Adds the active adapter output of `linear` (if it is a `LoRALinear`) for input x to `out`."""
+    if isinstance(linear, LoRALinear):
+        delta = linear.lora_delta(x)
+        if delta is not None:
+            return out + delta
+    return out
+
+
+def pack_linears(*linears):
+    """
+    Concatenates the weights (and biases) of linear layers that share their input, so that they can run as
+    one GEMM. Each layer's parameters are re-pointed at their slice of the packed tensors: packing costs no
+    extra memory, state dict keys are unchanged, and loading a checkpoint afterwards updates the packed
+    tensors in place. Moving or casting the module afterwards copies parameters and packed tensors
+    separately (with equal values); pack again to share them.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor]: Packed weight [sum(out_features), in_features] and bias, or None without bias.
+    """
+    weight = torch.cat([linear.weight.detach() for linear in linears])
+    bias = torch.cat([linear.bias.detach() for linear in linears]) if linears[0].bias is not None else None
+    start = 0
+    for linear in linears:
+        end = start + linear.out_features
+        linear.weight = nn.Parameter(weight[start:end], requires_grad=linear.weight.requires_grad)
+        if bias is not None:
+            linear.bias = nn.Parameter(bias[start:end], requires_grad=linear.bias.requires_grad)
+        start = end
+    return weight, bias
+
+
+def is_packed(packed_weight, first_linear):
+    """Whether `first_linear` is still a view into `packed_weight`, i.e. packing again would be a no-op copy."""
+    return packed_weight is not None and first_linear.weight.data_ptr() == packed_weight.data_ptr()
+
+
+def pack_weights(module):
+    """Packs the projections of every attention and feed-forward layer in `module` (see `pack_linears`)."""
+    for m in module.modules():
+        if isinstance(m, (MultiHeadAttentionWithRoPE, MultiHeadCrossAttentionWithRoPE, FeedForward)):
+            m.pack()
+
+
+def unpack_weights(module):
+    for m in module.modules():
+        if isinstance(m, (MultiHeadAttentionWithRoPE, MultiHeadCrossAttentionWithRoPE, FeedForward)):
+            m.unpack()
+
+
 class FeedForward(nn.Module):
     def __init__(self, d_model, ff_dim, ffn_dropout_p=0.0):
         super().__init__()
@@ -276,44 +399,753 @@ class FeedForward(nn.Module):
         self.w3 = nn.Linear(d_model, ff_dim, bias=False)
         self.w2 = nn.Linear(ff_dim, d_model, bias=False)
         self.ffn_dropout = nn.Dropout(ffn_dropout_p)
+        self.register_buffer("w13_weight", None, persistent=False)
+
+    def pack(self):
+        """Packs `w1` and `w3` into one projection used in eval mode (see `pack_linears`)."""
+        if not is_packed(self.w13_weight, self.w1):
+            self.w13_weight, _ = pack_linears(self.w1, self.w3)
+
+    def unpack(self):
+        self.w13_weight = None
 
     def forward(self, x):
+        if self.w13_weight is not None and not self.training:
+            gate, up = F.linear(x, self.w13_weight).chunk(2, dim=-1)
+            gate, up = with_lora(gate, self.w1, x), with_lora(up, self.w3, x)
+            return self.ffn_dropout(self.w2(F.silu(gate) * up))
         return self.ffn_dropout(self.w2(F.silu(self.w1(x)) * self.w3(x)))
 
 
 class RotaryPositionalEmbedding(nn.Module):
-    def __init__(self, dim):
+    """
+    Rotary positional embedding backed by a cos/sin table precomputed for `max_len` positions.
+
+    A single instance can be shared by every attention layer with the same head dimension (see
+    `Kronos`/`KronosTokenizer`), so the table is built once per model rather than per layer and step.
+    Positions are sliced from the table by offset, which is how KV-cached decoding addresses them.
+    The table grows on demand if a longer range is requested.
+
+    Args:
+        dim (int): Head dimension.
+        max_len (int, optional): Number of positions to precompute. Defaults to 512.
+    """
+
+    def __init__(self, dim, max_len=512):
         super().__init__()
-        inv_freq = 1.0 / (10000 ** (torch.arange(0, dim, 2).float() / dim))
-        self.register_buffer("inv_freq", inv_freq)
-        self.seq_len_cached = None
-        self.cos_cached = None
-        self.sin_cached = None
-
-    def _update_cos_sin_cache(self, x, seq_len):
-        if seq_len != self.seq_len_cached:
-            self.seq_len_cached = seq_len
-            t = torch.arange(seq_len, device=x.device).type_as(self.inv_freq)
-            freqs = torch.einsum('i,j->ij', t, self.inv_freq)
-            emb = torch.cat((freqs, freqs), dim=-1).to(x.device)
-            self.cos_cached = emb.cos()[None, None, :, :]
-            self.sin_cached = emb.sin()[None, None, :, :]
-        return self.cos_cached, self.sin_cached
-
-    def forward(self, q, k):
-        cos, sin = self._update_cos_sin_cache(q, q.shape[-2])
-        return (
-            (q * cos) + (self._rotate_half(q) * sin),
-            (k * cos) + (self._rotate_half(k) * sin),
-        )
+        self.dim = dim
+        self.register_buffer("inv_freq", self._inv_freq(dim))
+        self._build_table(max_len)
+
+    @staticmethod
+    def _inv_freq(dim, device=None):
+        return 1.0 / (10000 ** (torch.arange(0, dim, 2, device=device).float() / dim))
+
+    def _apply(self, fn, *args, **kwargs):
+        super()._apply(fn, *args, **kwargs)
+        if self.inv_freq.dtype != torch.float32:
+            # Rotary angles need fp32 even when the model is cast to a reduced dtype; recompute them rather than
+            # upcasting the rounded buffers. The table is cast to the activation dtype per call.
+            self.inv_freq = self._inv_freq(self.dim, self.inv_freq.device)
+            self._build_table(self.max_len)
+        return self
+
+    def _build_table(self, max_len):
+        self.max_len = max_len
+        t = torch.arange(max_len, device=self.inv_freq.device).type_as(self.inv_freq)
+        cos, sin = self._cos_sin(torch.outer(t, self.inv_freq))
+        # Derived from inv_freq, so kept out of the state dict.
+        self.register_buffer("cos_table", cos[None, None], persistent=False)
+        self.register_buffer("sin_table", sin[None, None], persistent=False)
+
+    @staticmethod
+    def _cos_sin(freqs):
+        # sin carries the sign of `rotate_half`, so that rotate_half(x) * sin == swap_halves(x) * sin_table.
+        cos, sin = freqs.cos(), freqs.sin()
+        return torch.cat((cos, cos), dim=-1), torch.cat((-sin, sin), dim=-1)
+
+    def _rotate(self, x, cos, sin):
+        half = x.size(-1) // 2
+        swapped = x.unflatten(-1, (2, half)).flip(-2).flatten(-2)
+        return (x * cos).addcmul_(swapped, sin)
+
+    def forward(self, q, k, offset=0):
+        if torch.is_tensor(offset):
+            # One position per batch row (see `SlotKVCache`); angles are computed like the table's, without slicing it.
+            t = (offset[:, None] + torch.arange(q.shape[-2], device=offset.device)).type_as(self.inv_freq)
+            cos, sin = self._cos_sin(t[..., None] * self.inv_freq)
+            cos, sin = cos[:, None].to(q.dtype), sin[:, None].to(q.dtype)
+            return self._rotate(q, cos, sin), self._rotate(k, cos, sin)
+        end = offset + q.shape[-2]
+        if end > self.max_len:
+            self._build_table(max(end, 2 * self.max_len))
+        cos = self.cos_table[:, :, offset:end].to(q.dtype)
+        sin = self.sin_table[:, :, offset:end].to(q.dtype)
+        return self._rotate(q, cos, sin), self._rotate(k, cos, sin)
+
+    def shift(self, x, delta):
+        """Rotates `x`, already embedded at some positions, by a further `delta` positions."""
+        cos, sin = self._cos_sin(delta * self.inv_freq)
+        return self._rotate(x, cos.to(x.dtype), sin.to(x.dtype))
+
+
+def shared_rotary(rotary, head_dim):
+    """
+    Returns `rotary` if it can serve attention heads of size `head_dim`, else a new private table.
+
+    Sharing keeps checkpoint keys unchanged: the shared module (and its `inv_freq`) is still registered
+    under every layer that uses it.
+    """
+    if rotary is not None and rotary.dim == head_dim:
+        return rotary
+    return RotaryPositionalEmbedding(head_dim)
+
+
+def build_attention_mask(key_padding_mask, q_len, causal=True):
+    """
+    Builds a boolean `scaled_dot_product_attention` mask (True = attend) from a key padding mask.
+
+    The mask is only broadcast over heads, never expanded to [batch_size, n_heads, q_len, k_len]. The
+    queries are taken to be the last `q_len` key positions; a padded query may attend to itself so that
+    no row is fully masked (which would produce NaNs).
+
+    Args:
+        key_padding_mask (torch.Tensor): True (or 1) at padded key positions. Shape: [batch_size, k_len]
+        q_len (int): Number of queries.
+        causal (bool, optional): Whether to also apply causal masking. Defaults to True.
+
+    Returns:
+        torch.Tensor: Shape [batch_size, 1, 1, k_len] if not causal, else [batch_size, 1, q_len, k_len].
+    """
+    keep = ~key_padding_mask.bool()[:, None, None, :]
+    if not causal:
+        return keep
+    k_len = key_padding_mask.size(-1)
+    k_pos = torch.arange(k_len, device=key_padding_mask.device)
+    q_pos = k_pos[k_len - q_len:, None]
+    return (keep & (k_pos <= q_pos)) | (k_pos == q_pos)
+
+
+class KVCache:
+    """
+    Key/value cache of a single self-attention layer for incremental decoding.
+
+    Keys are stored after the rotary embedding has been applied, so cached positions never have to be
+    recomputed when new tokens are appended. Storage is allocated lazily on the first update.
+
+    With `sliding=True` the cache is a ring buffer: once `max_len` positions are held, each new token
+    overwrites the oldest one in place. Because RoPE attention only depends on relative positions, the
+    slot order does not matter for single-token steps, and the rotary positions can be re-based (see
+    `rebase`) to keep them bounded over arbitrarily long generations.
+
+    A key padding mask is only stored once some update carries padded positions (e.g. a left-padded
+    prefill); afterwards `key_padding_mask` covers every cached slot.
+
+    Args:
+        max_len (int): Maximum number of positions the cache can hold.
+        sliding (bool, optional): Whether to evict the oldest positions instead of overflowing. Defaults to False.
+    """
+
+    def __init__(self, max_len, sliding=False):
+        self.max_len = max_len
+        self.sliding = sliding
+        self.seq_len = 0  # Number of valid cached positions
+        self.offset = 0  # Rotary position of the next token
+        self.k = None
+        self.v = None
+        self.padding = None  # [batch_size, max_len], True at padded slots
+        self._next_slot = 0
+
+    def reset(self):
+        self.seq_len = 0
+        self.offset = 0
+        self.padding = None
+        self._next_slot = 0
+
+    @property
+    def is_full(self):
+        return self.seq_len == self.max_len
+
+    @property
+    def key_padding_mask(self):
+        """Padding mask of the cached positions ([batch_size, seq_len]), or None if nothing is padded."""
+        return None if self.padding is None else self.padding[:, :self.seq_len]
+
+    def update(self, k, v, key_padding_mask=None):
+        """
+        Appends new keys/values and returns all cached ones.
+
+        Args:
+            k (torch.Tensor): New keys. Shape: [batch_size, n_heads, q_len, head_dim]
+            v (torch.Tensor): New values. Shape: [batch_size, n_heads, q_len, head_dim]
+            key_padding_mask (torch.Tensor, optional): True at padded new positions. Shape: [batch_size, q_len]
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Cached keys and values. Shape: [batch_size, n_heads, seq_len, head_dim]
+        """
+        batch_size, n_heads, q_len, head_dim = k.shape
+        if self.k is None or self.k.shape[0] != batch_size or self.k.dtype != k.dtype or self.k.device != k.device:
+            self.k = k.new_empty(batch_size, n_heads, self.max_len, head_dim)
+            self.v = v.new_empty(batch_size, n_heads, self.max_len, head_dim)
+        if key_padding_mask is not None and self.padding is None:
+            self.padding = torch.zeros(batch_size, self.max_len, dtype=torch.bool, device=k.device)
+
+        if self.sliding and q_len == 1:
+            slots = slice(self._next_slot, self._next_slot + 1)
+            self._next_slot = (self._next_slot + 1) % self.max_len
+            self.seq_len = min(self.seq_len + 1, self.max_len)
+        else:
+            end = self.seq_len + q_len
+            if end > self.max_len:
+                raise ValueError(f"KVCache overflow: {end} positions exceed max_len={self.max_len}.")
+            slots = slice(self.seq_len, end)
+            self.seq_len = end
+            self._next_slot = end % self.max_len
+
+        self.k[:, :, slots] = k
+        self.v[:, :, slots] = v
+        if self.padding is not None:
+            self.padding[:, slots] = key_padding_mask.bool() if key_padding_mask is not None else False
+
+        self.offset += q_len
+        return self.k[:, :, :self.seq_len], self.v[:, :, :self.seq_len]
+
+    def fork(self, n):
+        """
+        Replicates every cached sequence `n` times, consecutively along the batch dimension.
+
+        Used to branch one prefilled context into `n` independent sampling streams.
+        """
+        if self.k is not None:
+            self.k = self.k.repeat_interleave(n, dim=0)
+            self.v = self.v.repeat_interleave(n, dim=0)
+        if self.padding is not None:
+            self.padding = self.padding.repeat_interleave(n, dim=0)
 
-    def _rotate_half(self, x):
-        x1, x2 = x.chunk(2, dim=-1)
-        return torch.cat((-x2, x1), dim=-1)
+    def truncate(self, seq_len):
+        """
+        Drops every cached position from `seq_len` on, e.g. to roll back rejected speculative tokens.
+
+        Only supported for non-sliding caches, whose slots are still in chronological order.
+        """
+        if self.sliding:
+            raise ValueError("Sliding KV caches cannot be truncated.")
+        if seq_len < self.seq_len:
+            self.offset -= self.seq_len - seq_len
+            self.seq_len = seq_len
+            self._next_slot = seq_len % self.max_len
+
+    def rebase(self, rotary):
+        """
+        Shifts the rotary positions of all cached keys so that the oldest one sits at position 0.
+
+        Args:
+            rotary (RotaryPositionalEmbedding): The rotary embedding the keys were encoded with.
+        """
+        shift = self.offset - self.seq_len
+        if shift > 0 and self.k is not None:
+            self.k = rotary.shift(self.k, -shift)
+            self.offset -= shift
+
+
+class SlotKVCache:
+    """
+    Key/value cache of a single self-attention layer whose batch rows are independent sequences, for
+    continuous batching (see `model.scheduler.ContinuousBatchScheduler`): every row has its own length and
+    rotary position, rows are appended from a prefilled `KVCache` with `append` and retired with `move_rows`
+    between decode steps, without touching the other rows.
+
+    Each row is a ring of `max_len` slots: position p is stored in slot p % max_len, so a row that outgrows
+    `max_len` attends to its latest `max_len` positions, like a sliding `KVCache`. Only single-token updates
+    are supported, for which the slot order does not matter.
+
+    Args:
+        max_len (int): Maximum number of positions each row can attend to.
+    """
+
+    sliding = False  # Rows wrap on their own; rotary positions are never re-based.
+
+    def __init__(self, max_len):
+        self.max_len = max_len
+        self.n_rows = 0
+        self.seq_len = 0  # Number of leading slots in use by at least one row
+        self.k = None
+        self.v = None
+        self.padding = None  # [row_capacity, max_len], True at unused slots
+        self.positions = None  # [row_capacity], rotary position of every row's next token
+
+    @property
+    def offset(self):
+        return self.positions[:self.n_rows]
+
+    @property
+    def key_padding_mask(self):
+        return self.padding[:self.n_rows, :self.seq_len]
+
+    def _reserve(self, n_rows, like):
+        capacity = 0 if self.k is None else self.k.size(0)
+        if n_rows <= capacity:
+            return
+        capacity = max(n_rows, 2 * capacity)
+        k = like.new_empty(capacity, like.size(1), self.max_len, like.size(3))
+        v = torch.empty_like(k)
+        padding = torch.ones(capacity, self.max_len, dtype=torch.bool, device=like.device)
+        positions = torch.zeros(capacity, dtype=torch.long, device=like.device)
+        if self.k is not None:
+            k[:self.n_rows], v[:self.n_rows] = self.k[:self.n_rows], self.v[:self.n_rows]
+            padding[:self.n_rows], positions[:self.n_rows] = self.padding[:self.n_rows], self.positions[:self.n_rows]
+        self.k, self.v, self.padding, self.positions = k, v, padding, positions
+
+    def append(self, cache, repeats=None):
+        """
+        Appends every row of a prefilled, non-sliding `KVCache` as new rows, optionally repeating row i
+        `repeats[i]` times (one row per sampling stream).
+
+        Args:
+            cache (KVCache): Prefilled cache of at most `max_len` positions.
+            repeats (torch.Tensor, optional): Copies of each row. Shape: [cache_batch_size]. Defaults to one each.
+        """
+        k, v, padding = cache.k[:, :, :cache.seq_len], cache.v[:, :, :cache.seq_len], cache.key_padding_mask
+        if repeats is not None:
+            k, v = k.repeat_interleave(repeats, dim=0), v.repeat_interleave(repeats, dim=0)
+            padding = padding.repeat_interleave(repeats, dim=0) if padding is not None else None
+        start, end = self.n_rows, self.n_rows + k.size(0)
+        self._reserve(end, k)
+        self.k[start:end, :, :cache.seq_len] = k
+        self.v[start:end, :, :cache.seq_len] = v
+        self.padding[start:end] = True
+        self.padding[start:end, :cache.seq_len] = padding if padding is not None else False
+        self.positions[start:end] = cache.offset
+        self.n_rows = end
+        self.seq_len = max(self.seq_len, cache.seq_len)
+
+    def update(self, k, v, key_padding_mask=None):
+        """
+        Appends one new position to every row and returns the keys/values of all used slots.
+
+        Args:
+            k (torch.Tensor): New keys. Shape: [n_rows, n_heads, 1, head_dim]
+            v (torch.Tensor): New values. Shape: [n_rows, n_heads, 1, head_dim]
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Keys and values; unused slots are masked by `key_padding_mask`.
+                Shape: [n_rows, n_heads, seq_len, head_dim]
+        """
+        if k.size(2) != 1 or key_padding_mask is not None:
+            raise ValueError("SlotKVCache only supports unpadded single-token updates; prefill into a KVCache and append it.")
+        rows = torch.arange(self.n_rows, device=k.device)
+        slots = self.positions[:self.n_rows] % self.max_len
+        self.k[rows, :, slots] = k[:, :, 0]
+        self.v[rows, :, slots] = v[:, :, 0]
+        self.padding[rows, slots] = False
+        self.positions[:self.n_rows] += 1
+        self.seq_len = min(self.seq_len + 1, self.max_len)
+        return self.k[:self.n_rows, :, :self.seq_len], self.v[:self.n_rows, :, :self.seq_len]
+
+    def move_rows(self, src, dst, n_rows):
+        """
+        Copies rows `src` to rows `dst` and keeps the first `n_rows` rows, e.g. to fill the rows of retired
+        sequences with the last active ones.
+
+        Args:
+            src, dst (torch.Tensor): Row indices. Shape: [n_moved]
+            n_rows (int): Number of rows kept.
+        """
+        if len(src):
+            for name in ("k", "v", "padding", "positions"):
+                buffer = getattr(self, name)
+                buffer[dst] = buffer[src]
+        self.n_rows = n_rows
+        if n_rows == 0:
+            self.seq_len = 0
+        else:
+            self.seq_len = min(int(self.positions[:n_rows].max()), self.max_len)
+
+
+class SlotKVCacheSet:
+    """
+    One `SlotKVCache` per self-attention layer plus a dense per-position context of width `context_dim` in
+    the same slot layout: the unpaged counterpart of `PagedKVCache`, with the same interface.
+
+    Args:
+        n_layers (int): Number of self-attention layers.
+        max_len (int): Maximum number of positions each row can attend to.
+        context_dim (int, optional): Width of the per-position context. Defaults to None (none).
+    """
+
+    def __init__(self, n_layers, max_len, context_dim=None):
+        self.max_len = max_len
+        self.context_dim = context_dim
+        self.layers = [SlotKVCache(max_len) for _ in range(n_layers)]
+        self.context_buffer = None  # [row_capacity, max_len, context_dim]
+
+    @property
+    def n_rows(self):
+        return self.layers[0].n_rows
+
+    @property
+    def seq_len(self):
+        return self.layers[0].seq_len
+
+    @property
+    def key_padding_mask(self):
+        return self.layers[0].key_padding_mask
+
+    def memory_stats(self):
+        """Byte counts of the preallocated rows, for monitoring."""
+        first = self.layers[0]
+        buffers = [t for cache in self.layers for t in (cache.k, cache.v) if t is not None]
+        if self.context_buffer is not None:
+            buffers.append(self.context_buffer)
+        n_bytes = sum(t.numel() * t.element_size() for t in buffers)
+        capacity = 0 if first.k is None else first.k.size(0)
+        return {
+            'sequences': self.n_rows,
+            'tokens': int(first.positions[:self.n_rows].clamp(max=self.max_len).sum()) if self.n_rows else 0,
+            'bytes_allocated': n_bytes,
+            'bytes_used': n_bytes * self.n_rows // capacity if capacity else 0,
+        }
+
+    def append(self, caches, context=None, repeats=None):
+        """Appends the rows of prefilled `KVCache`s and their context; see `PagedKVCache.append`."""
+        start = self.n_rows
+        for slot_cache, cache in zip(self.layers, caches):
+            slot_cache.append(cache, repeats)
+        if context is not None:
+            context = context.repeat_interleave(repeats, dim=0) if repeats is not None else context
+            capacity = self.layers[0].k.size(0)
+            if self.context_buffer is None or self.context_buffer.size(0) < capacity:
+                buffer = context.new_zeros(capacity, self.max_len, self.context_dim)
+                if self.context_buffer is not None:
+                    buffer[:start] = self.context_buffer[:start]
+                self.context_buffer = buffer
+            self.context_buffer[start:self.n_rows, :context.size(1)] = context
+
+    def write_context(self, context):
+        """Stores the context ([n_rows, context_dim]) of the positions written in the last step."""
+        slots = (self.layers[0].offset - 1) % self.max_len
+        self.context_buffer[torch.arange(self.n_rows, device=context.device), slots] = context.to(self.context_buffer.dtype)
+
+    def context(self):
+        """Context of every used slot, with `key_padding_mask` marking unused ones. Shape: [n_rows, seq_len, context_dim]"""
+        return self.context_buffer[:self.n_rows, :self.seq_len]
+
+    def move_rows(self, src, dst, n_rows):
+        """See `SlotKVCache.move_rows`."""
+        for cache in self.layers:
+            cache.move_rows(src, dst, n_rows)
+        if len(src) and self.context_buffer is not None:
+            self.context_buffer[dst] = self.context_buffer[src]
+
+
+class PagedKVCache:
+    """
+    Block-paged key/value storage of all self-attention layers for continuous batching: a memory-efficient
+    alternative to one `SlotKVCache` per layer, with the same row semantics (independent sequences, ring of
+    `max_len` slots per row, single-token updates).
+
+    Storage is a pool of fixed-size pages of `page_size` slots. Every row has a page table mapping its slots
+    to pages, which are taken from a free list as the row grows and returned when the row is retired, so
+    memory follows the positions actually held rather than `max_len` per row. Pages can be stored in a
+    reduced `dtype` (float16/bfloat16), and are cast back to the activation dtype when attended to.
+
+    Paging bounds the memory resident between steps. Attention still needs each row's keys and values as
+    one dense [seq_len, head_dim] run per head, so every layer update gathers its rows' pages into a scratch
+    buffer shared by all layers and reused across steps: at any time only one layer's window is materialized
+    (plus a cast copy when `dtype` differs from the activations), and the buffer is only reallocated when the
+    batch outgrows it. The returned keys and values are views of that buffer, valid until the next update.
+
+    Optionally, a per-position context of width `context_dim` (the s2 cross-attention keys/values of
+    `Kronos.project_s2_context`) is paged alongside, with the same page tables.
+
+    `layers` holds one cache object per self-attention layer, to pass as `kv_cache` to `Kronos.decode_s1`.
+    Layers must be updated in order; a step ends when the last one has been updated.
+
+    Args:
+        n_layers (int): Number of self-attention layers.
+        max_len (int): Maximum number of positions each row can attend to.
+        page_size (int, optional): Slots per page. Defaults to 16.
+        max_pages (int, optional): Page budget; storage grows on demand up to it. Defaults to None (unbounded).
+        dtype (torch.dtype, optional): Storage dtype. Defaults to the dtype of the first keys stored.
+        context_dim (int, optional): Width of the paged per-position context. Defaults to None (none).
+    """
+
+    def __init__(self, n_layers, max_len, page_size=16, max_pages=None, dtype=None, context_dim=None):
+        self.n_layers = n_layers
+        self.max_len = max_len
+        self.page_size = page_size
+        self.pages_per_row = -(-max_len // page_size)
+        self.max_pages = max_pages
+        self.dtype = dtype
+        self.context_dim = context_dim
+        self.layers = [PagedLayerCache(self, i) for i in range(n_layers)]
+        self.n_rows = 0
+        self.seq_len = 0
+        self.peak_pages = 0
+        self.k = self.v = self.context_pages = None  # [n_layers, n_pages, page_size, n_heads, head_dim], [n_pages, page_size, context_dim]
+        self._buffers = {}  # Flat gather scratch buffers of the keys, values and context
+        self.free = []  # Free page ids
+        self.n_pages = 0  # Pages allocated in storage, free or not
+        # Page tables (-1 = no page), on the host for allocation and mirrored on the device for gathering.
+        self.tables = np.full((0, self.pages_per_row), -1, dtype=np.int64)
+        self.block_table = self.padding = self.positions = None
+        self._positions = np.zeros(0, dtype=np.int64)
+        self._layout = None  # (keys, context) of the first append, for the shapes and dtypes of the storage
+        self._step = None  # (page_ids, offsets) of the slots written in the current step
+
+    @property
+    def pages_used(self):
+        return self.n_pages - len(self.free)
+
+    @property
+    def key_padding_mask(self):
+        return self.padding[:self.n_rows, :self.seq_len]
+
+    def memory_stats(self):
+        """Page and byte counts of the pool, for monitoring."""
+        bytes_per_page = 0
+        if self.k is not None:
+            bytes_per_page = 2 * self.k[:, 0].numel() * self.k.element_size()
+            if self.context_pages is not None:
+                bytes_per_page += self.context_pages[0].numel() * self.context_pages.element_size()
+        tokens = int(np.minimum(self._positions[:self.n_rows], self.max_len).sum())
+        return {
+            'sequences': self.n_rows,
+            'tokens': tokens,
+            'page_size': self.page_size,
+            'pages_allocated': self.n_pages,
+            'pages_used': self.pages_used,
+            'pages_free': len(self.free),
+            'peak_pages_used': self.peak_pages,
+            'bytes_allocated': self.n_pages * bytes_per_page,
+            'bytes_used': self.pages_used * bytes_per_page,
+            # Share of the used page slots that hold a position (the rest is the partly filled last pages).
+            'page_utilization': tokens / (self.pages_used * self.page_size) if self.pages_used else 0.0,
+        }
+
+    def _allocate(self, n):
+        """Takes `n` pages from the free list, growing the storage within `max_pages` if needed."""
+        if n > len(self.free):
+            needed = self.n_pages + n - len(self.free)
+            if self.max_pages is not None and needed > self.max_pages:
+                raise RuntimeError(f"PagedKVCache is out of pages: {needed} needed, max_pages={self.max_pages}.")
+            capacity = max(needed, 2 * self.n_pages)
+            capacity = min(capacity, self.max_pages) if self.max_pages is not None else capacity
+            self._grow(capacity)
+        pages, self.free = self.free[-n:] if n else [], self.free[:len(self.free) - n]
+        self.peak_pages = max(self.peak_pages, self.pages_used)
+        return pages
+
+    def _grow(self, capacity):
+        k, context = self._layout
+        dtype = self.dtype or k.dtype
+        shape = (self.n_layers, capacity, self.page_size, k.size(1), k.size(3))
+        new_k, new_v = k.new_empty(shape, dtype=dtype), k.new_empty(shape, dtype=dtype)
+        new_context = None
+        if self.context_dim is not None:
+            new_context = k.new_empty(capacity, self.page_size, self.context_dim, dtype=self.dtype or context.dtype)
+        if self.k is not None:
+            new_k[:, :self.n_pages], new_v[:, :self.n_pages] = self.k, self.v
+            if new_context is not None:
+                new_context[:self.n_pages] = self.context_pages
+        self.k, self.v, self.context_pages = new_k, new_v, new_context
+        # Newly added pages are handed out lowest id first.
+        self.free = list(range(capacity - 1, self.n_pages - 1, -1)) + self.free
+        self.n_pages = capacity
+
+    def _reserve_rows(self, n_rows, device):
+        capacity = self.tables.shape[0]
+        if n_rows <= capacity:
+            return
+        capacity = max(n_rows, 2 * capacity)
+        tables = np.full((capacity, self.pages_per_row), -1, dtype=np.int64)
+        tables[:self.n_rows] = self.tables[:self.n_rows]
+        positions = np.zeros(capacity, dtype=np.int64)
+        positions[:self.n_rows] = self._positions[:self.n_rows]
+        padding = torch.ones(capacity, self.max_len, dtype=torch.bool, device=device)
+        device_positions = torch.zeros(capacity, dtype=torch.long, device=device)
+        if self.padding is not None:
+            padding[:self.n_rows], device_positions[:self.n_rows] = self.padding[:self.n_rows], self.positions[:self.n_rows]
+        self.tables, self._positions, self.padding, self.positions = tables, positions, padding, device_positions
+        self.block_table = torch.from_numpy(tables).to(device)
+
+    def append(self, caches, context=None, repeats=None):
+        """
+        Appends every row of prefilled, non-sliding `KVCache`s (one per layer) as new rows, optionally
+        repeating row i `repeats[i]` times. Pages are only allocated for unpadded positions.
+
+        Args:
+            caches (List[KVCache]): Prefilled caches of at most `max_len` positions.
+            context (torch.Tensor, optional): Per-position context of the prefilled positions. Shape: [batch_size, seq_len, context_dim]
+            repeats (torch.Tensor, optional): Copies of each row. Shape: [batch_size]. Defaults to one each.
+        """
+        seq_len, padding = caches[0].seq_len, caches[0].key_padding_mask
+        if repeats is not None:
+            padding = padding.repeat_interleave(repeats, dim=0) if padding is not None else None
+            context = context.repeat_interleave(repeats, dim=0) if context is not None else None
+        n_new = caches[0].k.size(0) if repeats is None else int(repeats.sum())
+        device = caches[0].k.device
+        start, end = self.n_rows, self.n_rows + n_new
+        self._reserve_rows(end, device)
+
+        # Pages of every row, from the one holding its first unpadded position up to the one holding seq_len - 1.
+        n_pages = -(-seq_len // self.page_size)
+        first_page = np.zeros(n_new, dtype=np.int64)
+        if padding is not None:
+            first_page = ((~padding).float().argmax(dim=1) // self.page_size).cpu().numpy()
+        needed = n_pages - first_page
+        if self._layout is None:
+            self._layout = (caches[0].k, context)
+        pages = self._allocate(int(needed.sum()))
+        self.tables[start:end] = -1
+        for row, (first, page_list) in enumerate(zip(first_page, np.split(np.asarray(pages, dtype=np.int64), np.cumsum(needed)[:-1]))):
+            self.tables[start + row, first:n_pages] = page_list
+        self.block_table[start:end] = torch.from_numpy(self.tables[start:end]).to(device)
+
+        table = self.block_table[start:end, :n_pages]
+        allocated = table >= 0
+        padded_len = n_pages * self.page_size
+
+        def paged(x):
+            # [rows, seq_len, ...] -> [rows, n_pages, page_size, ...] of the allocated pages only.
+            x = F.pad(x, (0,) * (2 * (x.dim() - 2)) + (0, padded_len - seq_len))
+            return x.view(x.size(0), n_pages, self.page_size, *x.shape[2:])[allocated]
+
+        for i, cache in enumerate(caches):
+            for store, x in ((self.k, cache.k), (self.v, cache.v)):
+                x = x[:, :, :seq_len]
+                x = x.repeat_interleave(repeats, dim=0) if repeats is not None else x
+                # [rows, heads, seq_len, head_dim] -> pages of [page_size, heads, head_dim]
+                store[i][table[allocated]] = paged(x.transpose(1, 2)).to(store.dtype)
+        if context is not None:
+            self.context_pages[table[allocated]] = paged(context).to(self.context_pages.dtype)
+
+        self.padding[start:end] = True
+        self.padding[start:end, :seq_len] = padding if padding is not None else False
+        self.positions[start:end] = caches[0].offset
+        self._positions[start:end] = caches[0].offset
+        self.n_rows = end
+        self.seq_len = max(self.seq_len, seq_len)
+
+    def _begin_step(self, device):
+        """Allocates the pages the slots of this step fall into and marks the slots as used."""
+        n = self.n_rows
+        slots = self._positions[:n] % self.max_len
+        page_index = slots // self.page_size
+        rows = np.arange(n)
+        missing = np.nonzero(self.tables[rows, page_index] < 0)[0]
+        if len(missing):
+            self.tables[missing, page_index[missing]] = self._allocate(len(missing))
+            self.block_table[torch.from_numpy(missing).to(device), torch.from_numpy(page_index[missing]).to(device)] = \
+                torch.from_numpy(self.tables[missing, page_index[missing]]).to(device)
+        page_ids = torch.from_numpy(self.tables[rows, page_index]).to(device)
+        offsets = torch.from_numpy(slots % self.page_size).to(device)
+        self.padding[torch.arange(n, device=device), torch.from_numpy(slots).to(device)] = False
+        self.seq_len = min(self.seq_len + 1, self.max_len)
+        self._step = (page_ids, offsets)
+
+    def _end_step(self):
+        # Rotary positions only advance once every layer has been updated.
+        self.positions[:self.n_rows] += 1
+        self._positions[:self.n_rows] += 1
+
+    def update(self, layer, k, v):
+        """Writes one position of every row for `layer` and gathers all used slots of its rows; see `SlotKVCache.update`."""
+        if k.size(2) != 1:
+            raise ValueError("PagedKVCache only supports single-token updates; prefill into a KVCache and append it.")
+        if layer == 0:
+            self._begin_step(k.device)
+        page_ids, offsets = self._step
+        self.k[layer][page_ids, offsets] = k[:, :, 0].to(self.k.dtype)
+        self.v[layer][page_ids, offsets] = v[:, :, 0].to(self.v.dtype)
+        # [n_rows, seq_len, heads, head_dim] -> [n_rows, heads, seq_len, head_dim], without copying.
+        keys, values = self._gather(self.k[layer], 'k').transpose(1, 2), self._gather(self.v[layer], 'v').transpose(1, 2)
+        if layer == self.n_layers - 1:
+            self._end_step()
+        return keys.to(k.dtype), values.to(v.dtype)
+
+    def _gather(self, pages, name):
+        # [n_pages, page_size, ...] -> [n_rows, seq_len, ...] in the reused buffer `name`; unallocated pages read page 0 and are masked.
+        table = self.block_table[:self.n_rows, :-(-self.seq_len // self.page_size)].clamp(min=0)
+        size = table.numel() * pages[0].numel()
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.numel() < size:
+            buffer = self._buffers[name] = pages.new_empty(max(size, 2 * buffer.numel() if buffer is not None else 0))
+        out = buffer[:size].view(table.numel(), *pages.shape[1:])
+        torch.index_select(pages, 0, table.flatten(), out=out)
+        return out.view(self.n_rows, -1, *pages.shape[2:])[:, :self.seq_len]
+
+    def write_context(self, context):
+        """
+        Stores the context of the positions written in the last step.
+
+        Args:
+            context (torch.Tensor): Shape: [n_rows, context_dim]
+        """
+        page_ids, offsets = self._step
+        self.context_pages[page_ids, offsets] = context.to(self.context_pages.dtype)
+
+    def context(self):
+        """Context of every used slot, with `key_padding_mask` marking unused ones. Shape: [n_rows, seq_len, context_dim]"""
+        return self._gather(self.context_pages, 'context')
+
+    def move_rows(self, src, dst, n_rows):
+        """
+        Frees the pages of retired rows, copies the page tables of rows `src` to rows `dst` and keeps the first
+        `n_rows` rows; see `SlotKVCache.move_rows`. Pages themselves are never copied.
+
+        Args:
+            src, dst (Sequence[int]): Row indices.
+            n_rows (int): Number of rows kept.
+        """
+        src, dst = list(src), list(dst)
+        retired = set(range(self.n_rows)) - set(range(n_rows)) - set(src) | set(dst)
+        for row in retired:
+            pages = self.tables[row]
+            self.free.extend(pages[pages >= 0].tolist())
+        if src:
+            self.tables[dst] = self.tables[src]
+            self._positions[dst] = self._positions[src]
+            device = self.padding.device
+            src_index, dst_index = torch.as_tensor(src, device=device), torch.as_tensor(dst, device=device)
+            for buffer in (self.block_table, self.padding, self.positions):
+                buffer[dst_index] = buffer[src_index]
+        self.tables[n_rows:self.n_rows] = -1
+        if self.block_table is not None:
+            self.block_table[n_rows:self.n_rows] = -1
+        self.n_rows = n_rows
+        self.seq_len = min(int(self._positions[:n_rows].max()), self.max_len) if n_rows else 0
+
+
+class PagedLayerCache:
+    """The `kv_cache` of one self-attention layer in a `PagedKVCache`, with the `KVCache` interface used by attention."""
+
+    sliding = False
+
+    def __init__(self, pool, layer):
+        self.pool = pool
+        self.layer = layer
+
+    @property
+    def offset(self):
+        return self.pool.positions[:self.pool.n_rows]
+
+    @property
+    def seq_len(self):
+        return self.pool.seq_len
+
+    @property
+    def key_padding_mask(self):
+        return self.pool.key_padding_mask
+
+    def update(self, k, v, key_padding_mask=None):
+        if key_padding_mask is not None:
+            raise ValueError("PagedKVCache only supports unpadded updates.")
+        return self.pool.update(self.layer, k, v)
 
 
 class MultiHeadAttentionWithRoPE(nn.Module):
-    def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout_p=0.0):
+    def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout_p=0.0, rotary=None):
         super().__init__()
         self.d_model = d_model
         self.n_heads = n_heads
@@ -323,22 +1155,57 @@ class MultiHeadAttentionWithRoPE(nn.Module):
         self.k_proj = nn.Linear(d_model, d_model)
         self.v_proj = nn.Linear(d_model, d_model)
         self.out_proj = nn.Linear(d_model, d_model)
-        self.rotary = RotaryPositionalEmbedding(self.head_dim)
+        self.rotary = shared_rotary(rotary, self.head_dim)
         self.attn_dropout_p = attn_dropout_p
         self.resid_dropout = nn.Dropout(resid_dropout_p)
+        self.register_buffer("qkv_weight", None, persistent=False)
+        self.register_buffer("qkv_bias", None, persistent=False)
+
+    def pack(self):
+        """Packs `q_proj`, `k_proj` and `v_proj` into one projection used in eval mode (see `pack_linears`)."""
+        if not is_packed(self.qkv_weight, self.q_proj):
+            self.qkv_weight, self.qkv_bias = pack_linears(self.q_proj, self.k_proj, self.v_proj)
+
+    def unpack(self):
+        self.qkv_weight = None
+        self.qkv_bias = None
+
+    def project(self, x):
+        """Returns the query, key and value projections of x, each of shape [batch_size, seq_len, d_model]."""
+        if self.qkv_weight is not None and not self.training:
+            q, k, v = F.linear(x, self.qkv_weight, self.qkv_bias).chunk(3, dim=-1)
+            return with_lora(q, self.q_proj, x), with_lora(k, self.k_proj, x), with_lora(v, self.v_proj, x)
+        return self.q_proj(x), self.k_proj(x), self.v_proj(x)
+
+    def forward(self, x, key_padding_mask=None, kv_cache=None):
+        attn_output = self.attend(*self.project(x), key_padding_mask, kv_cache)
+        return self.resid_dropout(self.out_proj(attn_output))
 
-    def forward(self, x, key_padding_mask=None):
-        batch_size, seq_len, _ = x.shape
+    def attend(self, q, k, v, key_padding_mask=None, kv_cache=None):
+        """
+        Attention core between the input projections and `out_proj`: rotary embedding, KV cache and SDPA.
 
-        q = self.q_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
-        k = self.k_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
-        v = self.v_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        Args:
+            q, k, v (torch.Tensor): Projected queries/keys/values. Shape: [batch_size, seq_len, d_model]
+            key_padding_mask (torch.Tensor, optional): Padding mask (True = padded). Defaults to None.
+            kv_cache (KVCache, optional): Cache to read earlier positions from and append to. Defaults to None.
+
+        Returns:
+            torch.Tensor: Attention output before `out_proj`. Shape: [batch_size, seq_len, d_model]
+        """
+        batch_size, seq_len, _ = q.shape
+
+        q = q.view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        k = k.view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        v = v.view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+
+        if kv_cache is not None:
+            return self._attend_cached(q, k, v, kv_cache, key_padding_mask)
 
         q, k = self.rotary(q, k)
 
         if key_padding_mask is not None:
-            attn_mask = key_padding_mask.unsqueeze(1).unsqueeze(2)  # [batch, 1, 1, seq_len]
-            attn_mask = attn_mask.expand(-1, self.n_heads, seq_len, -1)  # [batch, n_heads, q_len, k_len]
+            attn_mask = build_attention_mask(key_padding_mask, seq_len)  # [batch, 1, q_len, k_len]
         else:
             attn_mask = None
 
@@ -346,15 +1213,72 @@ class MultiHeadAttentionWithRoPE(nn.Module):
             q, k, v,
             attn_mask=attn_mask,
             dropout_p=self.attn_dropout_p if self.training else 0.0,
-            is_causal=True
+            is_causal=attn_mask is None
         )
 
-        attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, seq_len, self.d_model)
-        return self.resid_dropout(self.out_proj(attn_output))
+        return attn_output.transpose(1, 2).contiguous().view(batch_size, seq_len, self.d_model)
+
+    def _attend_cached(self, q, k, v, kv_cache, key_padding_mask=None):
+        """Attends the new positions in q/k/v to themselves and to everything already held in kv_cache."""
+        batch_size, _, q_len, _ = q.shape
+        past_len = kv_cache.seq_len
+        q, k, v = self._update_cache(q, k, v, kv_cache, key_padding_mask)
+        cached_padding = kv_cache.key_padding_mask
+
+        if q_len == 1:
+            # A single new token may attend to every cached, unpadded position.
+            attn_mask = None if cached_padding is None else ~cached_padding[:, None, None, :]
+            is_causal = False
+        elif cached_padding is not None:
+            attn_mask, is_causal = build_attention_mask(cached_padding, q_len), False
+        elif past_len == 0:
+            attn_mask, is_causal = None, True
+        else:
+            attn_mask = torch.ones(q_len, past_len + q_len, dtype=torch.bool, device=q.device).tril(diagonal=past_len)
+            is_causal = False
+
+        attn_output = F.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask, is_causal=is_causal)
+
+        return attn_output.transpose(1, 2).contiguous().view(batch_size, q_len, self.d_model)
+
+    def _update_cache(self, q, k, v, kv_cache, key_padding_mask=None):
+        """Rotates q/k at the cache position and appends k/v to kv_cache; returns q and the cached keys/values."""
+        if kv_cache.sliding and kv_cache.offset + q.size(2) > 2 * kv_cache.max_len:
+            # Keep rotary positions bounded; attention scores only depend on relative positions.
+            kv_cache.rebase(self.rotary)
+
+        q, k = self.rotary(q, k, offset=kv_cache.offset)
+        k, v = kv_cache.update(k, v, key_padding_mask)
+        return q, k, v
+
+    def attend_rows(self, q, k, v, kv_cache, rows):
+        """
+        Single-position cached attention that appends the keys/values of every row to kv_cache but only
+        attends for `rows`.
+
+        Args:
+            q, k, v (torch.Tensor): Projected queries/keys/values. Shape: [batch_size, 1, d_model]
+            kv_cache (KVCache): Cache to read earlier positions from and append to.
+            rows (torch.Tensor): Indices of the rows to attend for. Shape: [n_rows]
+
+        Returns:
+            torch.Tensor: Attention output of `rows` before `out_proj`. Shape: [n_rows, 1, d_model]
+        """
+        batch_size, q_len, _ = q.shape
+        q, k, v = (t.view(batch_size, q_len, self.n_heads, self.head_dim).transpose(1, 2) for t in (q, k, v))
+        q, k, v = self._update_cache(q, k, v, kv_cache)
+        if rows.numel() == 0:
+            return q.new_empty(0, q_len, self.d_model)
+        cached_padding = kv_cache.key_padding_mask
+        attn_mask = None if cached_padding is None else ~cached_padding[rows, None, None, :]
+
+        attn_output = F.scaled_dot_product_attention(q[rows], k[rows], v[rows], attn_mask=attn_mask)
+
+        return attn_output.transpose(1, 2).contiguous().view(len(rows), q_len, self.d_model)
 
 
 class MultiHeadCrossAttentionWithRoPE(nn.Module):
-    def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout=0.0):
+    def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout=0.0, rotary=None):
         super().__init__()
         self.d_model = d_model
         self.n_heads = n_heads
@@ -364,27 +1288,42 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
         self.k_proj = nn.Linear(d_model, d_model)
         self.v_proj = nn.Linear(d_model, d_model)
         self.out_proj = nn.Linear(d_model, d_model)
-        self.rotary = RotaryPositionalEmbedding(self.head_dim)
+        self.rotary = shared_rotary(rotary, self.head_dim)
         self.attn_dropout_p = attn_dropout_p
         self.resid_dropout = nn.Dropout(resid_dropout)
+        self.register_buffer("kv_weight", None, persistent=False)
+        self.register_buffer("kv_bias", None, persistent=False)
+
+    def pack(self):
+        """Packs `k_proj` and `v_proj` into one projection used in eval mode (see `pack_linears`)."""
+        if not is_packed(self.kv_weight, self.k_proj):
+            self.kv_weight, self.kv_bias = pack_linears(self.k_proj, self.v_proj)
+
+    def unpack(self):
+        self.kv_weight = None
+        self.kv_bias = None
 
     def forward(self, query, key, value, key_padding_mask=None):
         batch_size, q_len, _ = query.shape
         _, seq_len, _ = key.shape
 
-        q = self.q_proj(query).view(batch_size, q_len, self.n_heads, self.head_dim).transpose(1, 2)
-        k = self.k_proj(key).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
-        v = self.v_proj(value).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        q = self.q_proj(query)
+        if self.kv_weight is not None and not self.training and key is value:
+            k, v = F.linear(key, self.kv_weight, self.kv_bias).chunk(2, dim=-1)
+        else:
+            k, v = self.k_proj(key), self.v_proj(value)
+        q = q.view(batch_size, q_len, self.n_heads, self.head_dim).transpose(1, 2)
+        k = k.view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        v = v.view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
 
         q, k = self.rotary(q, k)
 
         if key_padding_mask is not None:
-            attn_mask = key_padding_mask.unsqueeze(1).unsqueeze(2)
-            attn_mask = attn_mask.expand(-1, self.n_heads, q_len, -1)
+            attn_mask = build_attention_mask(key_padding_mask, q_len, causal=self.training)
+            is_causal_flag = False
         else:
             attn_mask = None
-
-        is_causal_flag = self.training
+            is_causal_flag = self.training
 
         attn_output = F.scaled_dot_product_attention(
             q, k, v,
@@ -396,6 +1335,34 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
         attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, q_len, self.d_model)
         return self.resid_dropout(self.out_proj(attn_output))
 
+    def project_kv(self, key):
+        """Keys and values of `key` ([batch_size, seq_len, d_model]), packed as [batch_size, seq_len, 2 * d_model]."""
+        if self.kv_weight is not None and not self.training:
+            return F.linear(key, self.kv_weight, self.kv_bias)
+        return torch.cat([self.k_proj(key), self.v_proj(key)], dim=-1)
+
+    def attend_kv(self, query, kv, key_padding_mask=None):
+        """
+        Attention of a single query position over keys/values from `project_kv`; equal to `forward(query, key, key)`
+        for q_len == 1, where the rotary embedding is the identity (query and keys all sit at position 0).
+        The keys/values can thus be computed once per context row and cached across decoding steps.
+
+        Args:
+            query (torch.Tensor): Shape: [batch_size, 1, d_model]
+            kv (torch.Tensor): Packed keys/values. Shape: [batch_size, seq_len, 2 * d_model]
+            key_padding_mask (torch.Tensor, optional): True at positions to ignore. Shape: [batch_size, seq_len]
+        """
+        batch_size, q_len, _ = query.shape
+        seq_len = kv.size(1)
+
+        q = self.q_proj(query).view(batch_size, q_len, self.n_heads, self.head_dim).transpose(1, 2)
+        k, v = kv.view(batch_size, seq_len, 2, self.n_heads, self.head_dim).permute(2, 0, 3, 1, 4)
+        attn_mask = build_attention_mask(key_padding_mask, q_len, causal=False) if key_padding_mask is not None else None
+
+        attn_output = F.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask)
+        attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, q_len, self.d_model)
+        return self.resid_dropout(self.out_proj(attn_output))
+
 
 class HierarchicalEmbedding(nn.Module):
     def __init__(self, s1_bits, s2_bits, d_model=256):
@@ -414,6 +1381,25 @@ class HierarchicalEmbedding(nn.Module):
         nn.init.normal_(self.emb_s1.weight, mean=0, std=d_model ** -0.5)
         nn.init.normal_(self.emb_s2.weight, mean=0, std=d_model ** -0.5)
 
+        # Pre-projected tables set by `fold`; derived from the weights, so kept out of the state dict.
+        self.register_buffer("folded_s1", None, persistent=False)
+        self.register_buffer("folded_s2", None, persistent=False)
+
+    @torch.no_grad()
+    def fold(self):
+        """
+        Folds the embedding scale and `fusion_proj` into one pre-projected table per sub-token, so that
+        at inference the embedding is two gathers and an add. Call again (or `unfold`) after the weights change.
+        """
+        scale = math.sqrt(self.d_model)
+        w_s1, w_s2 = self.fusion_proj.weight.split(self.d_model, dim=1)
+        self.folded_s1 = torch.addmm(self.fusion_proj.bias, self.emb_s1.weight * scale, w_s1.t())
+        self.folded_s2 = self.emb_s2.weight * scale @ w_s2.t()
+
+    def unfold(self):
+        self.folded_s1 = None
+        self.folded_s2 = None
+
     def split_token(self, token_ids: torch.Tensor, s2_bits: int):
         """Inputs:
             token_ids (torch.Tensor): Composite token IDs of shape [batch_size, seq_len] or [N], each in range [0, 2^(s1_bits + s2_bits) - 1].
@@ -438,15 +1424,17 @@ class HierarchicalEmbedding(nn.Module):
             s1_ids, s2_ids = token_ids
         else:
             s1_ids, s2_ids = self.split_token(token_ids, self.s2_bits)
+        if self.folded_s1 is not None and not self.training:
+            return F.embedding(s1_ids, self.folded_s1) + F.embedding(s2_ids, self.folded_s2)
         s1_emb = self.emb_s1(s1_ids) * math.sqrt(self.d_model)
         s2_emb = self.emb_s2(s2_ids) * math.sqrt(self.d_model)
         return self.fusion_proj(torch.cat([s1_emb, s2_emb], dim=-1))
 
 
 class DependencyAwareLayer(nn.Module):
-    def __init__(self, d_model, n_heads=4, attn_dropout_p=0.0, resid_dropout=0.0):
+    def __init__(self, d_model, n_heads=4, attn_dropout_p=0.0, resid_dropout=0.0, rotary=None):
         super().__init__()
-        self.cross_attn = MultiHeadCrossAttentionWithRoPE(d_model, n_heads, attn_dropout_p, resid_dropout)
+        self.cross_attn = MultiHeadCrossAttentionWithRoPE(d_model, n_heads, attn_dropout_p, resid_dropout, rotary)
         self.norm = RMSNorm(d_model)
 
     def forward(self, hidden_states, sibling_embed, key_padding_mask=None):
@@ -461,19 +1449,40 @@ class DependencyAwareLayer(nn.Module):
         )
         return self.norm(hidden_states + attn_out)
 
+    def step(self, hidden_state, sibling_embed, kv, key_padding_mask=None):
+        """
+        Output at a single position: `forward(...)` restricted to that position's row, with the cross-attention
+        keys/values of `hidden_states` precomputed by `cross_attn.project_kv`.
+
+        Args:
+            hidden_state (torch.Tensor): Row of the position. Shape: [batch_size, 1, d_model]
+            sibling_embed (torch.Tensor): Shape: [batch_size, 1, d_model]
+            kv (torch.Tensor): Shape: [batch_size, seq_len, 2 * d_model]
+            key_padding_mask (torch.Tensor, optional): Shape: [batch_size, seq_len]
+        """
+        attn_out = self.cross_attn.attend_kv(sibling_embed, kv, key_padding_mask=key_padding_mask)
+        return self.norm(hidden_state + attn_out)
+
 
 class TransformerBlock(nn.Module):
-    def __init__(self, d_model, n_heads, ff_dim=1024, ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0):
+    def __init__(self, d_model, n_heads, ff_dim=1024, ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0, rotary=None):
         super().__init__()
         self.norm1 = RMSNorm(d_model)
-        self.self_attn = MultiHeadAttentionWithRoPE(d_model, n_heads, attn_dropout_p, resid_dropout_p)
+        self.self_attn = MultiHeadAttentionWithRoPE(d_model, n_heads, attn_dropout_p, resid_dropout_p, rotary)
         self.norm2 = RMSNorm(d_model)
         self.ffn = FeedForward(d_model, ff_dim, ffn_dropout_p)
+        # Compiled position-wise graphs used in eval mode, attached by `model.graphs.compile_graphs`.
+        self.graphs = None
+
+    def forward(self, x, key_padding_mask=None, kv_cache=None):
+        if self.graphs is not None and not self.training:
+            q, k, v = self.graphs.block_input(self, x)
+            attn_out = self.self_attn.attend(q, k, v, key_padding_mask, kv_cache)
+            return self.graphs.block_output(self, x, attn_out)
 
-    def forward(self, x, key_padding_mask=None):
         residual = x
         x = self.norm1(x)
-        attn_out = self.self_attn(x, key_padding_mask=key_padding_mask)
+        attn_out = self.self_attn(x, key_padding_mask=key_padding_mask, kv_cache=kv_cache)
         x = residual + attn_out
 
         residual = x
@@ -482,6 +1491,47 @@ class TransformerBlock(nn.Module):
         x = residual + ffn_out
         return x
 
+    def forward_rows(self, x, rows, kv_cache):
+        """
+        Single-position cached step that runs attention and the feed-forward only for `rows`. Every row's
+        keys/values still enter kv_cache, so rows that skip the block (early exit) keep deeper caches complete,
+        projected from their unchanged hidden state.
+
+        Args:
+            x (torch.Tensor): Input of the new position. Shape: [batch_size, 1, d_model]
+            rows (torch.Tensor): Indices of the rows to run the block for. Shape: [n_rows]
+            kv_cache (KVCache): Cache of this block.
+
+        Returns:
+            torch.Tensor: x with `rows` replaced by the block output. Shape: [batch_size, 1, d_model]
+        """
+        attn = self.self_attn
+        attn_out = attn.attend_rows(*attn.project(self.norm1(x)), kv_cache, rows)
+        if rows.numel() == 0:
+            return x
+
+        h = x[rows] + attn.resid_dropout(attn.out_proj(attn_out))
+        h = h + self.ffn(self.norm2(h))
+        return x.index_copy(0, rows, h)
+
+
+class ExitHead(nn.Module):
+    """
+    Early-exit adapter: maps the hidden state after an intermediate `TransformerBlock` towards the final one,
+    so that the model's final norm and `DualHead` can be shared by every exit. The residual projection is
+    zero-initialised, i.e. a fresh head reads the intermediate state as is.
+    """
+
+    def __init__(self, d_model):
+        super().__init__()
+        self.norm = RMSNorm(d_model)
+        self.proj = nn.Linear(d_model, d_model)
+        nn.init.zeros_(self.proj.weight)
+        nn.init.zeros_(self.proj.bias)
+
+    def forward(self, x):
+        return x + self.proj(self.norm(x))
+
 
 class DualHead(nn.Module):
     def __init__(self, s1_bits, s2_bits, d_model):
@@ -550,9 +1600,38 @@ class TemporalEmbedding(nn.Module):
         self.day_embed = Embed(day_size, d_model)
         self.month_embed = Embed(month_size, d_model)
 
+        # Joint (minute, hour) and (weekday, day, month) tables set by `fold`.
+        self.register_buffer("folded_clock", None, persistent=False)
+        self.register_buffer("folded_calendar", None, persistent=False)
+
+    @torch.no_grad()
+    def fold(self):
+        """
+        Precomputes the sums of the minute/hour and of the weekday/day/month embeddings over all index
+        combinations, turning the five lookups per position into two. Call again (or `unfold`) after the
+        weights change.
+        """
+        device = next(self.parameters()).device
+        minute = self.minute_embed(torch.arange(60, device=device))
+        hour = self.hour_embed(torch.arange(24, device=device))
+        weekday = self.weekday_embed(torch.arange(7, device=device))
+        day = self.day_embed(torch.arange(32, device=device))
+        month = self.month_embed(torch.arange(13, device=device))
+        self.folded_clock = (minute[:, None] + hour[None, :]).flatten(0, 1)
+        self.folded_calendar = (weekday[:, None, None] + day[None, :, None] + month[None, None, :]).flatten(0, 2)
+
+    def unfold(self):
+        self.folded_clock = None
+        self.folded_calendar = None
+
     def forward(self, x):
         x = x.long()
 
+        if self.folded_clock is not None and not self.training:
+            clock = x[:, :, 0] * 24 + x[:, :, 1]
+            calendar = (x[:, :, 2] * 32 + x[:, :, 3]) * 13 + x[:, :, 4]
+            return F.embedding(clock, self.folded_clock) + F.embedding(calendar, self.folded_calendar)
+
         minute_x = self.minute_embed(x[:, :, 0])
         hour_x = self.hour_embed(x[:, :, 1])
         weekday_x = self.weekday_embed(x[:, :, 2])
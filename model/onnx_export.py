@@ -0,0 +1,179 @@
+import json
+import os
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from model.module import build_attention_mask
+from model.onnx_runtime import ONNX_CONFIG, ONNX_FILES
+
+
+def _attention_step(attn, x, past_k, past_v, padding_mask):
+    """
+    `MultiHeadAttentionWithRoPE` over new positions with an explicit cache: the functional form of
+    `attend(..., kv_cache=...)` that export can trace with symbolic past and sequence lengths.
+
+    Args:
+        x (torch.Tensor): Normed input of the new positions. Shape: [batch_size, q_len, d_model]
+        past_k, past_v (torch.Tensor): Cached (rotated) keys and values. Shape: [batch_size, n_heads, past_len, head_dim]
+        padding_mask (torch.Tensor): True at padded positions, past and new. Shape: [batch_size, past_len + q_len]
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor]: Attention output [batch_size, q_len, d_model] and the
+            updated keys/values [batch_size, n_heads, past_len + q_len, head_dim].
+    """
+    batch_size, q_len, _ = x.shape
+    q, k, v = (t.reshape(batch_size, q_len, attn.n_heads, attn.head_dim).transpose(1, 2) for t in attn.project(x))
+
+    # Rotary angles from positions rather than the table, which export would freeze to a constant slice.
+    rotary = attn.rotary
+    positions = torch.arange(q_len, device=x.device) + past_k.shape[2]
+    cos, sin = rotary._cos_sin(positions[:, None].float() * rotary.inv_freq)
+    q, k = rotary._rotate(q, cos, sin), rotary._rotate(k, cos, sin)
+
+    k = torch.cat([past_k, k], dim=2)
+    v = torch.cat([past_v, v], dim=2)
+    attn_output = F.scaled_dot_product_attention(q, k, v, attn_mask=build_attention_mask(padding_mask, q_len))
+    attn_output = attn_output.transpose(1, 2).reshape(batch_size, q_len, attn.d_model)
+    return attn.out_proj(attn_output), k, v
+
+
+class KronosStep(nn.Module):
+    """`Kronos.decode_s1` over new positions, with the KV cache of all layers passed in and returned as tensors."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, s1_ids, s2_ids, stamp, padding_mask, past_k, past_v):
+        model = self.model
+        x = model.embedding([s1_ids, s2_ids]) + model.time_emb(stamp)
+        present_k, present_v = [], []
+        for i, block in enumerate(model.transformer):
+            attn_out, k, v = _attention_step(block.self_attn, block.norm1(x), past_k[i], past_v[i], padding_mask)
+            x = x + attn_out
+            x = x + block.ffn(block.norm2(x))
+            present_k.append(k)
+            present_v.append(v)
+        x = model.norm(x)
+        return model.head(x), x, model.project_s2_context(x), torch.stack(present_k), torch.stack(present_v)
+
+
+class KronosPrefill(KronosStep):
+    """`KronosStep` on an empty cache: the whole context in, logits/context and the filled cache out."""
+
+    def forward(self, s1_ids, s2_ids, stamp, padding_mask):
+        model = self.model
+        attn = model.transformer[0].self_attn
+        empty = stamp.new_zeros(len(model.transformer), s1_ids.shape[0], attn.n_heads, 0, attn.head_dim)
+        return super().forward(s1_ids, s2_ids, stamp, padding_mask, empty, empty)
+
+
+class KronosDecodeS2(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, hidden, s1_ids, context_kv, padding_mask):
+        return self.model.decode_s2_step(hidden, s1_ids, context_kv, padding_mask=padding_mask)
+
+
+class TokenizerEncode(nn.Module):
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def forward(self, x, padding_mask):
+        s1_ids, s2_ids = self.tokenizer.encode(x, half=True, padding_mask=padding_mask)
+        return s1_ids, s2_ids
+
+
+class TokenizerDecode(nn.Module):
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def forward(self, s1_ids, s2_ids, padding_mask):
+        return self.tokenizer.decode([s1_ids, s2_ids], half=True, padding_mask=padding_mask)
+
+
+def _export(module, args, path, input_names, output_names, dynamic_axes, opset_version, export_kwargs):
+    torch.onnx.export(module, args, path, input_names=input_names, output_names=output_names, dynamic_axes=dynamic_axes,
+                      opset_version=opset_version, **export_kwargs)
+
+
+@torch.no_grad()
+def export_onnx(model, tokenizer, output_dir, max_context=512, opset_version=17, **export_kwargs):
+    """
+    Exports the graphs behind `auto_regressive_inference` to ONNX, for `model.onnx_runtime.OnnxKronosRuntime`.
+
+    Written to `output_dir`:
+        - tokenizer_encode.onnx: (x, padding_mask) -> (s1_ids, s2_ids)
+        - tokenizer_decode.onnx: (s1_ids, s2_ids, padding_mask) -> x
+        - kronos_prefill.onnx: (s1_ids, s2_ids, stamp, padding_mask) -> (s1_logits, context, s2_kv, present_k, present_v)
+        - kronos_decode_s1.onnx: (s1_ids, s2_ids, stamp, padding_mask, past_k, past_v) -> (s1_logits, context, s2_kv, present_k,
+          present_v), a single KV-cached step
+        - kronos_decode_s2.onnx: (hidden, s1_ids, context_kv, padding_mask) -> s2_logits, the s2 token of one position
+          (see `Kronos.decode_s2_step`); context_kv concatenates the s2_kv outputs of the attended rows
+        - kronos_onnx.json: export settings
+
+    Batch and sequence axes are dynamic. Padding masks are True at padded positions (all False without padding);
+    KV caches are stacked over layers: [n_layers, batch_size, n_heads, seq_len, head_dim].
+
+    Args:
+        model (Kronos): Model to export, in fp32.
+        tokenizer (KronosTokenizer): Tokenizer to export, in fp32.
+        output_dir (str): Output directory, created if needed.
+        max_context (int, optional): Longest sequence the graphs are used with. Defaults to 512.
+        opset_version (int, optional): ONNX opset. Defaults to 17.
+        **export_kwargs: Passed on to `torch.onnx.export`.
+
+    Returns:
+        Dict[str, str]: Paths of the written graphs, by name.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    model.eval()
+    tokenizer.eval()
+    device = next(model.parameters()).device
+    # Rotary tables are baked into the graphs as constants; make sure they cover every position used.
+    for module in list(model.modules()) + list(tokenizer.modules()):
+        if hasattr(module, "cos_table") and module.max_len < max_context:
+            module._build_table(max_context)
+
+    batch_size, seq_len, past_len = 2, 8, 8
+    attn = model.transformer[0].self_attn
+    x = torch.randn(batch_size, seq_len, tokenizer.d_in, device=device)
+    stamp = torch.zeros(batch_size, seq_len, 5, device=device)
+    mask = torch.zeros(batch_size, seq_len, dtype=torch.bool, device=device)
+    s1_ids, s2_ids = tokenizer.encode(x, half=True)
+    context = model.decode_s1(s1_ids, s2_ids, stamp)[1]
+    context_kv = model.project_s2_context(context)
+    past = torch.zeros(len(model.transformer), batch_size, attn.n_heads, past_len, attn.head_dim, device=device)
+    step_mask = torch.zeros(batch_size, past_len + 1, dtype=torch.bool, device=device)
+
+    seq_axes = {0: "batch", 1: "seq_len"}
+    cache_axes = {1: "batch", 3: "seq_len"}
+    paths = {name: os.path.join(output_dir, filename) for name, filename in ONNX_FILES.items()}
+    _export(TokenizerEncode(tokenizer), (x, mask), paths["encode"], ["x", "padding_mask"], ["s1_ids", "s2_ids"],
+            {"x": seq_axes, "padding_mask": seq_axes, "s1_ids": seq_axes, "s2_ids": seq_axes}, opset_version, export_kwargs)
+    _export(TokenizerDecode(tokenizer), (s1_ids, s2_ids, mask), paths["decode"], ["s1_ids", "s2_ids", "padding_mask"], ["x"],
+            {"s1_ids": seq_axes, "s2_ids": seq_axes, "padding_mask": seq_axes, "x": seq_axes}, opset_version, export_kwargs)
+    _export(KronosPrefill(model), (s1_ids, s2_ids, stamp, mask), paths["prefill"], ["s1_ids", "s2_ids", "stamp", "padding_mask"],
+            ["s1_logits", "context", "s2_kv", "present_k", "present_v"],
+            {"s1_ids": seq_axes, "s2_ids": seq_axes, "stamp": seq_axes, "padding_mask": seq_axes, "s1_logits": seq_axes,
+             "context": seq_axes, "s2_kv": seq_axes, "present_k": cache_axes, "present_v": cache_axes}, opset_version, export_kwargs)
+    _export(KronosStep(model), (s1_ids[:, :1], s2_ids[:, :1], stamp[:, :1], step_mask, past, past), paths["decode_s1"],
+            ["s1_ids", "s2_ids", "stamp", "padding_mask", "past_k", "past_v"], ["s1_logits", "context", "s2_kv", "present_k", "present_v"],
+            {"s1_ids": {0: "batch"}, "s2_ids": {0: "batch"}, "stamp": {0: "batch"}, "padding_mask": {0: "batch", 1: "total_len"},
+             "past_k": {1: "batch", 3: "past_len"}, "past_v": {1: "batch", 3: "past_len"}, "s1_logits": {0: "batch"},
+             "context": {0: "batch"}, "s2_kv": {0: "batch"}, "present_k": {1: "batch", 3: "total_len"}, "present_v": {1: "batch", 3: "total_len"}},
+            opset_version, export_kwargs)
+    _export(KronosDecodeS2(model), (context[:, -1:], s1_ids[:, -1:], context_kv, mask), paths["decode_s2"],
+            ["hidden", "s1_ids", "context_kv", "padding_mask"], ["s2_logits"],
+            {"hidden": {0: "batch"}, "s1_ids": {0: "batch"}, "context_kv": seq_axes, "padding_mask": seq_axes, "s2_logits": {0: "batch"}},
+            opset_version, export_kwargs)
+
+    with open(os.path.join(output_dir, ONNX_CONFIG), "w") as f:
+        json.dump({"max_context": max_context, "opset_version": opset_version}, f, indent=2)
+    return paths
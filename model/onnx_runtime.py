@@ -0,0 +1,178 @@
+import json
+import os
+
+import numpy as np
+
+
+# Graphs written by `model.onnx_export.export_onnx`.
+ONNX_FILES = {
+    "encode": "tokenizer_encode.onnx",
+    "decode": "tokenizer_decode.onnx",
+    "prefill": "kronos_prefill.onnx",
+    "decode_s1": "kronos_decode_s1.onnx",
+    "decode_s2": "kronos_decode_s2.onnx",
+}
+ONNX_CONFIG = "kronos_onnx.json"
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    probs = np.exp(logits)
+    return probs / probs.sum(axis=-1, keepdims=True)
+
+
+def _column(value, batch_size, dtype):
+    return np.broadcast_to(np.asarray(value, dtype=dtype).reshape(-1, 1), (batch_size, 1))
+
+
+def sample_from_logits(logits, temperature=1.0, top_k=0, top_p=1.0, rng=None):
+    """
+    NumPy counterpart of `model.kronos.sample_from_logits`: samples one token per row after temperature and
+    top-k/top-p filtering, with the same semantics as `top_k_top_p_filtering` (top_k > 0 takes precedence).
+
+    Args:
+        logits (np.ndarray): Shape [batch_size, vocab_size].
+        temperature, top_k, top_p: Scalars, or one value per row.
+        rng (np.random.Generator, optional): Random generator. Defaults to a fresh one.
+
+    Returns:
+        np.ndarray: Sampled token ids. Shape: [batch_size, 1]
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    batch_size, vocab_size = logits.shape
+    logits = logits.astype(np.float64) / _column(temperature, batch_size, np.float64)
+    top_k = _column(top_k, batch_size, np.int64)
+    top_p = _column(top_p, batch_size, np.float64)
+
+    order = np.argsort(-logits, axis=-1, kind="stable")
+    sorted_logits = np.take_along_axis(logits, order, axis=-1)
+    # top-k: keep everything tied with the k-th largest logit.
+    kth = np.take_along_axis(sorted_logits, np.clip(top_k, 1, vocab_size) - 1, axis=-1)
+    remove_k = sorted_logits < kth
+    # top-p: drop tokens after the cumulative probability first exceeds top_p (the first one is always kept).
+    cumulative = np.cumsum(_softmax(sorted_logits), axis=-1)
+    remove_p = np.zeros_like(remove_k)
+    remove_p[:, 1:] = cumulative[:, :-1] > top_p
+    remove = np.where(top_k > 0, remove_k, remove_p & (top_p < 1.0))
+
+    probs = _softmax(np.where(remove, -np.inf, sorted_logits))
+    u = rng.random((batch_size, 1)) * probs.sum(axis=-1, keepdims=True)
+    picked = np.minimum((np.cumsum(probs, axis=-1) < u).sum(axis=-1, keepdims=True), vocab_size - 1)
+    return np.take_along_axis(order, picked, axis=-1)
+
+
+class OnnxKronosRuntime:
+    """
+    Runs exported Kronos graphs (see `model.onnx_export.export_onnx`) with onnxruntime, using only NumPy.
+
+    Mirrors `generate_paths` with `use_cache=True`: the context is prefilled once per series, the KV cache
+    is forked into the sampling streams and each step runs only the newly sampled token; past `max_context`
+    the window is recomputed with the prefill graph.
+
+    Args:
+        onnx_dir (str): Directory holding the exported graphs.
+        num_threads (int, optional): onnxruntime intra-op threads. Defaults to onnxruntime's choice.
+        providers (Sequence[str], optional): Execution providers. Defaults to ("CPUExecutionProvider",).
+        seed (int, optional): Seed of the sampling generator. Defaults to None.
+    """
+
+    def __init__(self, onnx_dir, num_threads=None, providers=("CPUExecutionProvider",), seed=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.sessions = {
+            name: ort.InferenceSession(os.path.join(onnx_dir, filename), options, providers=list(providers))
+            for name, filename in ONNX_FILES.items()
+        }
+        with open(os.path.join(onnx_dir, ONNX_CONFIG)) as f:
+            self.config = json.load(f)
+        self.rng = np.random.default_rng(seed)
+
+    def run(self, name, **feeds):
+        return self.sessions[name].run(None, {key: np.ascontiguousarray(value) for key, value in feeds.items()})
+
+    def encode(self, x, padding_mask):
+        return self.run("encode", x=x, padding_mask=padding_mask)
+
+    def decode(self, s1_ids, s2_ids, padding_mask):
+        return self.run("decode", s1_ids=s1_ids, s2_ids=s2_ids, padding_mask=padding_mask)[0]
+
+    def prefill(self, s1_ids, s2_ids, stamp, padding_mask):
+        return self.run("prefill", s1_ids=s1_ids, s2_ids=s2_ids, stamp=stamp, padding_mask=padding_mask)
+
+    def decode_s1(self, s1_ids, s2_ids, stamp, padding_mask, past_k, past_v):
+        return self.run("decode_s1", s1_ids=s1_ids, s2_ids=s2_ids, stamp=stamp, padding_mask=padding_mask, past_k=past_k, past_v=past_v)
+
+    def decode_s2(self, hidden, s1_ids, context_kv, padding_mask):
+        return self.run("decode_s2", hidden=hidden, s1_ids=s1_ids, context_kv=context_kv, padding_mask=padding_mask)[0]
+
+    def generate(self, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5,
+                 padding_mask=None, pred_lens=None):
+        """
+        Same contract as `auto_regressive_inference`, on NumPy arrays.
+
+        Returns:
+            np.ndarray: Decoded sequence averaged over `sample_count`. Shape: [batch_size, window, d_in]
+        """
+        x = np.clip(x.astype(np.float32), -clip, clip)
+        x_stamp, y_stamp = x_stamp.astype(np.float32), y_stamp.astype(np.float32)
+        num_series, initial_seq_len, _ = x.shape
+        mask = np.zeros((num_series, initial_seq_len), dtype=bool) if padding_mask is None else padding_mask.astype(bool)
+        batch_size = num_series * sample_count
+        total_seq_len = initial_seq_len + pred_len
+        T, top_k, top_p = (v if np.isscalar(v) else np.repeat(np.asarray(v), sample_count) for v in (T, top_k, top_p))
+
+        x_token = self.encode(x, mask)
+        full_pre = np.empty((batch_size, total_seq_len), dtype=np.int64)
+        full_post = np.empty((batch_size, total_seq_len), dtype=np.int64)
+        full_pre[:, :initial_seq_len] = np.repeat(x_token[0], sample_count, axis=0)
+        full_post[:, :initial_seq_len] = np.repeat(x_token[1], sample_count, axis=0)
+        full_stamp = np.repeat(np.concatenate([x_stamp, y_stamp], axis=1), sample_count, axis=0)
+        full_mask = np.zeros((batch_size, total_seq_len), dtype=bool)
+        full_mask[:, :initial_seq_len] = np.repeat(mask, sample_count, axis=0)
+
+        use_cache = initial_seq_len <= max_context
+        if use_cache:
+            s1_logits, context, context_kv, past_k, past_v = self.prefill(x_token[0], x_token[1], x_stamp, mask)
+            s1_logits = np.repeat(s1_logits[:, -1:], sample_count, axis=0)
+            hidden = np.repeat(context[:, -1:], sample_count, axis=0)
+            context_kv = np.repeat(context_kv, sample_count, axis=0)
+            past_k, past_v = np.repeat(past_k, sample_count, axis=1), np.repeat(past_v, sample_count, axis=1)
+
+        for i in range(pred_len):
+            current_seq_len = initial_seq_len + i
+            if use_cache and current_seq_len <= max_context:
+                context_mask = full_mask[:, :current_seq_len]
+                if i > 0:
+                    prev = current_seq_len - 1
+                    s1_logits, hidden, new_kv, past_k, past_v = self.decode_s1(
+                        full_pre[:, prev:current_seq_len], full_post[:, prev:current_seq_len], full_stamp[:, prev:current_seq_len],
+                        context_mask, past_k, past_v)
+                    context_kv = np.concatenate([context_kv, new_kv], axis=1)
+            else:
+                start = max(0, current_seq_len - max_context)
+                context_mask = full_mask[:, start:current_seq_len]
+                s1_logits, context, context_kv, _, _ = self.prefill(full_pre[:, start:current_seq_len], full_post[:, start:current_seq_len],
+                                                                    full_stamp[:, start:current_seq_len], context_mask)
+                hidden = context[:, -1:]
+
+            sample_pre = sample_from_logits(s1_logits[:, -1], T, top_k, top_p, self.rng)
+            s2_logits = self.decode_s2(hidden, sample_pre, context_kv, context_mask)[:, 0]
+            sample_post = sample_from_logits(s2_logits, T, top_k, top_p, self.rng)
+            full_pre[:, current_seq_len] = sample_pre[:, 0]
+            full_post[:, current_seq_len] = sample_post[:, 0]
+
+        context_start = max(0, total_seq_len - max_context)
+        decode_mask = full_mask[:, context_start:]
+        if pred_lens is not None:
+            # Mask every series down to the window it would have decoded on its own (see `generate_paths`).
+            series_starts = np.repeat(np.maximum(initial_seq_len + np.asarray(pred_lens) - max_context, 0), sample_count)
+            context_start = int(series_starts.min())
+            positions = np.arange(context_start, total_seq_len)
+            decode_mask = (positions[None, :] < series_starts[:, None]) | full_mask[:, context_start:]
+
+        z = self.decode(full_pre[:, context_start:], full_post[:, context_start:], decode_mask)
+        return z.reshape(num_series, sample_count, z.shape[1], z.shape[2]).mean(axis=1)
@@ -0,0 +1,218 @@
+import itertools
+import os
+import pickle
+import queue
+import threading
+import time
+
+import torch
+import torch.multiprocessing as mp
+
+
+def _chunk(value, start, end):
+    # Per-series arguments are sliced along with the series; shared scalars are passed on as is.
+    return value[start:end] if isinstance(value, (list, tuple)) else value
+
+
+def _worker(worker_id, predictor, tasks, results, num_threads, cpus, seed):
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(num_threads)
+    # Forked workers inherit the parent's RNG state; reseed so their samples are independent.
+    if seed is None:
+        torch.seed()
+    else:
+        torch.manual_seed(seed + worker_id)
+    results.put((None, worker_id, 0.0, True, os.getpid()))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, kwargs = task
+        start = time.perf_counter()
+        try:
+            with torch.no_grad():
+                payload, ok = predictor.predict_batch(**kwargs), True
+        except Exception as exc:
+            try:
+                pickle.dumps(exc)
+                payload = exc
+            except Exception:
+                payload = RuntimeError(f"{type(exc).__name__}: {exc}")
+            ok = False
+        results.put((task_id, worker_id, time.perf_counter() - start, ok, payload))
+
+
+class PredictorPool:
+    """
+    Pool of worker processes that each run a copy of a `KronosPredictor`, to scale CPU inference past the
+    intra-op parallelism of a single process.
+
+    The model and tokenizer weights are moved to shared memory once (`share_memory`), so every worker maps the
+    same physical pages instead of holding its own copy. With `share_memory=False`, workers rely on fork's
+    copy-on-write instead, which keeps memory-mapped checkpoints (`load_pretrained` on CPU) mapped and shared
+    as long as nothing writes to them. Build the predictor (packing, quantization, adapters) before creating
+    the pool; later changes in the parent are not seen by the workers.
+
+    Each worker pins torch to `num_threads` intra-op threads and, optionally, to its own CPU cores. Work is
+    submitted with `predict_batch`, which splits the series into chunks of at most `chunk_size` that idle
+    workers take from a shared queue, and reassembles the forecasts in order. Calls from several threads run
+    concurrently. `stats` reports the busy time and utilization of every worker.
+
+    Args:
+        predictor (KronosPredictor): Predictor run by the workers, on the CPU.
+        n_workers (int, optional): Number of worker processes. Defaults to 2.
+        num_threads (int, optional): Intra-op threads per worker. Defaults to the CPU count divided by `n_workers`.
+        cpu_affinity (bool or Sequence[Sequence[int]], optional): True pins worker i to the i-th block of
+            `num_threads` cores, a sequence gives the cores of every worker explicitly. Defaults to None (unpinned).
+        share_memory (bool, optional): Whether to move the weights to shared memory. Defaults to True.
+        chunk_size (int, optional): Maximum number of series per task. Defaults to spreading each call evenly over the workers.
+        start_method (str, optional): Multiprocessing start method; "spawn" requires a picklable predictor. Defaults to "fork".
+        seed (int, optional): Worker i seeds torch with `seed + i`. Defaults to None (random seeds).
+    """
+
+    def __init__(self, predictor, n_workers=2, num_threads=None, cpu_affinity=None, share_memory=True, chunk_size=None,
+                 start_method="fork", seed=None):
+        if n_workers < 1:
+            raise ValueError(f"n_workers must be at least 1, got {n_workers}.")
+        if torch.device(predictor.device).type != "cpu":
+            raise ValueError("PredictorPool runs CPU predictors only.")
+        self.predictor = predictor
+        self.n_workers = n_workers
+        self.num_threads = num_threads or max(1, (os.cpu_count() or 1) // n_workers)
+        self.chunk_size = chunk_size
+        if cpu_affinity is True:
+            cores = sorted(os.sched_getaffinity(0))
+            if len(cores) < n_workers * self.num_threads:
+                raise ValueError(f"{n_workers} workers x {self.num_threads} threads need more than the {len(cores)} available cores.")
+            cpu_affinity = [cores[i * self.num_threads:(i + 1) * self.num_threads] for i in range(n_workers)]
+        elif cpu_affinity is not None and len(cpu_affinity) != n_workers:
+            raise ValueError(f"cpu_affinity must list the cores of all {n_workers} workers.")
+        self.cpu_affinity = cpu_affinity
+
+        if share_memory:
+            predictor.model.share_memory()
+            predictor.tokenizer.share_memory()
+
+        context = mp.get_context(start_method)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self.workers = [
+            context.Process(target=_worker, daemon=True, name=f"kronos-worker-{i}",
+                            args=(i, predictor, self._tasks, self._results, self.num_threads,
+                                  cpu_affinity[i] if cpu_affinity is not None else None, seed))
+            for i in range(n_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._finished = {}  # Results received for tasks of other callers
+        self.pids = [None] * n_workers
+        for _ in range(n_workers):
+            _, worker_id, _, _, pid = self._get_result()
+            self.pids[worker_id] = pid
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Starts a new utilization window."""
+        self._started = time.perf_counter()
+        self._busy = [0.0] * self.n_workers
+        self._tasks_done = [0] * self.n_workers
+
+    def stats(self):
+        """
+        Per-worker load since construction or the last `reset_stats`.
+
+        Returns:
+            List[dict]: One dict per worker with its pid, cores, tasks run, busy seconds and utilization (busy share of wall time).
+        """
+        elapsed = time.perf_counter() - self._started
+        return [{
+            'worker': i,
+            'pid': self.pids[i],
+            'cpus': list(self.cpu_affinity[i]) if self.cpu_affinity is not None else None,
+            'tasks': self._tasks_done[i],
+            'busy_seconds': self._busy[i],
+            'utilization': self._busy[i] / elapsed if elapsed > 0 else 0.0,
+        } for i in range(self.n_workers)]
+
+    def _get_result(self):
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [w.name for w in self.workers if not w.is_alive()]
+                if dead:
+                    raise RuntimeError(f"PredictorPool workers exited unexpectedly: {', '.join(dead)}.")
+
+    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, adapter=None):
+        """
+        `KronosPredictor.predict_batch` spread over the workers; per-series arguments may be lists, as there.
+
+        Returns:
+            List[pd.DataFrame]: Forecasts in the order of `df_list`.
+        """
+        n = len(df_list)
+        if not (len(x_timestamp_list) == len(y_timestamp_list) == n):
+            raise ValueError("df_list, x_timestamp_list and y_timestamp_list must have the same length.")
+        if self.workers is None:
+            raise RuntimeError("PredictorPool is closed.")
+        chunk_size = self.chunk_size or max(1, -(-n // self.n_workers))
+        task_ids = {}
+        for start in range(0, n, chunk_size):
+            end = min(start + chunk_size, n)
+            kwargs = dict(df_list=df_list[start:end], x_timestamp_list=x_timestamp_list[start:end], y_timestamp_list=y_timestamp_list[start:end],
+                          **{name: _chunk(value, start, end) for name, value in
+                             dict(pred_len=pred_len, T=T, top_k=top_k, top_p=top_p, adapter=adapter).items()},
+                          sample_count=sample_count, verbose=False)
+            task_id = next(self._ids)
+            task_ids[task_id] = start
+            self._tasks.put((task_id, kwargs))
+
+        outputs, error = {}, None
+        while len(outputs) < len(task_ids):
+            with self._lock:
+                for task_id in task_ids.keys() & self._finished.keys():
+                    outputs[task_id] = self._finished.pop(task_id)
+                if len(outputs) == len(task_ids):
+                    break
+                task_id, worker_id, busy, ok, payload = self._get_result()
+                self._busy[worker_id] += busy
+                self._tasks_done[worker_id] += 1
+                (outputs if task_id in task_ids else self._finished)[task_id] = (ok, payload)
+
+        results = []
+        for task_id in sorted(task_ids, key=task_ids.get):
+            ok, payload = outputs[task_id]
+            if not ok:
+                error = error or payload
+            else:
+                results.extend(payload)
+        if error is not None:
+            raise error
+        return results
+
+    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, adapter=None):
+        """`KronosPredictor.predict` on one of the workers."""
+        return self.predict_batch([df], [x_timestamp], [y_timestamp], pred_len, T, top_k, top_p, sample_count, adapter)[0]
+
+    def close(self):
+        """Stops the workers after their current tasks."""
+        if self.workers is None:
+            return
+        for _ in self.workers:
+            self._tasks.put(None)
+        for worker in self.workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,50 @@
+import torch
+import torch.nn as nn
+
+from model.module import unpack_weights
+
+
+QUANTIZE_MODES = ("int8",)
+
+
+def _quantize_linears(module):
+    unpack_weights(module)  # Packed projections would bypass the quantized layers.
+    torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def quantize(model=None, tokenizer=None, mode="int8"):
+    """
+    Applies dynamic INT8 quantization for CPU inference, in place.
+
+    Quantized are the `nn.Linear` layers of the Transformer blocks (attention projections and
+    `FeedForward`) and the `DualHead` of `Kronos`, and those of the tokenizer decoder blocks. Weights are
+    stored as INT8 and activations are quantized on the fly per batch. Everything that selects discrete
+    tokens or feeds them in stays in full precision: the token and temporal embeddings, `RMSNorm`, the
+    dependency-aware s2 layer, and the tokenizer encoder, `quant_embed` and `BSQuantizer`, so encoding a
+    series yields exactly the same tokens as before.
+
+    Quantized models are meant for inference only; they cannot be moved to a GPU, trained or saved as
+    regular checkpoints.
+
+    Args:
+        model (Kronos, optional): Model to quantize. Defaults to None.
+        tokenizer (KronosTokenizer, optional): Tokenizer whose decoder is quantized. Defaults to None.
+        mode (str, optional): Quantization mode; only "int8" is supported. Defaults to "int8".
+
+    Returns:
+        Tuple[Kronos, KronosTokenizer]: The quantized model and tokenizer (the same objects).
+    """
+    if mode not in QUANTIZE_MODES:
+        raise ValueError(f"Unsupported quantization mode '{mode}', expected one of {QUANTIZE_MODES}.")
+    for module in (model, tokenizer):
+        if module is not None and any(p.device.type != "cpu" for p in module.parameters()):
+            raise ValueError("Dynamic INT8 quantization is only supported for models on the CPU.")
+
+    if model is not None:
+        model.eval()
+        _quantize_linears(model.transformer)
+        _quantize_linears(model.head)
+    if tokenizer is not None:
+        tokenizer.eval()
+        _quantize_linears(tokenizer.decoder)
+    return model, tokenizer
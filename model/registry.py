@@ -0,0 +1,188 @@
+import json
+import mmap
+import os
+import struct
+import threading
+
+import torch
+
+from model.kronos import Kronos, KronosTokenizer
+
+# safetensors dtype names -> torch dtypes.
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8, "U8": torch.uint8, "BOOL": torch.bool,
+}
+WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+
+def resolve_checkpoint(name_or_path, revision=None, cache_dir=None, local_files_only=None):
+    """
+    Resolves a checkpoint to a local directory, offline first: an existing directory is used as is, then the
+    local Hugging Face cache is tried without any network access, and only on a cache miss is the checkpoint
+    downloaded (config and weights only).
+
+    Args:
+        name_or_path (str): Local directory or Hugging Face repo id.
+        revision (str, optional): Branch, tag or commit of a repo id. Defaults to None.
+        cache_dir (str, optional): Hugging Face cache directory. Defaults to the hub default.
+        local_files_only (bool, optional): Never download. Defaults to `HF_HUB_OFFLINE`.
+
+    Returns:
+        str: Directory containing `config.json` and the weights.
+    """
+    if os.path.isdir(name_or_path):
+        return name_or_path
+
+    from huggingface_hub import constants, snapshot_download
+    from huggingface_hub.utils import LocalEntryNotFoundError
+
+    if local_files_only is None:
+        local_files_only = constants.HF_HUB_OFFLINE
+    kwargs = dict(repo_id=name_or_path, revision=revision, cache_dir=cache_dir, allow_patterns=["config.json", *WEIGHT_FILES])
+    try:
+        return snapshot_download(local_files_only=True, **kwargs)
+    except LocalEntryNotFoundError:
+        if local_files_only:
+            raise FileNotFoundError(f"{name_or_path} (revision {revision}) is not in the local cache and downloads are disabled.")
+    return snapshot_download(**kwargs)
+
+
+def mmap_safetensors(path):
+    """
+    Maps a safetensors file into memory and returns its tensors as zero-copy views of the mapping.
+
+    The mapping is copy-on-write (`ACCESS_COPY`): the file is never modified, and untouched pages stay in the
+    shared page cache, so every process mapping the same file (including workers forked after loading) reads
+    the same physical memory. Only pages written to, e.g. by in-place updates, are copied.
+
+    Returns:
+        dict: Tensor name -> CPU tensor.
+    """
+    with open(path, "rb") as f:
+        header_len, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_len
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        count = (end - begin) // dtype.itemsize
+        # Each tensor keeps the mapping alive; it is unmapped once the last one is freed.
+        tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + begin) if count else torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+
+def load_state_dict(directory):
+    """Loads the weights in `directory` memory-mapped: safetensors via `mmap_safetensors`, else a `.bin` via `torch.load(mmap=True)`."""
+    path = os.path.join(directory, WEIGHT_FILES[0])
+    if os.path.exists(path):
+        return mmap_safetensors(path)
+    return torch.load(os.path.join(directory, WEIGHT_FILES[1]), map_location="cpu", mmap=True, weights_only=True)
+
+
+def load_checkpoint(cls, directory):
+    """
+    Builds `cls` from the `config.json` in `directory` and assigns its memory-mapped weights without copying.
+
+    Returns:
+        nn.Module: The model, in eval mode, with parameters backed by the checkpoint file.
+    """
+    with open(os.path.join(directory, "config.json")) as f:
+        config = json.load(f)
+    model = cls(**config)
+    model.load_state_dict(load_state_dict(directory), assign=True)
+    return model.eval()
+
+
+class ModelRegistry:
+    """
+    In-process cache of loaded tokenizers and models.
+
+    Checkpoints are resolved with `resolve_checkpoint` and loaded with `load_checkpoint`, and every loaded
+    module is kept per (class, checkpoint, revision, device, dtype): repeated loads return the same module
+    instantly. CPU modules without a dtype cast are backed by the memory-mapped checkpoint, so loading them in
+    a parent process before forking workers shares the weights between all workers. Packing (`pack_weights`, e.g.
+    by `KronosPredictor(pack_weights=True)`) copies the packed projections out of the mapping, so build such
+    predictors before forking as well to keep those copies shared.
+
+    Returned modules are shared by every caller. `KronosPredictor` evicts the modules it casts, quantizes or
+    moves to another device (see `evict`), so later loads get unchanged weights again. Other in-place changes
+    (adapters, exit heads, training) are seen by all callers; use `clear` or a separate registry for modules
+    that need to diverge.
+
+    Args:
+        cache_dir (str, optional): Hugging Face cache directory. Defaults to the hub default.
+        local_files_only (bool, optional): Never download. Defaults to `HF_HUB_OFFLINE`.
+    """
+
+    def __init__(self, cache_dir=None, local_files_only=None):
+        self.cache_dir = cache_dir
+        self.local_files_only = local_files_only
+        self._modules = {}
+        self._lock = threading.RLock()
+
+    def get(self, cls, name_or_path, revision=None, device="cpu", dtype=None):
+        """
+        Returns the cached `cls` loaded from `name_or_path` on `device` in `dtype`, loading it on first use.
+
+        Args:
+            cls (type): `KronosTokenizer`, `Kronos` or another class with a `config.json` checkpoint.
+            name_or_path (str): Local directory or Hugging Face repo id.
+            revision (str, optional): Branch, tag or commit of a repo id. Defaults to None.
+            device (str or torch.device, optional): Target device. Defaults to "cpu".
+            dtype (torch.dtype or str, optional): Target floating-point dtype. Defaults to the checkpoint's.
+        """
+        device = torch.device(device)
+        dtype = getattr(torch, dtype) if isinstance(dtype, str) else dtype
+        key = (cls, name_or_path, revision, str(device), dtype)
+        with self._lock:
+            module = self._modules.get(key)
+            if module is None:
+                directory = resolve_checkpoint(name_or_path, revision, self.cache_dir, self.local_files_only)
+                module = load_checkpoint(cls, directory)
+                if device.type != "cpu" or dtype is not None:
+                    module = module.to(device=device, dtype=dtype)
+                # Lets `release_module` find the registries handing out this module.
+                module._registries = [self]
+                self._modules[key] = module
+            return module
+
+    def evict(self, module):
+        """Drops every entry holding `module`, so the next load builds a fresh one; callers keep theirs."""
+        with self._lock:
+            for key in [key for key, cached in self._modules.items() if cached is module]:
+                del self._modules[key]
+
+    def load(self, model_id, tokenizer_id, device="cpu", dtype=None, model_revision=None, tokenizer_revision=None):
+        """
+        Returns a cached (model, tokenizer) pair. The tokenizer always stays in fp32; `KronosPredictor` runs it
+        under autocast when a reduced-precision dtype is used.
+
+        Returns:
+            Tuple[Kronos, KronosTokenizer]
+        """
+        tokenizer = self.get(KronosTokenizer, tokenizer_id, tokenizer_revision, device)
+        model = self.get(Kronos, model_id, model_revision, device, dtype)
+        return model, tokenizer
+
+    def clear(self):
+        """Drops every cached module; their memory is released once callers drop theirs."""
+        with self._lock:
+            self._modules.clear()
+
+    def __len__(self):
+        return len(self._modules)
+
+
+default_registry = ModelRegistry()
+
+
+def load_pretrained(model_id, tokenizer_id, device="cpu", dtype=None, model_revision=None, tokenizer_revision=None):
+    """`ModelRegistry.load` on the process-wide `default_registry`."""
+    return default_registry.load(model_id, tokenizer_id, device, dtype, model_revision, tokenizer_revision)
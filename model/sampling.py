@@ -0,0 +1,174 @@
+import torch
+import torch.nn.functional as F
+
+
+def top_k_top_p_filtering(
+        logits,
+        top_k: int = 0,
+        top_p: float = 1.0,
+        filter_value: float = -float("Inf"),
+        min_tokens_to_keep: int = 1,
+):
+    """Filter a distribution of logits using top-k and/or nucleus (top-p) filtering
+    Args:
+        logits: logits distribution shape (batch size, vocabulary size)
+        if top_k > 0: keep only top k tokens with highest probability (top-k filtering).
+        if top_p < 1.0: keep the top tokens with cumulative probability >= top_p (nucleus filtering).
+            Nucleus filtering is described in Holtzman et al. (http://arxiv.org/abs/1904.09751)
+        Make sure we keep at least min_tokens_to_keep per batch example in the output
+    From: https://gist.github.com/thomwolf/1a5a29f6962089e871b94cbd09daf317
+    """
+    if top_k > 0:
+        top_k = min(max(top_k, min_tokens_to_keep), logits.size(-1))  # Safety check
+        # Remove all tokens with a probability less than the last token of the top-k
+        indices_to_remove = logits < torch.topk(logits, top_k)[0][..., -1, None]
+        logits[indices_to_remove] = filter_value
+        return logits
+
+    if top_p < 1.0:
+        sorted_logits, sorted_indices = torch.sort(logits, descending=True)
+        cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
+
+        # Remove tokens with cumulative probability above the threshold (token with 0 are kept)
+        sorted_indices_to_remove = cumulative_probs > top_p
+        if min_tokens_to_keep > 1:
+            # Keep at least min_tokens_to_keep (set to min_tokens_to_keep-1 because we add the first one below)
+            sorted_indices_to_remove[..., :min_tokens_to_keep] = 0
+        # Shift the indices to the right to keep also the first token above the threshold
+        sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
+        sorted_indices_to_remove[..., 0] = 0
+
+        # scatter sorted tensors to original indexing
+        indices_to_remove = sorted_indices_to_remove.scatter(1, sorted_indices, sorted_indices_to_remove)
+        logits[indices_to_remove] = filter_value
+        return logits
+
+
+def filtered_probs(logits, temperature=1.0, top_k=0, top_p=1.0):
+    """
+    Full sampling distribution after temperature and top-k/top-p filtering (the reference path).
+
+    Returns:
+        torch.Tensor: Probabilities. Shape: [batch_size, vocab_size]
+    """
+    logits = logits.float() / temperature
+    if top_k > 0 or top_p < 1.0:
+        logits = top_k_top_p_filtering(logits, top_k=top_k, top_p=top_p)
+    return F.softmax(logits, dim=-1)
+
+
+def _row_param(value, logits, dtype=None):
+    """Per-row parameters become [batch_size, 1] columns; Python scalars are returned unchanged."""
+    if torch.is_tensor(value):
+        return value.to(device=logits.device, dtype=dtype or logits.dtype).reshape(-1, 1)
+    return value
+
+
+def _exponential_race(scores):
+    """
+    Gumbel-max trick: argmax(log p + Gumbel) == argmax(p / E) with E ~ Exp(1), which samples from p
+    without a softmax normalisation or `torch.multinomial`. `scores` are unnormalised log-probabilities.
+    """
+    noise = torch.empty_like(scores).exponential_().clamp_(min=torch.finfo(scores.dtype).tiny).log_()
+    return (scores - noise).argmax(dim=-1, keepdim=True)
+
+
+class Sampler:
+    """
+    Batched single-step token sampler.
+
+    Strategies:
+        - 'nucleus' (default): takes the `candidates` most likely tokens with a partial `topk` and applies
+          top-k/top-p inside them, then samples with the Gumbel-max trick. The candidate set grows whenever
+          a row's nucleus could extend past it, so the result has the same distribution as the reference path.
+        - 'gumbel': Gumbel-max over the full tempered vocabulary with optional top-k; no top-p support.
+        - 'greedy': argmax of the logits.
+        - 'multinomial': the reference path (`top_k_top_p_filtering`, softmax and `torch.multinomial`).
+
+    Filtering follows `top_k_top_p_filtering`: rows with top_k > 0 use top-k only, the others use top-p.
+    `temperature`, `top_k` and `top_p` may be Python scalars or per-row tensors of shape [batch_size], so
+    requests with different sampling parameters can share one batch.
+
+    Args:
+        strategy (str, optional): One of 'nucleus', 'gumbel', 'greedy' or 'multinomial'. Defaults to 'nucleus'.
+        candidates (int, optional): Initial candidate set size of the 'nucleus' strategy. Defaults to 64.
+    """
+
+    STRATEGIES = ('nucleus', 'gumbel', 'greedy', 'multinomial')
+
+    def __init__(self, strategy='nucleus', candidates=64):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown sampling strategy '{strategy}', expected one of {self.STRATEGIES}.")
+        self.strategy = strategy
+        self.candidates = candidates
+
+    def __call__(self, logits, temperature=1.0, top_k=0, top_p=1.0):
+        """
+        Args:
+            logits (torch.Tensor): Shape: [batch_size, vocab_size]
+            temperature (float or torch.Tensor): Sampling temperature.
+            top_k (int or torch.Tensor): Top-k threshold, 0 to disable.
+            top_p (float or torch.Tensor): Nucleus threshold, 1.0 to disable.
+
+        Returns:
+            torch.Tensor: Sampled token ids. Shape: [batch_size, 1]
+        """
+        if self.strategy == 'greedy':
+            return logits.argmax(dim=-1, keepdim=True)
+        if self.strategy == 'multinomial':
+            if torch.is_tensor(temperature) or torch.is_tensor(top_k) or torch.is_tensor(top_p):
+                raise ValueError("The 'multinomial' strategy only supports scalar sampling parameters.")
+            return torch.multinomial(filtered_probs(logits, temperature, top_k, top_p), num_samples=1)
+
+        logits = logits / _row_param(temperature, logits)
+        top_k = _row_param(top_k, logits, torch.long)
+        top_p = _row_param(top_p, logits)
+
+        if self.strategy == 'gumbel':
+            if bool(torch.as_tensor(top_p < 1.0).any()):
+                raise ValueError("The 'gumbel' strategy does not support top_p < 1; use 'nucleus'.")
+            if bool(torch.as_tensor(top_k > 0).any()):
+                logits = logits.masked_fill(logits < self._kth_value(logits, top_k), -float("Inf"))
+            return _exponential_race(logits)
+        return self._nucleus(logits, top_k, top_p)
+
+    @staticmethod
+    def _kth_value(logits, top_k):
+        # Threshold of each row's k-th largest logit; -inf (keep everything) where top_k == 0.
+        if not torch.is_tensor(top_k):
+            return logits.topk(min(top_k, logits.size(-1)), dim=-1).values[..., -1:]
+        k_max = min(int(top_k.max()), logits.size(-1))
+        values = logits.topk(k_max, dim=-1).values
+        kth = values.gather(-1, (top_k.clamp(1, k_max) - 1))
+        return kth.masked_fill(top_k == 0, -float("Inf"))
+
+    def _nucleus(self, logits, top_k, top_p):
+        if not torch.is_tensor(top_k) and not torch.is_tensor(top_p) and top_k <= 0 and top_p >= 1.0:
+            return _exponential_race(logits)
+
+        vocab_size = logits.size(-1)
+        n = min(vocab_size, max(self.candidates, int(top_k.max()) if torch.is_tensor(top_k) else top_k))
+        top_k = torch.as_tensor(top_k, device=logits.device)
+        top_p = torch.as_tensor(top_p, dtype=logits.dtype, device=logits.device)
+        use_top_k = top_k > 0
+        unfiltered = ~use_top_k & (top_p >= 1.0)
+
+        log_norm = logits.logsumexp(dim=-1, keepdim=True)
+        while True:
+            values, indices = logits.topk(n, dim=-1)
+            probs = (values - log_norm).exp()
+            cumulative = probs.cumsum(dim=-1)
+            # Rows applying top-p must have left the nucleus within the candidates (see top_k_top_p_filtering).
+            nucleus_rows = ~use_top_k & ~unfiltered
+            incomplete = nucleus_rows & (cumulative[..., -1:] <= top_p)
+            if n == vocab_size or not bool(incomplete.any()):
+                break
+            n = min(vocab_size, n * 4)
+
+        rank = torch.arange(n, device=logits.device)
+        keep = torch.where(use_top_k, rank < top_k, cumulative - probs <= top_p)
+        choice = _exponential_race(values.masked_fill(~keep, -float("Inf")))
+        sample = indices.gather(-1, choice)
+        if bool(unfiltered.any()):
+            sample = torch.where(unfiltered, _exponential_race(logits), sample)
+        return sample
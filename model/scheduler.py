@@ -0,0 +1,279 @@
+import itertools
+from collections import deque
+from dataclasses import dataclass
+
+import pandas as pd
+import torch
+
+from model.kronos import sample_from_logits
+from model.module import PagedKVCache, SlotKVCacheSet
+
+
+@dataclass
+class ScheduledRequest:
+    """One request of a `ContinuousBatchScheduler`, from submission until it is retired."""
+    request_id: int
+    prepared: tuple  # (x_norm, x_stamp, y_stamp, x_mean, x_std), see KronosPredictor._prepare_series
+    y_timestamp: pd.Index
+    pred_len: int
+    T: float
+    top_k: int
+    top_p: float
+    sample_count: int
+    stop: object = None
+    step: int = 0
+    context_len: int = 0
+    tokens: tuple = None  # (s1_ids, s2_ids), each [sample_count, context_len + pred_len]
+    y_stamp: torch.Tensor = None
+    rows: list = None
+    pages: int = 0  # Pages the request may hold at most, reserved against `max_pages`
+
+
+class ContinuousBatchScheduler:
+    """
+    Iteration-level scheduler around the KV-cached decode loop of `auto_regressive_inference`.
+
+    Every `step` runs one decode step for all running sequences as a single batch: waiting requests are
+    admitted (prefilled together and appended to the batch) as soon as there are free rows, and finished
+    ones are retired immediately, so a long horizon never holds back the short requests batched with it.
+    Each request has its own `pred_len`, sampling parameters, `sample_count` (one row per sampling stream)
+    and optional `stop` criterion.
+
+    Rows keep their own lengths and positions in the self-attention caches, and the s2 cross-attention
+    keys/values are kept in the same slot layout. Sequences longer than `max_context` attend to their
+    latest `max_context` positions, as with `KronosPredictor(sliding_window=True)`; shorter ones reproduce
+    `predict` under the same sampling.
+
+    By default every row preallocates `max_context` positions (`SlotKVCacheSet`). With `page_size`, the
+    caches are block-paged instead (`PagedKVCache`): rows only hold pages for the positions they have, so
+    the memory held between steps follows the actual sequence lengths, optionally capped by `max_pages` and
+    stored in a reduced `cache_dtype`. Attention still works on dense keys and values, gathered one layer
+    at a time into a reused scratch buffer; its size (one layer of the running batch at its longest
+    sequence) adds to the pages, so paging pays off when sequence lengths vary. Requests are only admitted
+    when the pages they may need are available. See `memory_stats` for usage.
+
+    Args:
+        predictor (KronosPredictor): Supplies the model, tokenizer, device, `max_context`, `clip` and dtype.
+        max_batch_size (int, optional): Maximum number of rows (sampling streams) decoded per step. Defaults to 64.
+        page_size (int, optional): Positions per KV-cache page; None for unpaged caches. Defaults to None.
+        max_pages (int, optional): Page budget of the paged caches. Defaults to None (unbounded).
+        cache_dtype (torch.dtype or str, optional): Storage dtype of the paged caches, e.g. "float16". Defaults to the model's.
+    """
+
+    def __init__(self, predictor, max_batch_size=64, page_size=None, max_pages=None, cache_dtype=None):
+        self.predictor = predictor
+        self.model = predictor.model
+        self.tokenizer = predictor.tokenizer
+        self.device = predictor.device
+        self.max_context = predictor.max_context
+        self.max_batch_size = max_batch_size
+        self.waiting = deque()
+        self.running = []
+        self.owners = []  # Request of every batch row
+        n_layers, context_dim = len(self.model.transformer), 2 * self.model.d_model
+        if page_size is not None:
+            cache_dtype = getattr(torch, cache_dtype) if isinstance(cache_dtype, str) else cache_dtype
+            self.cache = PagedKVCache(n_layers, self.max_context, page_size, max_pages, cache_dtype, context_dim)
+        elif max_pages is not None or cache_dtype is not None:
+            raise ValueError("max_pages and cache_dtype require a page_size.")
+        else:
+            self.cache = SlotKVCacheSet(n_layers, self.max_context, context_dim)
+        self.reserved_pages = 0
+        self.steps = 0  # Decode steps run so far
+        self._ids = itertools.count()
+        self._rows = None  # Per-row state, allocated on first admission
+
+    @property
+    def n_rows(self):
+        return len(self.owners)
+
+    def __len__(self):
+        """Number of requests not yet finished, waiting or running."""
+        return len(self.waiting) + len(self.running)
+
+    def submit(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, stop=None):
+        """
+        Queues a forecast; arguments as in `KronosPredictor.predict`.
+
+        Args:
+            stop (callable, optional): Called after every step with the generated s1 and s2 token ids so far
+                (each [sample_count, steps]); returning True finishes the request early, with a forecast of
+                the steps generated. Defaults to None.
+
+        Returns:
+            int: Request id, the key of its result in `step`.
+        """
+        if sample_count > self.max_batch_size:
+            raise ValueError(f"sample_count={sample_count} exceeds max_batch_size={self.max_batch_size}.")
+        prepared = self.predictor._prepare_series(df, x_timestamp, y_timestamp, pred_len, 0)
+        request = ScheduledRequest(next(self._ids), prepared, pd.Index(y_timestamp), pred_len, T, top_k, top_p, sample_count, stop)
+        if isinstance(self.cache, PagedKVCache):
+            # Positions held at most, plus one page as the padded prefill may start mid-page.
+            positions = min(min(len(prepared[0]), self.max_context) + pred_len, self.max_context)
+            request.pages = sample_count * min(-(-positions // self.cache.page_size) + 1, self.cache.pages_per_row)
+            if self.cache.max_pages is not None and request.pages > self.cache.max_pages:
+                raise ValueError(f"The request may need {request.pages} pages, more than max_pages={self.cache.max_pages}.")
+        self.waiting.append(request)
+        return request.request_id
+
+    def cancel(self, request_id):
+        """Drops a waiting or running request without a result."""
+        for request in self.waiting:
+            if request.request_id == request_id:
+                self.waiting.remove(request)
+                return
+        self._retire([r for r in self.running if r.request_id == request_id])
+
+    def memory_stats(self):
+        """KV-cache memory usage (see `PagedKVCache.memory_stats`), with the number of waiting requests."""
+        stats = self.cache.memory_stats()
+        stats['waiting'] = len(self.waiting)
+        if isinstance(self.cache, PagedKVCache):
+            stats['pages_reserved'] = self.reserved_pages
+        return stats
+
+    @torch.no_grad()
+    def step(self):
+        """
+        Admits waiting requests, runs one decode step for every running sequence and retires finished ones.
+
+        Returns:
+            dict: Request id -> forecast DataFrame of every request finished in this step.
+        """
+        with self.predictor._autocast():
+            s1_logits, hidden = self._decode_running()
+            admitted = self._admit()
+            if admitted is not None:
+                s1_logits = torch.cat([s1_logits, admitted[0]]) if s1_logits is not None else admitted[0]
+                hidden = torch.cat([hidden, admitted[1]]) if hidden is not None else admitted[1]
+            if s1_logits is None:
+                return {}
+
+            n, rows = self.n_rows, self._rows
+            sample_pre = sample_from_logits(s1_logits, temperature=rows["T"][:n], top_k=rows["top_k"][:n], top_p=rows["top_p"][:n])
+            s2_logits = self.model.decode_s2_step(hidden, sample_pre, self.cache.context(), padding_mask=self.cache.key_padding_mask)[:, 0]
+            sample_post = sample_from_logits(s2_logits, temperature=rows["T"][:n], top_k=rows["top_k"][:n], top_p=rows["top_p"][:n])
+        rows["s1"][:n], rows["s2"][:n] = sample_pre[:, 0], sample_post[:, 0]
+        self.steps += 1
+
+        finished = []
+        for request in self.running:
+            index = torch.as_tensor(request.rows, device=self.device)
+            position = request.context_len + request.step
+            s1_ids, s2_ids = request.tokens
+            s1_ids[:, position], s2_ids[:, position] = sample_pre[index, 0], sample_post[index, 0]
+            rows["stamp"][index] = request.y_stamp[request.step]
+            request.step += 1
+            if request.step == request.pred_len or (request.stop is not None and request.stop(
+                    s1_ids[:, request.context_len:position + 1], s2_ids[:, request.context_len:position + 1])):
+                finished.append(request)
+
+        results = {request.request_id: self._forecast(request) for request in finished}
+        self._retire(finished)
+        return results
+
+    def run(self):
+        """Steps until every submitted request has finished, yielding (request_id, forecast) as they complete."""
+        while len(self):
+            yield from self.step().items()
+
+    def _decode_running(self):
+        """One cached `decode_s1` step for every running row, fed the tokens sampled in the previous step."""
+        n = self.n_rows
+        if n == 0:
+            return None, None
+        rows = self._rows
+        s1_logits, hidden = self.model.decode_s1(rows["s1"][:n, None], rows["s2"][:n, None], rows["stamp"][:n, None], kv_cache=self.cache.layers)
+        self.cache.write_context(self.model.project_s2_context(hidden)[:, 0])
+        return s1_logits[:, -1], hidden
+
+    def _admit(self):
+        """Prefills the waiting requests that fit into the free rows and appends them to the batch."""
+        admitted, free = [], self.max_batch_size - self.n_rows
+        max_pages = getattr(self.cache, 'max_pages', None)
+        while self.waiting and self.waiting[0].sample_count <= free:
+            if max_pages is not None and self.reserved_pages + self.waiting[0].pages > max_pages:
+                break
+            admitted.append(self.waiting.popleft())
+            free -= admitted[-1].sample_count
+            self.reserved_pages += admitted[-1].pages
+        if not admitted:
+            return None
+
+        x, x_stamp, _, padding_mask = self.predictor._pad_batch([request.prepared for request in admitted])
+        x = torch.from_numpy(x).to(self.device)
+        x_stamp = torch.from_numpy(x_stamp).to(self.device)
+        padding_mask = torch.from_numpy(padding_mask).to(self.device) if padding_mask is not None else None
+        x_token = self.tokenizer.encode(torch.clip(x, -self.predictor.clip, self.predictor.clip), half=True, padding_mask=padding_mask)
+
+        start = max(0, x.size(1) - self.max_context)
+        prefill_mask = padding_mask[:, start:] if padding_mask is not None else None
+        if prefill_mask is not None and not prefill_mask.any():
+            prefill_mask = None
+        prefill_cache = self.model.init_kv_cache(self.max_context)
+        prefill_logits, context = self.model.decode_s1(x_token[0][:, start:], x_token[1][:, start:], x_stamp[:, start:].contiguous(),
+                                                       padding_mask=prefill_mask, kv_cache=prefill_cache)
+        repeats = torch.tensor([request.sample_count for request in admitted], device=self.device)
+        self.cache.append(prefill_cache, self.model.project_s2_context(context), repeats)
+        self._reserve_rows(x_stamp.size(-1))
+
+        rows = self._rows
+        for i, request in enumerate(admitted):
+            seq_len = request.prepared[0].shape[0]
+            request.context_len = min(seq_len, self.max_context)
+            request.tokens = tuple(t.new_empty(request.sample_count, request.context_len + request.pred_len) for t in x_token)
+            for buffer, tokens in zip(request.tokens, x_token):
+                buffer[:, :request.context_len] = tokens[i, -request.context_len:]
+            request.y_stamp = torch.from_numpy(request.prepared[2]).to(self.device)
+            request.rows = list(range(self.n_rows, self.n_rows + request.sample_count))
+            index = slice(request.rows[0], request.rows[-1] + 1)
+            rows["T"][index], rows["top_k"][index], rows["top_p"][index] = request.T, request.top_k, request.top_p
+            self.owners.extend([request] * request.sample_count)
+            self.running.append(request)
+        return prefill_logits[:, -1].repeat_interleave(repeats, dim=0), context[:, -1:].repeat_interleave(repeats, dim=0)
+
+    def _reserve_rows(self, n_stamp):
+        if self._rows is not None:
+            return
+        size, device = self.max_batch_size, self.device
+        self._rows = {
+            "s1": torch.zeros(size, dtype=torch.long, device=device),  # Tokens sampled in the previous step
+            "s2": torch.zeros(size, dtype=torch.long, device=device),
+            "stamp": torch.zeros(size, n_stamp, device=device),  # Stamp of those tokens
+            "T": torch.ones(size, device=device),
+            "top_k": torch.zeros(size, dtype=torch.long, device=device),
+            "top_p": torch.ones(size, device=device),
+        }
+
+    def _retire(self, requests):
+        """Removes the rows of `requests`, refilling the gaps with the last rows so the batch stays contiguous."""
+        if not requests:
+            return
+        retired = {row for request in requests for row in request.rows}
+        n_rows = self.n_rows - len(retired)
+        dst = sorted(row for row in retired if row < n_rows)
+        src = [row for row in range(n_rows, self.n_rows) if row not in retired]
+        for s, d in zip(src, dst):
+            owner = self.owners[s]
+            owner.rows[owner.rows.index(s)] = d
+            self.owners[d] = owner
+        del self.owners[n_rows:]
+        self.running = [r for r in self.running if r not in requests]
+        self.reserved_pages -= sum(request.pages for request in requests)
+
+        self.cache.move_rows(src, dst, n_rows)
+        if src:
+            for buffer in self._rows.values():
+                buffer[dst] = buffer[src]
+
+    def _forecast(self, request):
+        """Decodes the latest `max_context` tokens of a finished request and returns its de-normalized forecast."""
+        total = request.context_len + request.step
+        start = max(0, total - self.max_context)
+        with self.predictor._autocast():
+            z = self.tokenizer.decode([t[:, start:total] for t in request.tokens], half=True)
+        preds = z.float().mean(dim=0)[-request.step:].cpu().numpy()
+        _, _, _, x_mean, x_std = request.prepared
+        preds = preds * (x_std + 1e-5) + x_mean
+        predictor = self.predictor
+        return pd.DataFrame(preds, columns=predictor.price_cols + [predictor.vol_col, predictor.amt_vol], index=request.y_timestamp[:request.step])
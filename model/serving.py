@@ -0,0 +1,157 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+@dataclass
+class ForecastRequest:
+    """One queued `AsyncKronosPredictor.predict` call."""
+    df: pd.DataFrame
+    x_timestamp: pd.Series
+    y_timestamp: pd.Series
+    pred_len: int
+    T: float
+    top_k: int
+    top_p: float
+    sample_count: int
+    adapter: str
+    future: asyncio.Future
+
+
+def _shared_or_list(values):
+    # predict_batch takes a scalar when all series agree, which keeps the scalar sampling path.
+    return values[0] if all(v == values[0] for v in values) else list(values)
+
+
+class AsyncKronosPredictor:
+    """
+    Asyncio front-end that coalesces concurrent forecast requests into `predict_batch` calls.
+
+    The first queued request opens a batch, which is dispatched once `max_batch_size` requests have joined
+    or `max_wait` seconds have passed, so a lone request waits at most `max_wait` before generation starts.
+    Requests may differ in history length, `pred_len`, sampling parameters and LoRA adapter
+    (`predict_batch` handles all of them per series); only requests with the same `sample_count` share a
+    batch. Batches run one at a time on a worker thread, so the event loop keeps accepting requests, and
+    everything that arrived meanwhile forms the next batch.
+
+    If a batch fails, its requests are retried one by one, so an invalid request only fails its own future.
+
+    Args:
+        predictor (KronosPredictor): The predictor that runs the batches. It must not be used concurrently elsewhere.
+        max_batch_size (int, optional): Maximum number of requests per batch. Defaults to 16.
+        max_wait (float, optional): Seconds a batch waits for more requests after its first one. Defaults to 0.005.
+    """
+
+    def __init__(self, predictor, max_batch_size=16, max_wait=0.005):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}.")
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # Served requests and dispatched batches since construction; requests / batches is the mean batch size.
+        self.requests = 0
+        self.batches = 0
+        self._queue = None
+        self._deferred = deque()  # Requests taken off the queue whose sample_count did not match the open batch.
+        self._worker = None
+        self._executor = None
+
+    async def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, adapter=None):
+        """
+        Queues one forecast and returns its result; arguments as in `KronosPredictor.predict`.
+
+        `adapter=None` uses the predictor's current selection when all requests of a batch agree, and the
+        base model when it is batched with requests for other adapters.
+
+        Returns:
+            pd.DataFrame: Forecast indexed by `y_timestamp`.
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kronos-batch")
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put(ForecastRequest(df, x_timestamp, y_timestamp, pred_len, T, top_k, top_p, sample_count, adapter, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        deferred = self._deferred
+        while True:
+            first = deferred.popleft() if deferred else await self._queue.get()
+            batch = [first]
+            for request in list(deferred):
+                if len(batch) < self.max_batch_size and request.sample_count == first.sample_count:
+                    deferred.remove(request)
+                    batch.append(request)
+
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), max(deadline - loop.time(), 0))
+                    except asyncio.TimeoutError:
+                        break
+                    (batch if request.sample_count == first.sample_count else deferred).append(request)
+
+                await self._dispatch([r for r in batch if not r.future.done()])
+            except asyncio.CancelledError:
+                for request in batch:
+                    request.future.cancel()
+                raise
+
+    async def _dispatch(self, batch):
+        if not batch:
+            return
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, self._predict_batch, batch)
+        except Exception as exc:
+            if len(batch) == 1:
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(exc)
+                return
+            for request in batch:
+                await self._dispatch([request])
+            return
+        self.requests += len(batch)
+        self.batches += 1
+        for request, result in zip(batch, results):
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def _predict_batch(self, batch):
+        return self.predictor.predict_batch(
+            [r.df for r in batch], [r.x_timestamp for r in batch], [r.y_timestamp for r in batch], [r.pred_len for r in batch],
+            T=_shared_or_list([r.T for r in batch]), top_k=_shared_or_list([r.top_k for r in batch]),
+            top_p=_shared_or_list([r.top_p for r in batch]), sample_count=batch[0].sample_count, verbose=False,
+            adapter=_shared_or_list([r.adapter for r in batch]),
+        )
+
+    async def close(self):
+        """
+        Stops batching and cancels the futures of all unfinished requests. A batch already running on the
+        worker thread still completes before `close` returns. The predictor can be used again afterwards.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            self._deferred.append(self._queue.get_nowait())
+        while self._deferred:
+            self._deferred.popleft().future.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self._worker = self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
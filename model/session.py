@@ -0,0 +1,169 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import torch
+
+from model.kronos import ContextBuffer, calc_time_stamps, fork_kv_cache, sample_from_logits
+
+
+class ForecastSession:
+    """
+    Stateful forecaster for a live series that grows one bar at a time.
+
+    Re-running `KronosPredictor.predict` whenever a bar closes re-normalizes, re-encodes and re-prefills the
+    whole window. A session instead keeps the normalization statistics and the key/value
+    caches of the tokenizer encoder, the model and the tokenizer decoder: `append` runs only the new bar
+    through each of them, and `forecast` only pays for generating (and decoding) the horizon, starting from
+    forks of the caches so the session itself is left unchanged.
+
+    Normalization statistics are either frozen at those of the initial history, or, with `rolling_stats`,
+    updated with every appended bar (Welford's algorithm over all bars seen). Bars already in the history keep
+    the tokens they were encoded with, and forecasts are de-normalized with the current statistics.
+
+    The caches slide over the latest `max_context` bars, like `KronosPredictor(sliding_window=True)`. A fresh
+    session whose history plus horizon fits in `max_context` reproduces `predict` under the same sampling.
+
+    Args:
+        predictor (KronosPredictor): Supplies the model, tokenizer, device, `max_context`, `clip` and dtype.
+        df (pd.DataFrame): Initial history, with the columns expected by `predict`. Only its latest
+            `max_context` bars are encoded, but all of them enter the statistics.
+        x_timestamp (pd.Series): Timestamps of `df`.
+        rolling_stats (bool, optional): Whether appended bars update the normalization statistics. Defaults to False.
+        adapter (str, optional): LoRA adapter used for every call; it is baked into the caches. Defaults to the predictor's current one.
+    """
+
+    def __init__(self, predictor, df, x_timestamp, rolling_stats=False, adapter=None):
+        self.predictor = predictor
+        self.model = predictor.model
+        self.tokenizer = predictor.tokenizer
+        self.device = predictor.device
+        self.max_context = predictor.max_context
+        self.rolling_stats = rolling_stats
+        self.adapter = adapter if adapter is not None else self.model.active_adapter
+
+        x_timestamp = pd.Series(pd.to_datetime(x_timestamp)).reset_index(drop=True)
+        x = predictor._features(df, 0)
+        if len(x) != len(x_timestamp):
+            raise ValueError(f"Inconsistent lengths: df has {len(x)} rows vs x_timestamp has {len(x_timestamp)}.")
+        if len(x) == 0:
+            raise ValueError("The initial history must contain at least one bar.")
+        self.n_bars = len(x)
+        # Welford state in float64: bars in the statistics, their mean and the sum of squared deviations from it.
+        self.count = len(x)
+        self.mean = x.mean(axis=0, dtype=np.float64)
+        self.m2 = ((x - self.mean) ** 2).sum(axis=0)
+
+        self.last_timestamp = x_timestamp.iloc[-1]
+        # Bar spacing used to extend the timestamps when `forecast` is not given any.
+        self.freq = x_timestamp.diff().median() if len(x_timestamp) > 1 else None
+
+        self.encoder_cache = self.tokenizer.init_kv_cache(self.max_context, sliding=True, encoder=True)
+        self.decoder_cache = self.tokenizer.init_kv_cache(self.max_context, sliding=True)
+        self.kv_cache = self.model.init_kv_cache(self.max_context, sliding=True)
+        self.s2_context = ContextBuffer(self.max_context)
+        self.s1_logits = self.hidden = None  # Outputs at the newest bar, from which generation starts
+        self._extend(x[-self.max_context:], x_timestamp[-self.max_context:])
+
+    def __len__(self):
+        """Number of bars seen, including the initial history."""
+        return self.n_bars
+
+    @property
+    def x_mean(self):
+        return self.mean.astype(np.float32)
+
+    @property
+    def x_std(self):
+        return np.sqrt(self.m2 / self.count).astype(np.float32)
+
+    def append(self, candle, timestamp=None):
+        """
+        Adds newly closed bars to the session, running only them through the tokenizer and the model.
+
+        Args:
+            candle (dict, pd.Series or pd.DataFrame): One bar, or several as DataFrame rows, with the columns of the history.
+            timestamp (optional): Timestamp(s) of the bar(s). Defaults to the last timestamp advanced by the bar spacing.
+        """
+        frame = candle if isinstance(candle, pd.DataFrame) else pd.DataFrame([candle])
+        x = self.predictor._features(frame, 0)
+        if timestamp is None:
+            timestamp = self._future_timestamps(len(x))
+        timestamp = pd.Series(pd.to_datetime(np.atleast_1d(timestamp))).reset_index(drop=True)
+        if len(timestamp) != len(x):
+            raise ValueError(f"Inconsistent lengths: {len(x)} bars vs {len(timestamp)} timestamps.")
+
+        for i in range(len(x)):
+            if self.rolling_stats:
+                self.count += 1
+                delta = x[i] - self.mean
+                self.mean = self.mean + delta / self.count
+                self.m2 = self.m2 + delta * (x[i] - self.mean)
+            # Sliding caches only take multi-position updates while they have room, so bars are fed one by one.
+            self._extend(x[i:i + 1], timestamp[i:i + 1])
+        self.n_bars += len(x)
+        self.last_timestamp = timestamp.iloc[-1]
+
+    @torch.no_grad()
+    def _extend(self, x, x_timestamp):
+        """Encodes bars normalized with the current statistics and prefills them into every cache."""
+        x_norm = np.clip((x - self.x_mean) / (self.x_std + 1e-5), -self.predictor.clip, self.predictor.clip)
+        x = torch.from_numpy(x_norm.astype(np.float32))[None].to(self.device)
+        x_stamp = torch.from_numpy(calc_time_stamps(x_timestamp).values.astype(np.float32))[None].to(self.device)
+
+        with self.predictor.use_adapter(self.adapter), self.predictor._autocast():
+            s1_ids, s2_ids = self.tokenizer.encode(x, half=True, kv_cache=self.encoder_cache)
+            self.tokenizer.decode([s1_ids, s2_ids], half=True, kv_cache=self.decoder_cache)
+            s1_logits, context = self.model.decode_s1(s1_ids, s2_ids, x_stamp, kv_cache=self.kv_cache)
+            self.s2_context.append(self.model.project_s2_context(context))
+        self.s1_logits, self.hidden = s1_logits[:, -1], context[:, -1:]
+
+    def _future_timestamps(self, n):
+        if self.freq is None:
+            raise ValueError("Timestamps are required while the history has a single bar.")
+        return pd.Series(pd.date_range(self.last_timestamp + self.freq, periods=n, freq=self.freq))
+
+    @torch.no_grad()
+    def forecast(self, pred_len, y_timestamp=None, T=1.0, top_k=0, top_p=0.9, sample_count=1):
+        """
+        Forecasts the next `pred_len` bars from the session state, which is left unchanged.
+
+        Args:
+            pred_len (int): Number of bars to forecast.
+            y_timestamp (pd.Series, optional): Their timestamps. Defaults to the last timestamp advanced by the bar spacing.
+            T, top_k, top_p, sample_count: Sampling parameters, as in `KronosPredictor.predict`.
+
+        Returns:
+            pd.DataFrame: Forecast indexed by `y_timestamp`.
+        """
+        if y_timestamp is None:
+            y_timestamp = self._future_timestamps(pred_len)
+        y_timestamp = pd.Series(pd.to_datetime(y_timestamp)).reset_index(drop=True)
+        if len(y_timestamp) != pred_len:
+            raise ValueError(f"y_timestamp length should equal pred_len={pred_len}, got {len(y_timestamp)}.")
+        y_stamp = torch.from_numpy(calc_time_stamps(y_timestamp).values.astype(np.float32)).to(self.device)
+        y_stamp = y_stamp[None].expand(sample_count, -1, -1)
+
+        model, n = self.model, sample_count
+        kv_cache, decoder_cache = fork_kv_cache(self.kv_cache, n), fork_kv_cache(self.decoder_cache, n)
+        s2_context = copy.copy(self.s2_context)
+        s2_context.data = self.s2_context.data.repeat_interleave(n, dim=0)
+        s1_logits, hidden = self.s1_logits.repeat_interleave(n, dim=0), self.hidden.repeat_interleave(n, dim=0)
+
+        outputs = []
+        with self.predictor.use_adapter(self.adapter), self.predictor._autocast():
+            for i in range(pred_len):
+                if i > 0:
+                    # Only the token sampled in the previous step is new.
+                    s1_logits, hidden = model.decode_s1(sample_pre, sample_post, y_stamp[:, i - 1:i].contiguous(), kv_cache=kv_cache)
+                    s1_logits = s1_logits[:, -1]
+                    s2_context.append(model.project_s2_context(hidden))
+                sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p)
+                s2_logits = model.decode_s2_step(hidden, sample_pre, s2_context.view())[:, 0]
+                sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p)
+                outputs.append(self.tokenizer.decode([sample_pre, sample_post], half=True, kv_cache=decoder_cache))
+
+        preds = torch.cat(outputs, dim=1).float().mean(dim=0).cpu().numpy()
+        preds = preds * (self.x_std + 1e-5) + self.x_mean
+        predictor = self.predictor
+        return pd.DataFrame(preds, columns=predictor.price_cols + [predictor.vol_col, predictor.amt_vol], index=pd.Index(y_timestamp))
@@ -35,11 +35,11 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
 try:
-    from model import Kronos, KronosTokenizer, KronosPredictor
+    from model import KronosPredictor, load_pretrained
 except ImportError:
     # Fallback if run from a different directory structure
     sys.path.append("../")
-    from model import Kronos, KronosTokenizer, KronosPredictor
+    from model import KronosPredictor, load_pretrained
 
 
 SAVE_DIR = "./outputs"
@@ -180,8 +180,7 @@ def main():
     # 2. Init Model
     print(f"🚀 Loading Kronos model ({MODEL_PRETRAINED})...")
     try:
-        tokenizer = KronosTokenizer.from_pretrained(TOKENIZER_PRETRAINED)
-        model = Kronos.from_pretrained(MODEL_PRETRAINED)
+        model, tokenizer = load_pretrained(MODEL_PRETRAINED, TOKENIZER_PRETRAINED, device=DEVICE)
         predictor = KronosPredictor(model, tokenizer, device=DEVICE, max_context=MAX_CONTEXT)
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from model import Kronos, KronosTokenizer
+
+# Tiny randomly initialised models keep the inference tests offline and fast; they check that the
+# optimised inference paths reproduce the reference path, not forecast quality.
+S1_BITS = 4
+S2_BITS = 4
+D_IN = 6
+SEED = 123
+
+
+def set_seed(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+@pytest.fixture(autouse=True)
+def seed():
+    set_seed(SEED)
+
+
+@pytest.fixture(scope="session")
+def build_tokenizer():
+    def build() -> KronosTokenizer:
+        return KronosTokenizer(
+            d_in=D_IN, d_model=32, n_heads=4, ff_dim=64, n_enc_layers=2, n_dec_layers=2,
+            ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0,
+            s1_bits=S1_BITS, s2_bits=S2_BITS, beta=0.05, gamma0=1.0, gamma=1.1, zeta=0.05, group_size=4,
+        ).eval()
+    return build
+
+
+@pytest.fixture(scope="session")
+def build_model():
+    def build(**overrides) -> Kronos:
+        config = dict(
+            s1_bits=S1_BITS, s2_bits=S2_BITS, n_layers=3, d_model=32, n_heads=4, ff_dim=64,
+            ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0, token_dropout_p=0.0, learn_te=True,
+        )
+        config.update(overrides)
+        return Kronos(**config).eval()
+    return build
+
+
+@pytest.fixture(scope="module")
+def models(build_tokenizer, build_model):
+    """Tokenizer and model shared by the tests of a module that leave them unchanged."""
+    set_seed(SEED)
+    return build_tokenizer(), build_model()
+
+
+@pytest.fixture
+def fresh_models(build_tokenizer, build_model):
+    """A tokenizer and model of their own, for tests that cast, pack, quantize or otherwise modify them."""
+    return build_tokenizer(), build_model()
+
+
+@pytest.fixture(scope="session")
+def make_inputs():
+    def make(batch_size: int, seq_len: int, pred_len: int):
+        x = torch.randn(batch_size, seq_len, D_IN)
+        stamps = torch.stack([
+            torch.randint(0, 60, (batch_size, seq_len + pred_len)),
+            torch.randint(0, 24, (batch_size, seq_len + pred_len)),
+            torch.randint(0, 7, (batch_size, seq_len + pred_len)),
+            torch.randint(1, 32, (batch_size, seq_len + pred_len)),
+            torch.randint(1, 13, (batch_size, seq_len + pred_len)),
+        ], dim=-1).float()
+        return x, stamps[:, :seq_len], stamps[:, seq_len:]
+    return make
+
+
+@pytest.fixture(scope="session")
+def make_frame():
+    def make(seq_len: int, pred_len: int, seed: int):
+        rng = np.random.default_rng(seed)
+        timestamps = pd.Series(pd.date_range("2024-01-01 09:30", periods=seq_len + pred_len, freq="5min"))
+        df = pd.DataFrame(rng.random((seq_len, 6)) + 10, columns=["open", "high", "low", "close", "volume", "amount"])
+        return df, timestamps[:seq_len].reset_index(drop=True), timestamps[seq_len:].reset_index(drop=True)
+    return make
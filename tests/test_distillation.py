@@ -0,0 +1,31 @@
+import pytest
+import torch
+
+from model import build_student, distillation_loss
+
+
+def test_distillation_student_init_and_loss(fresh_models, make_inputs):
+    tokenizer, teacher = fresh_models
+    x, x_stamp, _ = make_inputs(2, 9, 0)
+    with torch.no_grad():
+        s1_ids, s2_ids = tokenizer.encode(x, half=True)
+    inputs = (s1_ids[:, :-1], s2_ids[:, :-1], x_stamp[:, :-1])
+    targets = (s1_ids[:, 1:], s2_ids[:, 1:])
+
+    # A same-size student starts as a copy of the teacher: zero KL.
+    clone = build_student(teacher).eval()
+    with torch.no_grad():
+        teacher_logits = teacher(*inputs, use_teacher_forcing=True, s1_targets=targets[0])
+        clone_logits = clone(*inputs, use_teacher_forcing=True, s1_targets=targets[0])
+    _, kl_s1, kl_s2, _ = distillation_loss(clone, clone_logits, teacher_logits, *targets, temperature=2.0)
+    assert kl_s1.item() == pytest.approx(0.0, abs=1e-6) and kl_s2.item() == pytest.approx(0.0, abs=1e-6)
+
+    # Fewer layers: first and last teacher blocks are kept; a narrower student only shares the vocabulary.
+    student = build_student(teacher, n_layers=2)
+    torch.testing.assert_close(student.transformer[1].state_dict(), teacher.transformer[2].state_dict())
+    narrow = build_student(teacher, n_layers=1, d_model=16, n_heads=2)
+    assert narrow.ff_dim == teacher.ff_dim // 2 and narrow.s1_vocab_size == teacher.s1_vocab_size
+    loss, _, _, _ = distillation_loss(narrow, narrow(*inputs, use_teacher_forcing=True, s1_targets=targets[0]), teacher_logits,
+                                      *targets, alpha=0.5)
+    loss.backward()
+    assert narrow.transformer[0].ffn.w2.weight.grad is not None
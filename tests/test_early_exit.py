@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import torch
+
+from model import KronosPredictor
+
+
+def test_early_exit_step_matches_exit_heads_and_full_depth(fresh_models, make_inputs):
+    tokenizer, model = fresh_models
+    model.add_exit_heads([1])
+    x, x_stamp, _ = make_inputs(6, 10, 0)
+    with torch.no_grad():
+        s1_ids, s2_ids = tokenizer.encode(x, half=True)
+        exit_s1 = model.exit_forward(s1_ids, s2_ids, x_stamp, s1_targets=s1_ids)[1][0][:, -1:]
+        confidence = torch.softmax(exit_s1[:, 0], dim=-1).amax(dim=-1)
+        threshold = confidence.median().item()
+        exited = confidence >= threshold
+        assert exited.any() and not exited.all()
+
+        step = s1_ids[:, -1:], s2_ids[:, -1:], x_stamp[:, -1:]
+        caches = []
+        for _ in range(2):
+            caches.append(model.init_kv_cache(16))
+            model.decode_s1(s1_ids[:, :-1], s2_ids[:, :-1], x_stamp[:, :-1], kv_cache=caches[-1])
+        expected, _ = model.decode_s1(*step, kv_cache=caches[0])
+        model.enable_early_exit(threshold)
+        try:
+            logits, _ = model.decode_s1(*step, kv_cache=caches[1])
+        finally:
+            model.disable_early_exit()
+
+    torch.testing.assert_close(logits[exited], exit_s1[exited], rtol=1e-4, atol=1e-5)
+    torch.testing.assert_close(logits[~exited], expected[~exited], rtol=1e-4, atol=1e-5)
+    # Exited rows still fill the caches of the blocks they skipped.
+    assert all(cache.seq_len == 10 for cache in caches[1])
+    n_exited = int(exited.sum())
+    assert model.exit_stats.as_dict()["exits"] == {1: n_exited, model.n_layers: 6 - n_exited}
+
+
+def test_early_exit_predictor_and_exit_head_checkpoint(tmp_path, fresh_models, build_model, make_inputs):
+    tokenizer, model = fresh_models
+    model.add_exit_heads([1, 2])
+    torch.nn.init.normal_(model.exit_heads["2"].proj.weight, std=0.1)
+    path = tmp_path / "exit_heads.pt"
+    model.save_exit_heads(path, threshold=0.5)
+
+    restored = build_model()
+    restored.load_state_dict(model.state_dict(), strict=False)
+    assert restored.load_exit_heads(path) == 0.5
+    torch.testing.assert_close(restored.exit_heads.state_dict(), model.exit_heads.state_dict())
+
+    # A threshold that every token passes exits after the first block on every decode step.
+    predictor = KronosPredictor(restored, tokenizer, device="cpu", max_context=32, early_exit=1e-6)
+    x, x_stamp, y_stamp = make_inputs(2, 12, 4)
+    with torch.no_grad():
+        preds = predictor.generate(x, x_stamp, y_stamp, 4, 1.0, 1, 1.0, 2, False)
+    assert np.isfinite(preds).all()
+    stats = predictor.early_exit_stats
+    assert stats.tokens == 2 * 2 * 3 and stats.exits == {1: stats.tokens}
+    assert stats.layers_saved == pytest.approx(2 / 3)
+    with pytest.raises(ValueError):
+        build_model().enable_early_exit(0.5)
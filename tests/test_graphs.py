@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import torch
+
+from model import KronosPredictor
+from model.kronos import auto_regressive_inference
+
+
+def test_compiled_graphs_match_eager(models, make_inputs):
+    tokenizer, model = models
+    x, x_stamp, y_stamp = make_inputs(3, 12, 5)
+    with torch.no_grad():
+        expected = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 16, 5, top_k=1, top_p=1.0, sample_count=2)
+        # The eager backend traces the same static-shape graphs without needing a C++ toolchain.
+        graphs = model.compile_graphs(buckets=(1, 2, 4, 8, 16), warmup_tokens=(6,), backend="eager")
+        try:
+            assert model.transformer[-1].graphs is graphs
+            compiled = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 16, 5, top_k=1, top_p=1.0, sample_count=2)
+            assert graphs.compiled
+        finally:
+            model.release_graphs()
+    np.testing.assert_allclose(compiled, expected, rtol=1e-4, atol=1e-5)
+    assert model.graphs is None and all(block.graphs is None for block in model.transformer)
+
+
+def test_compile_rejects_quantized_model(fresh_models):
+    tokenizer, model = fresh_models
+    with pytest.raises(ValueError):
+        KronosPredictor(model, tokenizer, device="cpu", max_context=32, quantize="int8", compile=True)
@@ -7,7 +7,7 @@ import pytest
 import torch
 from tqdm import tqdm
 
-from model import Kronos, KronosPredictor, KronosTokenizer
+from model import KronosPredictor, load_pretrained
 
 TEST_DATA_ROOT = Path(__file__).parent / "data"
 INPUT_DATA_PATH = TEST_DATA_ROOT / "regression_input.csv"
@@ -17,6 +17,11 @@ OUTPUT_DATA_DIR = TEST_DATA_ROOT
 TEST_CTX_LEN = [512, 256]
 PRED_LEN = 8
 REL_TOLERANCE = 1e-5
+# Reduced-precision inference (KronosPredictor(dtype=...)) is compared against the same fp32 fixtures.
+# float16 keeps 3 more mantissa bits than bfloat16 (rounding error 2^-11 vs 2^-8), so its bounds are tighter; inputs are
+# clipped to +-clip before the embedding, so activations stay far from the float16 overflow range.
+DTYPE_REL_TOLERANCE = {"bfloat16": 5e-2, "float16": 1e-2}
+DTYPE_MSE_REL_TOLERANCE = {"bfloat16": 0.1, "float16": 0.05}
 FEATURE_NAMES = ["open", "high", "low", "close", "volume", "amount"]
 
 # MSE regression test configuration
@@ -25,6 +30,8 @@ MSE_CTX_LEN = [512, 256]
 MSE_EXPECTED = [0.008979, 0.003741]
 MSE_PRED_LEN = 30
 MSE_TOLERANCE = 0.000001
+# INT8 dynamic quantization trades accuracy for CPU throughput; examples/benchmark_quantization.py reports the delta.
+INT8_MSE_REL_TOLERANCE = 0.25
 MSE_FEATURE_NAMES = ["open", "high", "low", "close"]
 
 MODEL_REVISION = "901c26c1332695a2a8f243eb2f37243a37bea320"
@@ -42,8 +49,14 @@ def set_seed(seed: int) -> None:
         torch.backends.cudnn.benchmark = False
 
 
-@pytest.mark.parametrize("context_len", TEST_CTX_LEN)
-def test_kronos_predictor_regression(context_len):
+def load_models():
+    # Predictors that cast or quantize a cached model evict it from the registry, so every test starts from fp32 weights.
+    model, tokenizer = load_pretrained("NeoQuasar/Kronos-small", "NeoQuasar/Kronos-Tokenizer-base",
+                                       model_revision=MODEL_REVISION, tokenizer_revision=TOKENIZER_REVISION)
+    return tokenizer, model
+
+
+def predict_regression_window(context_len, dtype=None):
     set_seed(SEED)
 
     expected_output_path = OUTPUT_DATA_DIR / f"regression_output_{context_len}.csv"
@@ -59,12 +72,9 @@ def test_kronos_predictor_regression(context_len):
     future_timestamp = df["timestamps"].iloc[context_len:context_len + len(expected_df)].reset_index(drop=True)
     expected = expected_df[FEATURE_NAMES].values.astype(np.float32)
 
-    tokenizer = KronosTokenizer.from_pretrained("NeoQuasar/Kronos-Tokenizer-base", revision=TOKENIZER_REVISION)
-    model = Kronos.from_pretrained("NeoQuasar/Kronos-small", revision=MODEL_REVISION)
-    tokenizer.eval()
-    model.eval()
+    tokenizer, model = load_models()
 
-    predictor = KronosPredictor(model, tokenizer, device=DEVICE, max_context=MAX_CTX_LEN)
+    predictor = KronosPredictor(model, tokenizer, device=DEVICE, max_context=MAX_CTX_LEN, dtype=dtype)
 
     with torch.no_grad():
         pred_df = predictor.predict(
@@ -79,7 +89,12 @@ def test_kronos_predictor_regression(context_len):
             sample_count=1,
         )
 
-    obtained = pred_df[FEATURE_NAMES].to_numpy(dtype=np.float32)
+    return pred_df[FEATURE_NAMES].to_numpy(dtype=np.float32), expected
+
+
+@pytest.mark.parametrize("context_len", TEST_CTX_LEN)
+def test_kronos_predictor_regression(context_len):
+    obtained, expected = predict_regression_window(context_len)
 
     abs_diff = np.abs(obtained - expected)
     rel_diff = abs_diff / (np.abs(expected) + 1e-9)
@@ -87,20 +102,16 @@ def test_kronos_predictor_regression(context_len):
 
     np.testing.assert_allclose(obtained, expected, rtol=REL_TOLERANCE)
 
-@pytest.mark.parametrize("context_len, expected_mse", zip(MSE_CTX_LEN, MSE_EXPECTED))
-def test_kronos_predictor_mse(context_len, expected_mse):
+def predictor_mse(context_len, quantize=None, dtype=None):
     set_seed(SEED)
 
     df = pd.read_csv(INPUT_DATA_PATH, parse_dates=["timestamps"])
     if df.shape[0] <= context_len + MSE_PRED_LEN:
         raise ValueError("Example data does not contain enough rows for the random sample regression test.")
 
-    tokenizer = KronosTokenizer.from_pretrained("NeoQuasar/Kronos-Tokenizer-base", revision=TOKENIZER_REVISION)
-    model = Kronos.from_pretrained("NeoQuasar/Kronos-small", revision=MODEL_REVISION)
-    tokenizer.eval()
-    model.eval()
+    tokenizer, model = load_models()
 
-    predictor = KronosPredictor(model, tokenizer, device=DEVICE, max_context=MAX_CTX_LEN)
+    predictor = KronosPredictor(model, tokenizer, device=DEVICE, max_context=MAX_CTX_LEN, quantize=quantize, dtype=dtype)
 
     valid_region = df.iloc[context_len : df.shape[0] - MSE_PRED_LEN]
     if valid_region.shape[0] < MSE_SAMPLE_SIZE:
@@ -132,9 +143,41 @@ def test_kronos_predictor_mse(context_len, expected_mse):
             mse_values.append(float(np.mean((obtained - expected) ** 2)))
 
     assert len(mse_values) == MSE_SAMPLE_SIZE, f"Expected {MSE_SAMPLE_SIZE} MSE values, got {len(mse_values)}."
+    return np.mean(mse_values).item()
 
-    mse = np.mean(mse_values).item()
+
+@pytest.mark.parametrize("context_len, expected_mse", zip(MSE_CTX_LEN, MSE_EXPECTED))
+def test_kronos_predictor_mse(context_len, expected_mse):
+    mse = predictor_mse(context_len)
     mse_diff = mse - expected_mse
     print(f"Average MSE: {mse} (Diff vs expected: {mse_diff:+})")
 
     assert abs(mse_diff) <= MSE_TOLERANCE, f"MSE {mse} differs from expected {expected_mse}"
+
+
+@pytest.mark.parametrize("context_len, expected_mse", zip(MSE_CTX_LEN, MSE_EXPECTED))
+def test_kronos_predictor_int8_mse(context_len, expected_mse):
+    mse = predictor_mse(context_len, quantize="int8")
+    print(f"INT8 average MSE: {mse} (Diff vs fp32 expected: {mse - expected_mse:+})")
+
+    assert mse <= expected_mse * (1 + INT8_MSE_REL_TOLERANCE), f"INT8 MSE {mse} too far above fp32 {expected_mse}"
+
+
+@pytest.mark.parametrize("dtype", list(DTYPE_REL_TOLERANCE))
+@pytest.mark.parametrize("context_len", TEST_CTX_LEN)
+def test_kronos_predictor_reduced_precision_regression(context_len, dtype):
+    obtained, expected = predict_regression_window(context_len, dtype=dtype)
+
+    rel_diff = np.abs(obtained - expected) / (np.abs(expected) + 1e-9)
+    print(f"{dtype} max rel diff: {np.max(rel_diff)}")
+
+    np.testing.assert_allclose(obtained, expected, rtol=DTYPE_REL_TOLERANCE[dtype])
+
+
+@pytest.mark.parametrize("dtype", list(DTYPE_MSE_REL_TOLERANCE))
+@pytest.mark.parametrize("context_len, expected_mse", zip(MSE_CTX_LEN, MSE_EXPECTED))
+def test_kronos_predictor_reduced_precision_mse(context_len, expected_mse, dtype):
+    mse = predictor_mse(context_len, dtype=dtype)
+    print(f"{dtype} average MSE: {mse} (Diff vs fp32 expected: {mse - expected_mse:+})")
+
+    assert abs(mse - expected_mse) <= expected_mse * DTYPE_MSE_REL_TOLERANCE[dtype], f"{dtype} MSE {mse} differs from fp32 {expected_mse}"
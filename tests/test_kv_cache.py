@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+import torch
+
+from model.kronos import auto_regressive_inference
+from model.module import KVCache, MultiHeadAttentionWithRoPE, RotaryPositionalEmbedding
+
+
+def test_cached_decode_s1_matches_full_pass(models, make_inputs):
+    _, model = models
+    seq_len = 12
+    s1_ids = torch.randint(0, 2 ** model.s1_bits, (2, seq_len))
+    s2_ids = torch.randint(0, 2 ** model.s2_bits, (2, seq_len))
+    _, stamp, _ = make_inputs(2, seq_len, 0)
+
+    with torch.no_grad():
+        full_logits, full_context = model.decode_s1(s1_ids, s2_ids, stamp)
+
+        kv_cache = model.init_kv_cache(seq_len)
+        prefill_logits, prefill_context = model.decode_s1(s1_ids[:, :8], s2_ids[:, :8], stamp[:, :8], kv_cache=kv_cache)
+        step_logits, step_context = [prefill_logits], [prefill_context]
+        for t in range(8, seq_len):
+            logits, context = model.decode_s1(s1_ids[:, t:t + 1], s2_ids[:, t:t + 1], stamp[:, t:t + 1], kv_cache=kv_cache)
+            step_logits.append(logits)
+            step_context.append(context)
+
+    torch.testing.assert_close(torch.cat(step_logits, dim=1), full_logits, rtol=1e-4, atol=1e-5)
+    torch.testing.assert_close(torch.cat(step_context, dim=1), full_context, rtol=1e-4, atol=1e-5)
+
+
+def test_decode_s2_step_matches_full_decode_s2(models):
+    _, model = models
+    context = torch.randn(3, 10, 32)
+    s1_ids = torch.randint(0, 2 ** model.s1_bits, (3, 1))
+    mask = torch.zeros(3, 10, dtype=torch.bool)
+    mask[1, :4] = True
+
+    with torch.no_grad():
+        expected = model.decode_s2(context, s1_ids, padding_mask=mask)[:, -1:]
+        # Keys/values projected row by row, as cached during decoding, equal those of the whole context.
+        context_kv = torch.cat([model.project_s2_context(context[:, :6]), model.project_s2_context(context[:, 6:])], dim=1)
+        step = model.decode_s2_step(context[:, -1:], s1_ids, context_kv, padding_mask=mask)
+    torch.testing.assert_close(step, expected, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize("seq_len, pred_len, max_context", [(16, 8, 32), (20, 10, 24)])
+def test_cached_inference_matches_uncached(models, make_inputs, seq_len, pred_len, max_context):
+    tokenizer, model = models
+    x, x_stamp, y_stamp = make_inputs(2, seq_len, pred_len)
+
+    outputs = []
+    for use_cache in (False, True):
+        torch.manual_seed(0)
+        outputs.append(auto_regressive_inference(
+            tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len,
+            T=1.0, top_k=1, top_p=1.0, sample_count=2, use_cache=use_cache,
+        ))
+
+    np.testing.assert_allclose(outputs[1], outputs[0], rtol=1e-4, atol=1e-5)
+
+
+def test_sliding_kv_cache_matches_window_recompute():
+    attn = MultiHeadAttentionWithRoPE(d_model=32, n_heads=4).eval()
+    window, steps = 4, 20  # long enough to evict and to re-base rotary positions several times
+    x = torch.randn(2, steps, 32)
+
+    kv_cache = KVCache(window, sliding=True)
+    with torch.no_grad():
+        for t in range(steps):
+            cached = attn(x[:, t:t + 1], kv_cache=kv_cache)
+            reference = attn(x[:, max(0, t - window + 1):t + 1])[:, -1:]
+            torch.testing.assert_close(cached, reference, rtol=1e-4, atol=1e-5)
+    assert kv_cache.offset <= 2 * window
+
+
+def test_sliding_window_inference_within_context_matches_uncached(models, make_inputs):
+    tokenizer, model = models
+    x, x_stamp, y_stamp = make_inputs(2, 16, 8)
+
+    outputs = []
+    for kwargs in ({"use_cache": False}, {"use_cache": True, "sliding_window": True}):
+        torch.manual_seed(0)
+        outputs.append(auto_regressive_inference(
+            tokenizer, model, x, x_stamp, y_stamp, 32, 8, T=1.0, top_k=1, top_p=1.0, sample_count=1, **kwargs,
+        ))
+
+    np.testing.assert_allclose(outputs[1], outputs[0], rtol=1e-4, atol=1e-5)
+
+
+def test_sliding_window_inference_past_context(models, make_inputs):
+    tokenizer, model = models
+    seq_len, pred_len, max_context = 12, 30, 16
+    x, x_stamp, y_stamp = make_inputs(2, seq_len, pred_len)
+
+    preds = auto_regressive_inference(
+        tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len,
+        T=1.0, top_k=0, top_p=0.9, sample_count=2, sliding_window=True,
+    )
+
+    assert preds.shape == (2, max_context, x.size(-1))
+    assert np.isfinite(preds).all()
+
+
+def test_rotary_table_matches_reference_and_is_shared(models):
+    tokenizer, model = models
+    dim, seq_len, offset = 8, 6, 700  # offset past the precomputed range forces the table to grow
+    rotary = RotaryPositionalEmbedding(dim, max_len=16)
+    q, k = torch.randn(2, 3, seq_len, dim), torch.randn(2, 3, seq_len, dim)
+
+    t = torch.arange(offset, offset + seq_len).float()
+    emb = torch.cat([torch.outer(t, rotary.inv_freq)] * 2, dim=-1)
+    rotate_half = lambda x: torch.cat((-x[..., dim // 2:], x[..., :dim // 2]), dim=-1)
+    q_rot, k_rot = rotary(q, k, offset=offset)
+    torch.testing.assert_close(q_rot, q * emb.cos() + rotate_half(q) * emb.sin(), rtol=1e-4, atol=1e-5)
+    torch.testing.assert_close(k_rot, k * emb.cos() + rotate_half(k) * emb.sin(), rtol=1e-4, atol=1e-5)
+
+    assert len({id(layer.self_attn.rotary) for layer in model.transformer}) == 1
+    assert len({id(layer.self_attn.rotary) for layer in list(tokenizer.encoder) + list(tokenizer.decoder)}) == 1
+    assert "transformer.0.self_attn.rotary.inv_freq" in model.state_dict()
+    assert not any("cos_table" in key for key in model.state_dict())
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import torch
+
+from model import KronosPredictor
+from model.kronos import StreamingPathStats
+
+
+def test_streaming_path_stats_matches_full_sample():
+    paths = torch.randn(3, 500, 4, 2).clamp(-4.9, 4.9)
+    stats = StreamingPathStats((3, 4, 2), "cpu", quantile_bins=1000, value_range=(-5, 5))
+    for chunk in paths.split(64, dim=1):
+        stats.update(chunk)
+
+    torch.testing.assert_close(stats.mean, paths.mean(dim=1), rtol=1e-4, atol=1e-5)
+    torch.testing.assert_close(stats.variance, paths.var(dim=1), rtol=1e-4, atol=1e-5)
+    for q in (0.05, 0.5, 0.95):
+        # Histogram quantiles are exact up to interpolation inside one bin (plus one sample of rank slack).
+        torch.testing.assert_close(stats.quantile(q), torch.quantile(paths, q, dim=1), rtol=0, atol=0.05)
+
+
+def test_streaming_path_stats_widens_range():
+    # Heavy tails far outside the initial range, arriving only in later chunks.
+    paths = torch.randn(2, 600, 3, 2) * torch.linspace(1, 8, 600).view(1, -1, 1, 1)
+    stats = StreamingPathStats((2, 3, 2), "cpu", quantile_bins=1000, value_range=(-5, 5))
+    for chunk in paths.split(100, dim=1):
+        stats.update(chunk)
+
+    assert stats.low <= paths.min() and stats.high >= paths.max()
+    assert stats.hist.sum() == paths.numel()
+    for q in (0.05, 0.5, 0.95):
+        # Within one bin of the sample quantiles one rank percent away on either side.
+        estimate = stats.quantile(q)
+        assert (estimate >= torch.quantile(paths, q - 0.01, dim=1) - stats.bin_width).all()
+        assert (estimate <= torch.quantile(paths, q + 0.01, dim=1) + stats.bin_width).all()
+    torch.testing.assert_close(stats.quantile(0.0), paths.amin(dim=1))
+    torch.testing.assert_close(stats.quantile(1.0), paths.amax(dim=1))
+
+
+def test_predict_monte_carlo(models):
+    tokenizer, model = models
+    seq_len, pred_len, n_paths = 24, 6, 10
+    timestamps = pd.Series(pd.date_range("2024-01-01 09:30", periods=seq_len + pred_len, freq="5min"))
+    df = pd.DataFrame(np.random.rand(seq_len, 6) + 10, columns=["open", "high", "low", "close", "volume", "amount"])
+
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32)
+    result = predictor.predict_monte_carlo(
+        df, timestamps[:seq_len], timestamps[seq_len:], pred_len, n_paths=n_paths, chunk_size=4,
+        quantiles=(0.1, 0.9), return_paths=True,
+    )
+
+    assert result["paths"].shape == (n_paths, pred_len, 6)
+    np.testing.assert_allclose(result["mean"].values, result["paths"].mean(axis=0), rtol=1e-4)
+    assert (result["quantiles"][0.1].values <= result["quantiles"][0.9].values + 1e-6).all()
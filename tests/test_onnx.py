@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import torch
+
+from model import KronosPredictor, OnnxKronosPredictor, export_onnx
+from model.onnx_runtime import OnnxKronosRuntime, sample_from_logits as numpy_sample_from_logits
+
+ONNX_MAX_CONTEXT = 24
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory, build_tokenizer, build_model):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    torch.manual_seed(0)
+    tokenizer, model = build_tokenizer(), build_model()
+    onnx_dir = tmp_path_factory.mktemp("onnx")
+    export_onnx(model, tokenizer, str(onnx_dir), max_context=ONNX_MAX_CONTEXT)
+    return tokenizer, model, str(onnx_dir)
+
+
+def test_onnx_graphs_match_eager(exported, make_inputs):
+    tokenizer, model, onnx_dir = exported
+    runtime = OnnxKronosRuntime(onnx_dir)
+    x, x_stamp, _ = make_inputs(3, 12, 0)
+    mask = torch.zeros(3, 12, dtype=torch.bool)
+    mask[0, :4] = True
+
+    with torch.no_grad():
+        s1_ids, s2_ids = tokenizer.encode(x, half=True, padding_mask=mask)
+        ort_s1, ort_s2 = runtime.encode(x.numpy(), mask.numpy())
+        np.testing.assert_array_equal(ort_s1, s1_ids.numpy())
+        np.testing.assert_array_equal(ort_s2, s2_ids.numpy())
+
+        kv_cache = model.init_kv_cache(ONNX_MAX_CONTEXT)
+        logits, context = model.decode_s1(s1_ids[:, :8], s2_ids[:, :8], x_stamp[:, :8], padding_mask=mask[:, :8], kv_cache=kv_cache)
+        ort_logits, ort_context, _, past_k, past_v = runtime.prefill(s1_ids[:, :8].numpy(), s2_ids[:, :8].numpy(), x_stamp[:, :8].numpy(),
+                                                                  mask[:, :8].numpy())
+        np.testing.assert_allclose(ort_logits, logits.numpy(), rtol=1e-4, atol=1e-4)
+        np.testing.assert_allclose(ort_context, context.numpy(), rtol=1e-4, atol=1e-4)
+
+        for t in range(8, 12):
+            logits, context = model.decode_s1(s1_ids[:, t:t + 1], s2_ids[:, t:t + 1], x_stamp[:, t:t + 1], kv_cache=kv_cache)
+            ort_logits, ort_context, _, past_k, past_v = runtime.decode_s1(s1_ids[:, t:t + 1].numpy(), s2_ids[:, t:t + 1].numpy(),
+                                                                        x_stamp[:, t:t + 1].numpy(), mask[:, :t + 1].numpy(), past_k, past_v)
+            np.testing.assert_allclose(ort_logits, logits.numpy(), rtol=1e-4, atol=1e-4)
+            np.testing.assert_allclose(ort_context, context.numpy(), rtol=1e-4, atol=1e-4)
+
+        full_context = model.decode_s1(s1_ids, s2_ids, x_stamp, padding_mask=mask)[1]
+        s2_logits = model.decode_s2(full_context, s1_ids[:, -1:], padding_mask=mask)[:, -1:]
+        ort_s2_logits = runtime.decode_s2(full_context[:, -1:].numpy(), s1_ids[:, -1:].numpy(),
+                                          model.project_s2_context(full_context).numpy(), mask.numpy())
+        np.testing.assert_allclose(ort_s2_logits, s2_logits.numpy(), rtol=1e-4, atol=1e-4)
+
+        decoded = tokenizer.decode([s1_ids, s2_ids], half=True, padding_mask=mask)
+        np.testing.assert_allclose(runtime.decode(s1_ids.numpy(), s2_ids.numpy(), mask.numpy()), decoded.numpy(), rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("seq_len", [16, 30])  # KV-cached steps, then window recompute past max_context
+def test_onnx_predictor_matches_eager(exported, make_frame, seq_len):
+    tokenizer, model, onnx_dir = exported
+    eager = KronosPredictor(model, tokenizer, device="cpu", max_context=ONNX_MAX_CONTEXT)
+    onnx = OnnxKronosPredictor(onnx_dir)
+    frames = [make_frame(seq_len, 6, 0), make_frame(seq_len - 5, 4, 1)]
+    params = dict(T=1.0, top_k=1, top_p=1.0, sample_count=2, verbose=False)
+
+    df, x_ts, y_ts = frames[0]
+    expected = eager.predict(df, x_ts, y_ts, 6, **params)
+    np.testing.assert_allclose(onnx.predict(df, x_ts, y_ts, 6, **params).values, expected.values, rtol=1e-3, atol=1e-3)
+
+    args = [list(column) for column in zip(*frames)]
+    expected = eager.predict_batch(*args, pred_len=[6, 4], **params)
+    for got, want in zip(onnx.predict_batch(*args, pred_len=[6, 4], **params), expected):
+        np.testing.assert_allclose(got.values, want.values, rtol=1e-3, atol=1e-3)
+
+    # Torch-only features are absent rather than stubbed.
+    assert not hasattr(onnx, "predict_stream") and not hasattr(onnx, "predict_monte_carlo")
+    with pytest.raises(ValueError):
+        onnx.predict(df, x_ts, y_ts, 6, adapter="trend", **params)
+
+
+def test_numpy_sampler_filters_like_torch():
+    rng = np.random.default_rng(0)
+    logits = np.log(np.array([[0.5, 0.3, 0.15, 0.05]]))
+    draws = numpy_sample_from_logits(np.repeat(logits, 20000, axis=0), top_p=0.7, rng=rng)[:, 0]
+    assert set(np.unique(draws)) == {0, 1}
+    np.testing.assert_allclose(np.bincount(draws, minlength=4)[:2] / 20000, [0.625, 0.375], atol=0.015)
+    assert set(numpy_sample_from_logits(np.repeat(logits, 100, axis=0), top_k=1, rng=rng)[:, 0]) == {0}
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import torch
+
+from model import KronosPredictor, PredictorPool
+
+
+def test_predictor_pool_matches_predict_batch(models, make_frame):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32)
+    seq_lens, pred_lens = [20, 12, 17, 9, 25], [8, 5, 8, 3, 6]
+    series = [make_frame(seq_len, pred_len, seed) for seed, (seq_len, pred_len) in enumerate(zip(seq_lens, pred_lens))]
+    dfs, x_ts, y_ts = (list(column) for column in zip(*series))
+
+    with torch.no_grad():
+        expected = predictor.predict_batch(dfs, x_ts, y_ts, pred_lens, top_k=1, verbose=False)
+    with PredictorPool(predictor, n_workers=2, num_threads=1, chunk_size=2, seed=0) as pool:
+        results = pool.predict_batch(dfs, x_ts, y_ts, pred_lens, top_k=1)
+        with pytest.raises(ValueError):
+            pool.predict(dfs[0].drop(columns="close"), x_ts[0], y_ts[0], pred_lens[0])
+        stats = pool.stats()
+
+    for result, exp in zip(results, expected):
+        np.testing.assert_allclose(result.values, exp.values, rtol=1e-4, atol=1e-5)
+        assert result.index.equals(exp.index)
+    # Five series in chunks of two, plus the failed request.
+    assert sum(s['tasks'] for s in stats) == 4
+    assert len({s['pid'] for s in stats}) == 2 and all(0.0 <= s['utilization'] <= 1.0 for s in stats)
+    assert model.transformer[0].self_attn.q_proj.weight.is_shared()
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from model import KronosPredictor
+from model.kronos import auto_regressive_inference
+
+
+@pytest.mark.parametrize("max_context", [32, 24])
+def test_ragged_predict_batch_matches_single_series(models, make_frame, max_context):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=max_context)
+    seq_lens, pred_lens = [20, 12, 17], [8, 5, 8]
+    series = [make_frame(seq_len, pred_len, seed) for seed, (seq_len, pred_len) in enumerate(zip(seq_lens, pred_lens))]
+
+    with torch.no_grad():
+        batch_dfs = predictor.predict_batch(
+            [s[0] for s in series], [s[1] for s in series], [s[2] for s in series], pred_lens,
+            T=1.0, top_k=1, top_p=1.0, sample_count=1, verbose=False,
+        )
+        for (df, x_ts, y_ts), pred_len, batch_df in zip(series, pred_lens, batch_dfs):
+            single_df = predictor.predict(df, x_ts, y_ts, pred_len, T=1.0, top_k=1, top_p=1.0, sample_count=1, verbose=False)
+            assert batch_df.shape == (pred_len, 6)
+            np.testing.assert_allclose(batch_df.values, single_df.values, rtol=1e-4)
+
+
+@pytest.mark.parametrize("seq_len, pred_len, chunk_size", [(20, 8, 3), (30, 10, 1)])
+def test_predict_stream_matches_predict(models, make_frame, seq_len, pred_len, chunk_size):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32)
+    df, x_ts, y_ts = make_frame(seq_len, pred_len, 0)
+
+    chunks = list(predictor.predict_stream(df, x_ts, y_ts, pred_len, T=1.0, top_k=1, top_p=1.0, sample_count=1, chunk_size=chunk_size))
+    expected = predictor.predict(df, x_ts, y_ts, pred_len, T=1.0, top_k=1, top_p=1.0, sample_count=1, verbose=False)
+
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    streamed = pd.concat(chunks)
+    assert (streamed.index == expected.index).all()
+    np.testing.assert_allclose(streamed.values, expected.values, rtol=1e-4)
+
+
+def test_folded_embeddings_match_unfolded(build_model, make_inputs):
+    model = build_model()
+    s1_ids = torch.randint(0, 2 ** model.s1_bits, (2, 10))
+    s2_ids = torch.randint(0, 2 ** model.s2_bits, (2, 10))
+    _, stamp, _ = make_inputs(2, 10, 0)
+
+    with torch.no_grad():
+        expected = model.decode_s1(s1_ids, s2_ids, stamp)
+        model.fold_embeddings()
+        folded = model.decode_s1(s1_ids, s2_ids, stamp)
+
+    for got, want in zip(folded, expected):
+        torch.testing.assert_close(got, want, rtol=1e-4, atol=1e-5)
+    assert not any("folded" in key for key in model.state_dict())
+
+
+def test_bfloat16_predictor_keeps_fp32_guards(fresh_models, make_frame):
+    tokenizer, model = fresh_models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32, dtype="bfloat16")
+    df, x_ts, y_ts = make_frame(20, 6, 0)
+
+    assert model.transformer[0].ffn.w1.weight.dtype == torch.bfloat16
+    assert model.transformer[0].self_attn.rotary.inv_freq.dtype == torch.float32
+    # Under the autocast the predictor runs in, the KV cache is kept in bfloat16.
+    with torch.no_grad(), torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+        kv_cache = model.init_kv_cache(8)
+        model.decode_s1(torch.zeros(1, 4, dtype=torch.long), torch.zeros(1, 4, dtype=torch.long), kv_cache=kv_cache)
+    assert kv_cache[0].k.dtype == torch.bfloat16
+
+    pred_df = predictor.predict(df, x_ts, y_ts, 6, T=1.0, top_k=1, top_p=1.0, sample_count=1, verbose=False)
+    assert pred_df.shape == (6, 6)
+    assert np.isfinite(pred_df.values).all()
+
+
+def test_packed_weights_match_unpacked_and_load_checkpoints(fresh_models, make_inputs):
+    tokenizer, model = fresh_models
+    x, x_stamp, y_stamp = make_inputs(2, 12, 4)
+    state_dict = {k: v.clone() for k, v in model.state_dict().items()}
+    with torch.no_grad():
+        expected = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 16, 4, top_k=1, top_p=1.0, sample_count=2)
+
+    model.pack_weights()
+    tokenizer.pack_weights()
+    attn, ffn = model.transformer[0].self_attn, model.transformer[0].ffn
+    # Parameters are views into the packed tensors; checkpoints keep their layout.
+    assert attn.k_proj.weight.data_ptr() == attn.qkv_weight[attn.d_model:].data_ptr()
+    assert ffn.w3.weight.data_ptr() == ffn.w13_weight[ffn.w1.out_features:].data_ptr()
+    assert model.dep_layer.cross_attn.kv_weight is not None
+    assert model.state_dict().keys() == state_dict.keys()
+    with torch.no_grad():
+        packed = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 16, 4, top_k=1, top_p=1.0, sample_count=2)
+    np.testing.assert_allclose(packed, expected, rtol=1e-4, atol=1e-5)
+
+    # Loading weights into a packed model updates the packed projections.
+    model.load_state_dict({k: torch.zeros_like(v) if k.endswith("v_proj.weight") else v for k, v in state_dict.items()})
+    assert not attn.qkv_weight[2 * attn.d_model:].any()
+    model.load_state_dict(state_dict)
+    torch.testing.assert_close(attn.qkv_weight[2 * attn.d_model:], state_dict["transformer.0.self_attn.v_proj.weight"])
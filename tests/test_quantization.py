@@ -0,0 +1,29 @@
+import numpy as np
+import torch
+
+from model import quantize
+from model.kronos import auto_regressive_inference
+
+
+def test_int8_quantization_scope_and_accuracy(fresh_models, make_inputs):
+    tokenizer, model = fresh_models
+    x, x_stamp, y_stamp = make_inputs(2, 16, 4)
+    with torch.no_grad():
+        tokens = tokenizer.encode(x, half=True)
+        expected = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 32, 4, top_k=1, top_p=1.0, sample_count=1)
+
+    quantize(model, tokenizer)
+    quantized_types = {type(m) for m in model.transformer.modules()} | {type(m) for m in tokenizer.decoder.modules()}
+    assert torch.nn.Linear not in quantized_types
+    assert type(model.head.proj_s1) is not torch.nn.Linear
+    # Token selection and embedding paths stay in full precision.
+    assert type(model.embedding.fusion_proj) is torch.nn.Linear
+    assert type(tokenizer.quant_embed) is torch.nn.Linear
+    assert all(type(m.w1) is torch.nn.Linear for m in tokenizer.encoder.modules() if hasattr(m, 'w1'))
+
+    with torch.no_grad():
+        for got, want in zip(tokenizer.encode(x, half=True), tokens):
+            assert torch.equal(got, want)
+        preds = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 32, 4, top_k=1, top_p=1.0, sample_count=1)
+    assert preds.shape == expected.shape
+    assert np.isfinite(preds).all()
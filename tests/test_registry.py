@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import torch
+
+from model import Kronos, KronosPredictor
+from model.registry import ModelRegistry, load_checkpoint, mmap_safetensors
+
+
+def test_registry_mmap_loading_and_cache(tmp_path, fresh_models, make_frame):
+    tokenizer, model = fresh_models
+    tokenizer.save_pretrained(tmp_path / "tokenizer")
+    model.save_pretrained(tmp_path / "model")
+
+    # Memory-mapped tensors match the saved weights without copying them out of the file mapping.
+    tensors = mmap_safetensors(tmp_path / "model" / "model.safetensors")
+    assert tensors.keys() == model.state_dict().keys()
+    for name, value in model.state_dict().items():
+        torch.testing.assert_close(tensors[name], value, rtol=0, atol=0)
+    loaded = load_checkpoint(Kronos, tmp_path / "model")
+    assert not loaded.training
+    assert loaded.norm.weight.untyped_storage().nbytes() > loaded.norm.weight.nbytes  # A view into the whole file.
+
+    registry = ModelRegistry(local_files_only=True)
+    cached_model, cached_tokenizer = registry.load(str(tmp_path / "model"), str(tmp_path / "tokenizer"))
+    assert registry.load(str(tmp_path / "model"), str(tmp_path / "tokenizer")) == (cached_model, cached_tokenizer)
+    bf16_model, bf16_tokenizer = registry.load(str(tmp_path / "model"), str(tmp_path / "tokenizer"), dtype="bfloat16")
+    assert bf16_model is not cached_model and bf16_tokenizer is cached_tokenizer
+    assert bf16_model.norm.weight.dtype == torch.bfloat16 and bf16_tokenizer.embed.weight.dtype == torch.float32
+    assert len(registry) == 3
+    with pytest.raises(FileNotFoundError):
+        registry.load("NeoQuasar/not-a-cached-model", str(tmp_path / "tokenizer"))
+
+    series = make_frame(12, 4, 0)
+    with torch.no_grad():
+        expected = KronosPredictor(model, tokenizer, device="cpu", max_context=16).predict(*series, 4, T=1.0, top_k=1, top_p=1.0, verbose=False)
+        # Predictors built twice on the same cached model (packing is idempotent) keep matching.
+        for _ in range(2):
+            predictor = KronosPredictor(cached_model, cached_tokenizer, device="cpu", max_context=16, pack_weights=True)
+            obtained = predictor.predict(*series, 4, T=1.0, top_k=1, top_p=1.0, verbose=False)
+            np.testing.assert_allclose(obtained.values, expected.values, rtol=1e-5)
+    assert cached_model.transformer[0].self_attn.q_proj.weight.data_ptr() == cached_model.transformer[0].self_attn.qkv_weight.data_ptr()
+    registry.clear()
+    assert len(registry) == 0
+
+
+@pytest.mark.parametrize("kwargs", [dict(dtype="bfloat16"), dict(quantize="int8")])
+def test_registry_evicts_modules_changed_by_predictor(tmp_path, fresh_models, kwargs):
+    tokenizer, model = fresh_models
+    tokenizer.save_pretrained(tmp_path / "tokenizer")
+    model.save_pretrained(tmp_path / "model")
+    registry = ModelRegistry(local_files_only=True)
+    model_id, tokenizer_id = str(tmp_path / "model"), str(tmp_path / "tokenizer")
+
+    cached_model, cached_tokenizer = registry.load(model_id, tokenizer_id)
+    KronosPredictor(cached_model, cached_tokenizer, device="cpu", max_context=16, **kwargs)
+    # The predictor changed the cached modules in place; loading again builds fresh fp32 ones.
+    loaded_model, loaded_tokenizer = registry.load(model_id, tokenizer_id)
+    assert loaded_model is not cached_model
+    assert loaded_model.norm.weight.dtype == torch.float32
+    assert type(loaded_model.head.proj_s1) is torch.nn.Linear
+    assert (loaded_tokenizer is cached_tokenizer) == ("quantize" not in kwargs)
+
+    # A predictor that leaves the modules as they are keeps them cached.
+    KronosPredictor(loaded_model, loaded_tokenizer, device="cpu", max_context=16)
+    assert registry.load(model_id, tokenizer_id) == (loaded_model, loaded_tokenizer)
@@ -0,0 +1,66 @@
+import pytest
+import torch
+
+from model.kronos import sample_from_logits
+from model.sampling import Sampler, filtered_probs
+
+VOCAB = 12
+N_DRAWS = 40000
+
+
+def empirical_distribution(sampler, logits, **params):
+    draws = sampler(logits.expand(N_DRAWS, -1).contiguous(), **params).squeeze(-1)
+    return torch.bincount(draws, minlength=logits.size(-1)).float() / N_DRAWS
+
+
+@pytest.fixture
+def logits():
+    torch.manual_seed(0)
+    return torch.randn(1, VOCAB) * 2
+
+
+@pytest.mark.parametrize("params", [
+    dict(temperature=1.0, top_k=0, top_p=1.0),
+    dict(temperature=0.7, top_k=0, top_p=0.8),
+    dict(temperature=1.3, top_k=3, top_p=1.0),
+])
+@pytest.mark.parametrize("candidates", [2, 64])
+def test_nucleus_sampler_matches_reference_distribution(logits, params, candidates):
+    expected = filtered_probs(logits, params["temperature"], params["top_k"], params["top_p"])[0]
+    observed = empirical_distribution(Sampler("nucleus", candidates=candidates), logits, **params)
+
+    assert torch.equal(observed > 0, expected > 0)
+    torch.testing.assert_close(observed, expected, rtol=0, atol=0.015)
+
+
+def test_gumbel_sampler_matches_reference_distribution(logits):
+    expected = filtered_probs(logits, 0.9, 4, 1.0)[0]
+    observed = empirical_distribution(Sampler("gumbel"), logits, temperature=0.9, top_k=4)
+
+    torch.testing.assert_close(observed, expected, rtol=0, atol=0.015)
+    with pytest.raises(ValueError):
+        Sampler("gumbel")(logits, top_p=0.9)
+
+
+def test_per_row_parameters_match_per_request_sampling():
+    torch.manual_seed(0)
+    logits = torch.randn(3, VOCAB) * 2
+    temperature = torch.tensor([0.5, 1.0, 2.0])
+    top_k = torch.tensor([0, 2, 0])
+    top_p = torch.tensor([0.7, 1.0, 1.0])
+
+    batch = logits.repeat_interleave(N_DRAWS, dim=0)
+    draws = Sampler()(batch, temperature.repeat_interleave(N_DRAWS), top_k.repeat_interleave(N_DRAWS),
+                      top_p.repeat_interleave(N_DRAWS)).view(3, N_DRAWS)
+    for row in range(3):
+        expected = filtered_probs(logits[row:row + 1], temperature[row].item(), top_k[row].item(), top_p[row].item())[0]
+        observed = torch.bincount(draws[row], minlength=VOCAB).float() / N_DRAWS
+        torch.testing.assert_close(observed, expected, rtol=0, atol=0.015)
+
+
+def test_greedy_sampling():
+    batch = torch.randn(4, VOCAB)
+    expected = batch.argmax(dim=-1, keepdim=True)
+    assert torch.equal(Sampler("greedy")(batch), expected)
+    assert torch.equal(sample_from_logits(batch, temperature=0.5, top_k=0, top_p=0.9, sample_logits=False), expected)
+    assert torch.equal(Sampler("nucleus")(batch, top_k=1), expected)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import torch
+
+from model import KronosPredictor
+from model.scheduler import ContinuousBatchScheduler
+
+
+def test_continuous_batching_matches_single_requests(models, make_frame):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32, sliding_window=True)
+    seq_lens, pred_lens, sample_counts = [20, 12, 30, 9, 17], [8, 3, 10, 5, 2], [1, 2, 1, 1, 2]
+    series = [make_frame(seq_len, pred_len, seed) for seed, (seq_len, pred_len) in enumerate(zip(seq_lens, pred_lens))]
+
+    # Three rows force later requests to wait for earlier ones to retire; the third runs past max_context.
+    scheduler = ContinuousBatchScheduler(predictor, max_batch_size=3)
+    ids = [scheduler.submit(*s, pred_len, T=1.0, top_k=1, top_p=1.0, sample_count=n) for s, pred_len, n in zip(series, pred_lens, sample_counts)]
+    stopped = scheduler.submit(*make_frame(15, 6, 7), 6, top_k=1, stop=lambda s1_ids, s2_ids: s1_ids.size(1) == 4)
+    cancelled = scheduler.submit(*make_frame(15, 6, 8), 6, top_k=1)
+    scheduler.cancel(cancelled)
+    with torch.no_grad():
+        results = dict(scheduler.run())
+        for request_id, (df, x_ts, y_ts), pred_len in zip(ids, series, pred_lens):
+            expected = predictor.predict(df, x_ts, y_ts, pred_len, T=1.0, top_k=1, top_p=1.0, verbose=False)
+            np.testing.assert_allclose(results[request_id].values, expected.values, rtol=1e-4, atol=1e-5)
+            assert results[request_id].index.equals(expected.index)
+    assert len(results[stopped]) == 4 and cancelled not in results
+    assert len(scheduler) == 0 and scheduler.n_rows == 0
+    # Requests were admitted as rows freed up, so there are fewer steps than running them one after another.
+    assert scheduler.steps < sum(pred_lens) + 4
+
+
+def test_paged_scheduler_matches_dense_and_frees_pages(models, make_frame):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32, sliding_window=True)
+    seq_lens, pred_lens, sample_counts = [20, 12, 30, 9], [8, 3, 10, 5], [1, 2, 1, 1]
+    series = [make_frame(seq_len, pred_len, seed) for seed, (seq_len, pred_len) in enumerate(zip(seq_lens, pred_lens))]
+
+    def run(**kwargs):
+        scheduler = ContinuousBatchScheduler(predictor, max_batch_size=3, **kwargs)
+        ids = [scheduler.submit(*s, pred_len, top_k=1, sample_count=n) for s, pred_len, n in zip(series, pred_lens, sample_counts)]
+        with torch.no_grad():
+            results = dict(scheduler.run())
+        return scheduler, [results[i] for i in ids]
+
+    _, dense = run()
+    # The page budget only fits some of the requests at a time, so admission waits for pages to be freed.
+    paged, results = run(page_size=4, max_pages=24)
+    for result, expected in zip(results, dense):
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-4, atol=1e-5)
+    stats = paged.memory_stats()
+    assert stats['sequences'] == 0 and stats['pages_used'] == 0 and stats['pages_reserved'] == 0
+    assert 0 < stats['peak_pages_used'] <= 24 and stats['pages_allocated'] <= 24
+
+    half, results = run(page_size=4, cache_dtype="bfloat16")
+    assert half.cache.k.dtype == torch.bfloat16
+    for result, expected in zip(results, dense):
+        assert result.shape == expected.shape and np.isfinite(result.values).all()
+
+    with pytest.raises(ValueError):
+        ContinuousBatchScheduler(predictor, page_size=4, max_pages=2).submit(*series[0], pred_lens[0])
@@ -0,0 +1,31 @@
+import asyncio
+
+import numpy as np
+import torch
+
+from model import KronosPredictor
+from model.serving import AsyncKronosPredictor
+
+
+def test_async_predictor_coalesces_requests(models, make_frame):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=32)
+    seq_lens, pred_lens = [20, 12, 17, 20, 9], [8, 5, 8, 3, 6]
+    series = [make_frame(seq_len, pred_len, seed) for seed, (seq_len, pred_len) in enumerate(zip(seq_lens, pred_lens))]
+    invalid = make_frame(10, 4, 9)
+    invalid[0].iloc[3, 0] = np.nan
+
+    async def serve():
+        async with AsyncKronosPredictor(predictor, max_batch_size=4, max_wait=0.05) as server:
+            requests = [server.predict(*s, pred_len, T=1.0, top_k=1, top_p=1.0) for s, pred_len in zip(series, pred_lens)]
+            return await asyncio.gather(*requests, server.predict(*invalid, 4, top_k=1), return_exceptions=True), server
+
+    with torch.no_grad():
+        results, server = asyncio.run(serve())
+        for (df, x_ts, y_ts), pred_len, result in zip(series, pred_lens, results):
+            expected = predictor.predict(df, x_ts, y_ts, pred_len, T=1.0, top_k=1, top_p=1.0, verbose=False)
+            np.testing.assert_allclose(result.values, expected.values, rtol=1e-4)
+            assert result.index.equals(expected.index)
+    # The invalid request fails on its own; the others are served in max_batch_size batches.
+    assert isinstance(results[-1], ValueError)
+    assert server.requests == 5 and server.batches == 2
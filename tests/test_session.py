@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import torch
+
+from model import ForecastSession, KronosPredictor
+from model.kronos import calc_time_stamps
+
+
+def test_forecast_session_appends_incrementally(models, make_frame):
+    tokenizer, model = models
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+    df, x_ts, y_ts = make_frame(25, 8, 0)
+    timestamps = pd.concat([x_ts, y_ts], ignore_index=True)
+    future = timestamps[25:].reset_index(drop=True)
+
+    with torch.no_grad():
+        session = ForecastSession(predictor, df[:20], x_ts[:20])
+        expected = predictor.predict(df[:20], x_ts[:20], timestamps[20:28].reset_index(drop=True), 8, top_k=1, verbose=False)
+        np.testing.assert_allclose(session.forecast(8, top_k=1).values, expected.values, rtol=1e-4, atol=1e-5)
+
+        # Appended bars are normalized with the frozen statistics of the initial history.
+        session.append(df.iloc[20], x_ts[20])
+        session.append(df[21:])
+        assert len(session) == 25
+        x_norm = np.clip((df.values.astype(np.float32) - session.x_mean) / (session.x_std + 1e-5), -predictor.clip, predictor.clip)
+        x_stamp, y_stamp = calc_time_stamps(x_ts).values, calc_time_stamps(future).values
+        preds = predictor.generate(x_norm[None], x_stamp[None], y_stamp[None], 8, 1.0, 1, 0.9, 1, False)[0]
+        result = session.forecast(8, top_k=1)
+        np.testing.assert_allclose(result.values, preds * (session.x_std + 1e-5) + session.x_mean, rtol=1e-4, atol=1e-4)
+        assert result.index.equals(pd.Index(future))
+        # Forecasting leaves the session unchanged.
+        np.testing.assert_allclose(session.forecast(8, top_k=1).values, result.values)
+
+    rolling = ForecastSession(predictor, df[:20], x_ts[:20], rolling_stats=True)
+    rolling.append(df[20:], x_ts[20:])
+    np.testing.assert_allclose(rolling.x_mean, df.values.mean(axis=0), rtol=1e-5)
+    np.testing.assert_allclose(rolling.x_std, df.values.std(axis=0), rtol=1e-4)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from model.kronos import SpeculativeStats, auto_regressive_inference
+
+
+@pytest.mark.parametrize("seq_len, pred_len, max_context", [(16, 10, 32), (20, 16, 24)])
+def test_speculative_greedy_matches_target(models, build_model, make_inputs, seq_len, pred_len, max_context):
+    tokenizer, model = models
+    draft_model = build_model(n_layers=1, d_model=16, n_heads=2, ff_dim=32)
+    x, x_stamp, y_stamp = make_inputs(2, seq_len, pred_len)
+
+    expected = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len,
+                                         T=1.0, top_k=1, top_p=1.0, sample_count=2, use_cache=False)
+    stats = SpeculativeStats()
+    preds = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len,
+                                      T=1.0, top_k=1, top_p=1.0, sample_count=2, draft_model=draft_model, draft_len=3,
+                                      speculative_stats=stats)
+
+    np.testing.assert_allclose(preds, expected, rtol=1e-4, atol=1e-5)
+    assert stats.emitted == pred_len
+    assert 0.0 <= stats.acceptance_rate <= 1.0
+
+
+def test_speculative_self_draft_accepts_everything(models, make_inputs):
+    tokenizer, model = models
+    x, x_stamp, y_stamp = make_inputs(2, 16, 9)
+
+    stats = SpeculativeStats()
+    auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 32, 9, T=1.0, top_k=0, top_p=1.0, sample_count=2,
+                              draft_model=model, draft_len=4, speculative_stats=stats)
+
+    # Identical draft and target distributions: every draft passes and each round yields draft_len + 1 steps.
+    assert stats.acceptance_rate == pytest.approx(1.0)
+    assert stats.rounds == 2 and stats.emitted == 9
+
+
+def test_speculative_rejects_mismatched_vocabulary(models, build_model, make_inputs):
+    tokenizer, model = models
+    draft_model = build_model(s1_bits=model.s1_bits + 1, n_layers=1, d_model=16, n_heads=2, ff_dim=32)
+    x, x_stamp, y_stamp = make_inputs(1, 8, 4)
+
+    with pytest.raises(ValueError, match="vocabulary"):
+        auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 16, 4, sample_count=1, draft_model=draft_model)
@@ -16,7 +16,7 @@ warnings.filterwarnings('ignore')
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from model import Kronos, KronosTokenizer, KronosPredictor
+    from model import KronosPredictor, load_pretrained
     MODEL_AVAILABLE = True
 except ImportError:
     MODEL_AVAILABLE = False
@@ -796,9 +796,8 @@ def load_model():
         
         model_config = AVAILABLE_MODELS[model_key]
         
-        # Load tokenizer and model
-        tokenizer = KronosTokenizer.from_pretrained(model_config['tokenizer_id'])
-        model = Kronos.from_pretrained(model_config['model_id'])
+        # Load tokenizer and model (cached per device, so switching back to a loaded model is instant)
+        model, tokenizer = load_pretrained(model_config['model_id'], model_config['tokenizer_id'], device=device)
         
         # Create predictor
         predictor = KronosPredictor(model, tokenizer, device=device, max_context=model_config['context_length'])